@@ -1,20 +1,426 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent import futures
 import grpc
 import gRPCCom_pb2
 import gRPCCom_pb2_grpc
+from acq_codec import DICTIONARY, ENCODING_KEY, TABLE_KEY, AcqEncoder, AcqTable, decode_acquisition, wants_dictionary
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed by the *_array methods
+    np = None
+
+# Default batching of streamAcquisition
+STREAM_BATCH_SIZE = 256
+STREAM_MAX_DELAY = 0.05
+STREAM_MAX_PENDING = 4
+
+# Métadonnées des appels en encodage dictionnaire
+DICTIONARY_METADATA = ((ENCODING_KEY, DICTIONARY),)
+
+# Fast path of ReadHeader / ReadData, called without deserializer to keep the raw bytes
+PACKED_METHODS = {
+    "ReadHeader": "/CLMService/ReadHeaderPacked",
+    "ReadData": "/CLMService/ReadDataPacked",
+}
+STREAM_DATA_METHOD = "/CLMService/StreamData"
+
+# Intervalle par défaut de streamData, en secondes
+DATA_INTERVAL = 0.033
+
+
+def channel_options(keepalive_ms=None, keepalive_timeout_ms=None, max_message_size=None):
+    """
+    Build the gRPC channel arguments shared by CLMClient and AsyncCLMClient
+    :param keepalive_ms: Interval between keepalive pings, None to keep the gRPC default
+    :param keepalive_timeout_ms: Time to wait for a ping acknowledgement before closing the connection
+    :param max_message_size: Maximum size of sent and received messages in bytes
+    :return: List of (key, value) channel arguments
+    """
+    options = []
+    if keepalive_ms is not None:
+        options += [
+            ("grpc.keepalive_time_ms", keepalive_ms),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+        ]
+    if keepalive_timeout_ms is not None:
+        options.append(("grpc.keepalive_timeout_ms", keepalive_timeout_ms))
+    if max_message_size is not None:
+        options += [
+            ("grpc.max_send_message_length", max_message_size),
+            ("grpc.max_receive_message_length", max_message_size),
+        ]
+    return options
+
+
+def build_write_request(values_dict):
+    """
+    Build a WriteRequest from a dictionary of int or float values
+    """
+    values = {}
+    for key, value in values_dict.items():
+        if isinstance(value, int):
+            values[key] = gRPCCom_pb2.DataValue(int_value=value)
+        elif isinstance(value, float):
+            values[key] = gRPCCom_pb2.DataValue(float_value=value)
+        else:
+            raise ValueError("Unsupported value type")
+    return gRPCCom_pb2.WriteRequest(values=values)
+
+
+def build_sample(entry):
+    """
+    Build a SimpleAcqData from an acquisition dict (see CLMClient.sendAcquisition), messages are kept as is
+    """
+    if isinstance(entry, gRPCCom_pb2.SimpleAcqData):
+        return entry
+    if "int_value" in entry:
+        return gRPCCom_pb2.SimpleAcqData(
+            source_name=entry["source_name"],
+            value_name=entry["value_name"],
+            int_value=entry["int_value"],
+            time_us=entry.get("time_us", 0)
+        )
+    if "float_value" in entry:
+        return gRPCCom_pb2.SimpleAcqData(
+            source_name=entry["source_name"],
+            value_name=entry["value_name"],
+            float_value=entry["float_value"],
+            time_us=entry.get("time_us", 0)
+        )
+    raise ValueError("Each entry must contain either 'int_value' or 'float_value'")
+
+
+def build_acquisition(acq_values, dictionary=False):
+    """
+    Build an AcquisitionData message from a list of acquisition dicts (see CLMClient.sendAcquisition)
+    :param dictionary: Dictionary-encode the names (see acq_codec)
+    """
+    samples = [build_sample(entry) for entry in acq_values]
+    if dictionary:
+        return AcqEncoder().encode(samples)
+    return gRPCCom_pb2.AcquisitionData(values=samples)
+
+
+def _request_metadata(dictionary):
+    """
+    Metadata of an acquisition call: the encoding is asked for unless it is
+    disabled, the reply of a server that supports it announces it
+    """
+    return None if dictionary is False else DICTIONARY_METADATA
+
+
+def _acquisition_request(samples, dictionary, table):
+    """
+    AcquisitionData of a SendAcquisition call and its metadata
+    :param dictionary: True to encode the names with table, False or None (not negotiated yet) for plain samples
+    :param table: AcqTable shared by the SendAcquisition calls of the client
+    :return: (AcquisitionData, metadata)
+    """
+    if dictionary:
+        table_id, message = table.encode(samples)
+        return message, DICTIONARY_METADATA + ((TABLE_KEY, table_id),)
+    return gRPCCom_pb2.AcquisitionData(values=samples), _request_metadata(dictionary)
+
+
+def _batch_encoder(dictionary):
+    """
+    Function building the AcquisitionData of a batch of SimpleAcqData for one stream
+    """
+    if dictionary:
+        return AcqEncoder().encode
+    return lambda batch: gRPCCom_pb2.AcquisitionData(values=batch)
+
+
+class _StreamEnd:
+    """
+    Last item of a sample queue, error holds the exception raised by the sample iterator
+    """
+    def __init__(self, error=None):
+        self.error = error
+
+
+def _batches(samples, batch_size, max_delay, max_pending, encode):
+    """
+    Pull samples on a thread into a bounded queue and group them in AcquisitionData messages
+    built by encode.
+    The queue fills up when gRPC flow control holds the stream, which then stops
+    the pulling from samples (backpressure).
+    :return: (generator of AcquisitionData, [_StreamEnd] filled when samples is exhausted,
+              threading.Event to set when the call is over)
+    """
+    pending = queue.Queue(maxsize=batch_size * max_pending)
+    end = []
+    stop = threading.Event()
+
+    def put(item):
+        # Ne pas rester bloqué sur une file pleine si l'appel s'est terminé
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def pull():
+        try:
+            for sample in samples:
+                if not put(build_sample(sample)):
+                    return
+        except Exception as e:
+            put(_StreamEnd(e))
+        else:
+            put(_StreamEnd())
+
+    def generate():
+        while True:
+            item = pending.get()
+            batch = []
+            deadline = time.monotonic() + max_delay
+            while not isinstance(item, _StreamEnd):
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= batch_size or remaining <= 0:
+                    break
+                try:
+                    item = pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                yield encode(batch)
+            if isinstance(item, _StreamEnd):
+                end.append(item)
+                return
+
+    threading.Thread(target=pull, daemon=True).start()
+    return generate(), end, stop
+
+
+def _async_batches(samples, batch_size, max_delay, max_pending, encode):
+    """
+    asyncio version of _batches, samples may be an iterator or an async iterator
+    :return: (async generator of AcquisitionData, [_StreamEnd], pulling task)
+    """
+    pending = asyncio.Queue(maxsize=batch_size * max_pending)
+    end = []
+
+    async def pull():
+        try:
+            if hasattr(samples, "__aiter__"):
+                async for sample in samples:
+                    await pending.put(build_sample(sample))
+            else:
+                for sample in samples:
+                    await pending.put(build_sample(sample))
+        except Exception as e:
+            await pending.put(_StreamEnd(e))
+        else:
+            await pending.put(_StreamEnd())
+
+    async def generate():
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await pending.get()
+            batch = []
+            deadline = loop.time() + max_delay
+            while not isinstance(item, _StreamEnd):
+                batch.append(item)
+                remaining = deadline - loop.time()
+                if len(batch) >= batch_size or remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(pending.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if batch:
+                yield encode(batch)
+            if isinstance(item, _StreamEnd):
+                end.append(item)
+                return
+
+    return generate(), end, asyncio.create_task(pull())
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required by the *_array methods")
+
+
+def _read_varint(buffer, pos):
+    result = shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _packed_spans(raw):
+    # (début, longueur) des champs de PackedReadReply tels que le serveur les
+    # écrit : chacun une fois, packé. None pour tout le reste (champ inconnu,
+    # répété ou non packé, type de fil inattendu, message tronqué, longueur de
+    # doubles incomplète, booléen autre que 0 ou 1), le message passe alors par protobuf
+    spans = {}
+    pos = 0
+    try:
+        while pos < len(raw):
+            key, pos = _read_varint(raw, pos)
+            field, wire_type = key >> 3, key & 7
+            if field not in (1, 2, 3) or wire_type != 2 or field in spans:
+                return None
+            length, pos = _read_varint(raw, pos)
+            spans[field] = (pos, length)
+            pos += length
+    except IndexError:
+        return None
+    if pos != len(raw) or spans.get(1, (0, 0))[1] % 8:
+        return None
+    offset, length = spans.get(2, (0, 0))
+    if bytes(raw[offset:offset + length]).translate(None, b"\x00\x01"):
+        return None
+    return spans
+
+
+def packed_views(raw):
+    """
+    Zero-copy views over a serialized PackedReadReply: the packed doubles and
+    bools are used in place, so the cost does not grow with the number of values
+    :param raw: Bytes of the PackedReadReply as received
+    :return: (values float64 array, is_int bool array), read-only
+    """
+    _require_numpy()
+    spans = _packed_spans(raw)
+    if spans is None:
+        reply = gRPCCom_pb2.PackedReadReply.FromString(raw)
+        return np.array(reply.values, np.float64), np.array(reply.is_int, np.bool_)
+    offset, length = spans.get(1, (0, 0))
+    values = np.frombuffer(raw, "<f8", length // 8, offset)
+    offset, length = spans.get(2, (0, 0))
+    is_int = np.frombuffer(raw, np.bool_, length, offset)
+    return values, is_int
+
+
+def packed_trace(raw):
+    """
+    Trace of a serialized PackedReadReply, without decoding the values
+    :return: gRPCCom_pb2.Trace or None if the server did not fill it
+    """
+    spans = _packed_spans(raw)
+    if spans is None:
+        reply = gRPCCom_pb2.PackedReadReply.FromString(raw)
+        return reply.trace if reply.HasField("trace") else None
+    if 3 not in spans:
+        return None
+    offset, length = spans[3]
+    return gRPCCom_pb2.Trace.FromString(bytes(raw[offset:offset + length]))
+
+
+def _output_arrays(n, out, is_int):
+    if out is None:
+        out = np.empty(n, np.float64)
+    if is_int is None:
+        is_int = np.empty(n, np.bool_)
+    if len(out) < n or len(is_int) < n:
+        raise ValueError(f"Preallocated arrays hold {min(len(out), len(is_int))} values, the reply has {n}")
+    return out[:n], is_int[:n]
+
+
+def copy_into(values, is_int, out=None, out_is_int=None):
+    """
+    Copy decoded arrays into preallocated ones
+    :param out: float64 array, None to return values as is
+    :param out_is_int: bool array, allocated if None and out is given
+    :return: (values, is_int) of the reply length
+    """
+    if out is None:
+        return values, is_int
+    out, out_is_int = _output_arrays(len(values), out, out_is_int)
+    np.copyto(out, values)
+    np.copyto(out_is_int, is_int)
+    return out, out_is_int
+
+
+def read_reply_to_array(values, out=None, is_int=None):
+    """
+    Decode the DataValues of a ReadReply into NumPy arrays, for servers without the packed fast path
+    :param values: ReadReply.values
+    :param out: Preallocated float64 array, allocated if None
+    :param is_int: Preallocated bool array, True where the value was an int_value
+    :return: (values, is_int) of the reply length
+    """
+    _require_numpy()
+    out, is_int = _output_arrays(len(values), out, is_int)
+    # Only one member of the oneof is set, the other one reads as 0
+    out[:] = [value.int_value + value.float_value for value in values]
+    is_int[:] = [value.HasField("int_value") for value in values]
+    return out, is_int
+
+
+def history_arrays(channel):
+    """
+    Columns of a HistoryChannel as NumPy arrays
+    :return: (time_us int64, values float64, is_int bool), oldest sample first
+    """
+    _require_numpy()
+    return (np.array(channel.time_us, np.int64), np.array(channel.values, np.float64),
+            np.array(channel.is_int, np.bool_))
+
+
+def _history_request(source_name, value_name, last, since_us):
+    return gRPCCom_pb2.HistoryRequest(source_name=source_name, value_name=value_name, last=last,
+                                      since_us=since_us)
+
+
+def _aggregate_request(source_name, value_name, points, since_us, until_us, method):
+    return gRPCCom_pb2.AggregateRequest(source_name=source_name, value_name=value_name, points=points,
+                                        since_us=since_us, until_us=until_us,
+                                        method=gRPCCom_pb2.AggregateRequest.Method.Value(method))
+
+
+def _data_changed(values, last, deadband):
+    # Une valeur a bougé de plus que la bande morte depuis le dernier envoi
+    return last is None or len(values) != len(last) or bool(np.any(np.abs(values - last) > deadband))
+
+
+def _stream_data_request(interval, deadband):
+    return gRPCCom_pb2.StreamDataRequest(interval_ms=interval * 1000, deadband=deadband)
 
 
 class CLMClient:
     """
     Close Loop Monitoring Client class Module
     """
-    def __init__(self, host="127.0.0.1", port=50051):
+    def __init__(self, host="127.0.0.1", port=50051, timeout=None, keepalive_ms=None,
+                 keepalive_timeout_ms=None, max_message_size=None, dictionary=None):
         """
         Constructor of the CLMClient class
         :param host: Host IP address or hostname (default: '127.0.0.1')
         :param port: Host port number (default: 50051)
+        :param timeout: Deadline of each call in seconds (default: None, no deadline)
+        :param keepalive_ms: Interval between keepalive pings (default: None, gRPC default)
+        :param keepalive_timeout_ms: Keepalive acknowledgement timeout (default: None, gRPC default)
+        :param max_message_size: Maximum message size in bytes (default: None, gRPC default)
+        :param dictionary: Dictionary-encode the acquisition names, None to use it once a reply of the server
+                           announced it supports it
         """
-        self.__channel = grpc.insecure_channel(f"{host}:{port}")
+        options = channel_options(keepalive_ms, keepalive_timeout_ms, max_message_size)
+        self.__channel = grpc.insecure_channel(f"{host}:{port}", options=options)
         self.__stub = gRPCCom_pb2_grpc.CLMServiceStub(self.__channel)
+        self.__timeout = timeout
+        self.__packed = {name: self.__channel.unary_unary(
+            path, request_serializer=gRPCCom_pb2.ReadRequest.SerializeToString)
+            for name, path in PACKED_METHODS.items()}
+        self.__stream_data = self.__channel.unary_stream(
+            STREAM_DATA_METHOD, request_serializer=gRPCCom_pb2.StreamDataRequest.SerializeToString)
+        self.__dictionary = dictionary
+        self.__table = AcqTable()
 
     def is_connected(self):
         """
@@ -23,7 +429,7 @@ class CLMClient:
         """
         try:
             request = gRPCCom_pb2.IsConnectedRequest()
-            response = self.__stub.IsConnected(request)
+            response = self.__stub.IsConnected(request, timeout=self.__timeout)
         except grpc._channel._InactiveRpcError as _:
             return False
         return response.status
@@ -35,7 +441,7 @@ class CLMClient:
         """
         try:
             request = gRPCCom_pb2.ReadRequest()
-            response = self.__stub.ReadHeader(request)
+            response = self.__stub.ReadHeader(request, timeout=self.__timeout)
         except grpc._channel._InactiveRpcError as _:
             return None
         return response.values
@@ -47,29 +453,114 @@ class CLMClient:
         """
         try:
             request = gRPCCom_pb2.ReadRequest()
-            response = self.__stub.ReadData(request)
+            response = self.__stub.ReadData(request, timeout=self.__timeout)
         except grpc._channel._InactiveRpcError as _:
             return None
         return response.values
-        
+
+    def readData_async(self):
+        """
+        Start reading the values from the server without blocking
+        :return: concurrent.futures.Future resolved to the values, or None if the connection is lost.
+                 Cancelling it cancels the call, and it is cancelled if the call is.
+        """
+        result = futures.Future()
+
+        def done(call):
+            if call.cancelled():
+                result.cancel()
+                return
+            try:
+                values = call.result().values
+            except grpc.RpcError:
+                values = None
+            # Le Future rendu a pu être annulé entre-temps
+            if not result.done():
+                result.set_result(values)
+
+        call = self.__stub.ReadData.future(gRPCCom_pb2.ReadRequest(), timeout=self.__timeout)
+        result.add_done_callback(lambda _: result.cancelled() and call.cancel())
+        call.add_done_callback(done)
+        return result
+
+    def readHeader_array(self, out=None, is_int=None):
+        """
+        Read the header into NumPy arrays, see readData_array
+        """
+        return self.__read_array("ReadHeader", out, is_int)
+
+    def readData_array(self, out=None, is_int=None):
+        """
+        Read the values into NumPy arrays instead of DataValue messages.
+        Uses the packed fast path when the server implements it, ReadData otherwise.
+        :param out: Preallocated float64 array to fill, None to get read-only views on the reply
+        :param is_int: Preallocated bool array, True where the value is an int_value
+        :return: (values, is_int) arrays of the reply length or None if the connection is lost
+        """
+        return self.__read_array("ReadData", out, is_int)
+
+    def __read_array(self, name, out, is_int):
+        request = gRPCCom_pb2.ReadRequest()
+        packed = self.__packed[name]
+        try:
+            if packed is not None:
+                try:
+                    raw = packed(request, timeout=self.__timeout)
+                    return copy_into(*packed_views(raw), out, is_int)
+                except grpc._channel._InactiveRpcError as e:
+                    if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+                        raise
+                    # Serveur sans le chemin rapide, on ne le redemande plus
+                    self.__packed[name] = None
+            response = getattr(self.__stub, name)(request, timeout=self.__timeout)
+        except grpc._channel._InactiveRpcError as _:
+            return None
+        return read_reply_to_array(response.values, out, is_int)
+
+    def streamData(self, interval=DATA_INTERVAL, deadband=0.0, with_trace=False):
+        """
+        Iterate over the values when they change, instead of polling readData.
+        Uses the StreamData server stream, or polls readData_array every interval
+        and keeps only the changes when the server does not implement it.
+        :param interval: Minimum time between two values in seconds
+        :param deadband: Absolute change of a value that counts as a change, 0 for every change
+        :param with_trace: Yield (values, is_int, trace) with the Trace of the server, None when polling
+        :return: Iterator of read-only (values, is_int) arrays, ends if the connection is lost
+        """
+        _require_numpy()
+        if self.__stream_data is not None:
+            call = self.__stream_data(_stream_data_request(interval, deadband))
+            try:
+                for raw in call:
+                    yield packed_views(raw) + ((packed_trace(raw),) if with_trace else ())
+                return
+            except grpc.RpcError as e:
+                if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+                    return
+                self.__stream_data = None
+            finally:
+                call.cancel()
+        last = None
+        next_poll = time.monotonic()
+        while True:
+            arrays = self.readData_array()
+            if arrays is None:
+                return
+            if _data_changed(arrays[0], last, deadband):
+                last = arrays[0].copy()
+                yield arrays + ((None,) if with_trace else ())
+            next_poll += interval
+            time.sleep(max(0.0, next_poll - time.monotonic()))
+
     def write(self, values_dict):
         """
         Write the values to the server
         :param values_dict: Dictionary of values to write
         :return: True if the values are written, False otherwise
         """
-        values = {}
-        for key, value in values_dict.items():
-            if isinstance(value, int):
-                values[key] = gRPCCom_pb2.DataValue(int_value=value)
-            elif isinstance(value, float):
-                values[key] = gRPCCom_pb2.DataValue(float_value=value)
-            else:
-                raise ValueError("Unsupported value type")
-
+        request = build_write_request(values_dict)
         try:
-            request = gRPCCom_pb2.WriteRequest(values=values)
-            response = self.__stub.Write(request)
+            response = self.__stub.Write(request, timeout=self.__timeout)
         except grpc._channel._InactiveRpcError as _:
             return False
         return response.status
@@ -78,6 +569,8 @@ class CLMClient:
         """
         Send acquisition data to the server.
         :param acq_values: List of dicts with keys: 'source_name', 'value_name', and one of ('int_value', 'float_value').
+                           Optional 'time_us': acquisition time in microseconds since epoch, on the clock of the
+                           server, else the samples of the call are kept in history with its reception time.
                            Example:
                            [
                                {"source_name": "Sensor1", "value_name": "Temperature", "float_value": 36.7},
@@ -85,47 +578,355 @@ class CLMClient:
                            ]
         :return: True if the server accepted the data, False otherwise
         """
-        try:
-            # Construire la liste de SimpleAcqData
-            values = []
-            for entry in acq_values:
-                if "int_value" in entry:
-                    values.append(
-                        gRPCCom_pb2.SingleAcqData(
-                            source_name=entry["source_name"],
-                            value_name=entry["value_name"],
-                            int_value=entry["int_value"]
-                        )
-                    )
-                elif "float_value" in entry:
-                    values.append(
-                        gRPCCom_pb2.SingleAcqData(
-                            source_name=entry["source_name"],
-                            value_name=entry["value_name"],
-                            float_value=entry["float_value"]
-                        )
-                    )
-                else:
-                    raise ValueError("Each entry must contain either 'int_value' or 'float_value'")
-
-            # Construire le message AcquisitionData
-            request = gRPCCom_pb2.AcquisitionData(values=values)
-
-            # Appeler le service gRPC
-            response = self.__stub.SendAcquisition(request)
+        samples = [build_sample(entry) for entry in acq_values]
+        for _ in range(2):
+            dictionary = self.__dictionary
+            request, metadata = _acquisition_request(samples, dictionary, self.__table)
+            try:
+                response, call = self.__stub.SendAcquisition.with_call(request, timeout=self.__timeout,
+                                                                       metadata=metadata)
+            except grpc._channel._InactiveRpcError as e:
+                # Le serveur a oublié la table de noms : une table neuve les renvoie tous
+                if dictionary and e.code() == grpc.StatusCode.FAILED_PRECONDITION:
+                    self.__table.reset(dict(metadata)[TABLE_KEY])
+                    continue
+                return False
+            self.__negotiate(call.initial_metadata())
+            return response.status
+        return False
 
+    def streamAcquisition(self, samples, batch_size=STREAM_BATCH_SIZE, max_delay=STREAM_MAX_DELAY,
+                          max_pending=STREAM_MAX_PENDING):
+        """
+        Stream acquisition samples to the server over one StreamAcquisition call.
+        Samples are sent in batches of batch_size, or earlier when the oldest one has waited max_delay.
+        :param samples: Iterator of acquisition dicts (see sendAcquisition) or SimpleAcqData, the call
+                        ends when it is exhausted. It is pulled from a separate thread.
+        :param batch_size: Maximum number of samples per message (default: 256)
+        :param max_delay: Maximum time a sample waits for its batch, in seconds (default: 0.05)
+        :param max_pending: Batches buffered before pulling from samples blocks (default: 4)
+        :return: AcquisitionSummary of the server or None if the connection is lost.
+                 An exception raised by samples ends the stream and is raised again after the summary.
+        """
+        dictionary = self.__dictionary
+        requests, end, stop = _batches(samples, batch_size, max_delay, max_pending, _batch_encoder(dictionary))
+        try:
+            response, call = self.__stub.StreamAcquisition.with_call(requests, timeout=self.__timeout,
+                                                                     metadata=_request_metadata(dictionary))
         except grpc._channel._InactiveRpcError:
-            return False
-
-        return response.status
+            return None
+        finally:
+            stop.set()
+        self.__negotiate(call.initial_metadata())
+        if end and end[0].error is not None:
+            raise end[0].error
+        return response
 
     def readAquisition(self):
         """
         Read the values from the server
+        :return: List of SimpleAcqData, decoded if the server replied dictionary-encoded
         """
         try:
             request = gRPCCom_pb2.ReadRequest()
-            response = self.__stub.ReadAcquisition(request)
+            response, call = self.__stub.ReadAcquisition.with_call(request, timeout=self.__timeout,
+                                                                   metadata=_request_metadata(self.__dictionary))
         except grpc._channel._InactiveRpcError as _:
             return None
-        return response.values
\ No newline at end of file
+        self.__negotiate(call.initial_metadata())
+        return decode_acquisition(response)
+
+    def readHistory(self, source_name="", value_name="", last=0, since_us=0):
+        """
+        Read the acquisition samples kept by the server, to fill a chart without polling readAquisition
+        :param source_name: Source of the channels, empty for all
+        :param value_name: Value of the channels, empty for all
+        :param last: Last N samples of each channel, 0 for no limit
+        :param since_us: Only the samples received after this time (microseconds since epoch), 0 for no limit
+        :return: List of HistoryChannel (see history_arrays), None if the call failed or the server keeps no history
+        """
+        try:
+            response = self.__stub.ReadHistory(_history_request(source_name, value_name, last, since_us),
+                                               timeout=self.__timeout)
+        except grpc._channel._InactiveRpcError as _:
+            return None
+        return list(response.channels)
+
+    def aggregateHistory(self, source_name="", value_name="", points=0, since_us=0, until_us=0, method="BUCKETS"):
+        """
+        Read the acquisition history reduced on the server to about points values per channel
+        :param points: Buckets or samples per channel, 0 for the server default (1000)
+        :param since_us: Only the samples received after this time (microseconds since epoch), 0 for no limit
+        :param until_us: Only the samples received up to this time, 0 for no limit
+        :param method: "BUCKETS" for the min / max / mean / last of each bucket of time,
+                       "LTTB" for the samples that keep the shape of the curve (time_us and last)
+        :return: List of AggregateChannel, None if the call failed or the server keeps no history
+        """
+        request = _aggregate_request(source_name, value_name, points, since_us, until_us, method)
+        try:
+            response = self.__stub.AggregateHistory(request, timeout=self.__timeout)
+        except grpc._channel._InactiveRpcError as _:
+            return None
+        return list(response.channels)
+
+    def __negotiate(self, initial_metadata):
+        # Première réponse d'un appel d'acquisition : le serveur y annonce s'il accepte l'encodage dictionnaire
+        if self.__dictionary is None:
+            self.__dictionary = wants_dictionary(initial_metadata)
+
+
+class AsyncCLMClient:
+    """
+    asyncio Close Loop Monitoring Client, same methods as CLMClient as coroutines.
+    All the calls share one grpc.aio channel so they can run concurrently.
+    """
+    def __init__(self, host="127.0.0.1", port=50051, timeout=None, keepalive_ms=None,
+                 keepalive_timeout_ms=None, max_message_size=None, channel=None, dictionary=None):
+        """
+        Constructor of the AsyncCLMClient class
+        :param host: Host IP address or hostname (default: '127.0.0.1')
+        :param port: Host port number (default: 50051)
+        :param timeout: Deadline of each call in seconds (default: None, no deadline)
+        :param keepalive_ms: Interval between keepalive pings (default: None, gRPC default)
+        :param keepalive_timeout_ms: Keepalive acknowledgement timeout (default: None, gRPC default)
+        :param max_message_size: Maximum message size in bytes (default: None, gRPC default)
+        :param channel: Existing grpc.aio channel to reuse instead of opening one
+        :param dictionary: Dictionary-encode the acquisition names, None to use it once a reply of the server
+                           announced it supports it
+        """
+        if channel is None:
+            options = channel_options(keepalive_ms, keepalive_timeout_ms, max_message_size)
+            channel = grpc.aio.insecure_channel(f"{host}:{port}", options=options)
+        self.__channel = channel
+        self.__stub = gRPCCom_pb2_grpc.CLMServiceStub(self.__channel)
+        self.__timeout = timeout
+        self.__packed = {name: self.__channel.unary_unary(
+            path, request_serializer=gRPCCom_pb2.ReadRequest.SerializeToString)
+            for name, path in PACKED_METHODS.items()}
+        self.__stream_data = self.__channel.unary_stream(
+            STREAM_DATA_METHOD, request_serializer=gRPCCom_pb2.StreamDataRequest.SerializeToString)
+        self.__dictionary = dictionary
+        self.__table = AcqTable()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+    async def close(self):
+        """
+        Close the channel
+        """
+        await self.__channel.close()
+
+    async def is_connected(self):
+        """
+        Check if the client is connected to the server
+        :return: True if connected, False otherwise
+        """
+        try:
+            request = gRPCCom_pb2.IsConnectedRequest()
+            response = await self.__stub.IsConnected(request, timeout=self.__timeout)
+        except grpc.aio.AioRpcError as _:
+            return False
+        return response.status
+
+    async def readHeader(self):
+        """
+        Read the header from the server
+        :return: Dictionary of header values or None if the connection is lost
+        """
+        try:
+            request = gRPCCom_pb2.ReadRequest()
+            response = await self.__stub.ReadHeader(request, timeout=self.__timeout)
+        except grpc.aio.AioRpcError as _:
+            return None
+        return response.values
+
+    async def readData(self):
+        """
+        Read the values from the server
+        :return: Dictionary of values or None if the connection is lost
+        """
+        try:
+            request = gRPCCom_pb2.ReadRequest()
+            response = await self.__stub.ReadData(request, timeout=self.__timeout)
+        except grpc.aio.AioRpcError as _:
+            return None
+        return response.values
+
+    async def readHeader_array(self, out=None, is_int=None):
+        """
+        Read the header into NumPy arrays, see CLMClient.readData_array
+        """
+        return await self.__read_array("ReadHeader", out, is_int)
+
+    async def readData_array(self, out=None, is_int=None):
+        """
+        Read the values into NumPy arrays, see CLMClient.readData_array
+        """
+        return await self.__read_array("ReadData", out, is_int)
+
+    async def __read_array(self, name, out, is_int):
+        request = gRPCCom_pb2.ReadRequest()
+        packed = self.__packed[name]
+        try:
+            if packed is not None:
+                try:
+                    raw = await packed(request, timeout=self.__timeout)
+                    return copy_into(*packed_views(raw), out, is_int)
+                except grpc.aio.AioRpcError as e:
+                    if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+                        raise
+                    self.__packed[name] = None
+            response = await getattr(self.__stub, name)(request, timeout=self.__timeout)
+        except grpc.aio.AioRpcError as _:
+            return None
+        return read_reply_to_array(response.values, out, is_int)
+
+    async def streamData(self, interval=DATA_INTERVAL, deadband=0.0, with_trace=False):
+        """
+        Iterate over the values when they change, see CLMClient.streamData
+        :return: Async iterator of read-only (values, is_int) arrays, ends if the connection is lost
+        """
+        _require_numpy()
+        if self.__stream_data is not None:
+            call = self.__stream_data(_stream_data_request(interval, deadband))
+            try:
+                async for raw in call:
+                    yield packed_views(raw) + ((packed_trace(raw),) if with_trace else ())
+                return
+            except grpc.aio.AioRpcError as e:
+                if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+                    return
+                self.__stream_data = None
+            finally:
+                call.cancel()
+        loop = asyncio.get_running_loop()
+        last = None
+        next_poll = loop.time()
+        while True:
+            arrays = await self.readData_array()
+            if arrays is None:
+                return
+            if _data_changed(arrays[0], last, deadband):
+                last = arrays[0].copy()
+                yield arrays + ((None,) if with_trace else ())
+            next_poll += interval
+            await asyncio.sleep(max(0.0, next_poll - loop.time()))
+
+    async def write(self, values_dict):
+        """
+        Write the values to the server
+        :param values_dict: Dictionary of values to write
+        :return: True if the values are written, False otherwise
+        """
+        request = build_write_request(values_dict)
+        try:
+            response = await self.__stub.Write(request, timeout=self.__timeout)
+        except grpc.aio.AioRpcError as _:
+            return False
+        return response.status
+
+    async def sendAcquisition(self, acq_values):
+        """
+        Send acquisition data to the server, see CLMClient.sendAcquisition
+        :return: True if the server accepted the data, False otherwise
+        """
+        samples = [build_sample(entry) for entry in acq_values]
+        for _ in range(2):
+            dictionary = self.__dictionary
+            request, metadata = _acquisition_request(samples, dictionary, self.__table)
+            call = self.__stub.SendAcquisition(request, timeout=self.__timeout, metadata=metadata)
+            try:
+                response = await call
+            except grpc.aio.AioRpcError as e:
+                if dictionary and e.code() == grpc.StatusCode.FAILED_PRECONDITION:
+                    self.__table.reset(dict(metadata)[TABLE_KEY])
+                    continue
+                return False
+            self.__negotiate(await call.initial_metadata())
+            return response.status
+        return False
+
+    async def streamAcquisition(self, samples, batch_size=STREAM_BATCH_SIZE, max_delay=STREAM_MAX_DELAY,
+                                max_pending=STREAM_MAX_PENDING):
+        """
+        Stream acquisition samples to the server, see CLMClient.streamAcquisition
+        :param samples: Iterator or async iterator of acquisition dicts or SimpleAcqData
+        :return: AcquisitionSummary of the server or None if the connection is lost
+        """
+        dictionary = self.__dictionary
+        requests, end, pulling = _async_batches(samples, batch_size, max_delay, max_pending,
+                                                _batch_encoder(dictionary))
+        call = self.__stub.StreamAcquisition(requests, timeout=self.__timeout, metadata=_request_metadata(dictionary))
+        try:
+            response = await call
+        except grpc.aio.AioRpcError:
+            return None
+        finally:
+            pulling.cancel()
+        self.__negotiate(await call.initial_metadata())
+        if end and end[0].error is not None:
+            raise end[0].error
+        return response
+
+    async def readAquisition(self):
+        """
+        Read the acquisition values from the server
+        :return: List of SimpleAcqData, see CLMClient.readAquisition
+        """
+        call = self.__stub.ReadAcquisition(gRPCCom_pb2.ReadRequest(), timeout=self.__timeout,
+                                           metadata=_request_metadata(self.__dictionary))
+        try:
+            response = await call
+        except grpc.aio.AioRpcError as _:
+            return None
+        self.__negotiate(await call.initial_metadata())
+        return decode_acquisition(response)
+
+    async def readHistory(self, source_name="", value_name="", last=0, since_us=0):
+        """
+        Read the acquisition samples kept by the server, see CLMClient.readHistory
+        :return: List of HistoryChannel, None if the call failed or the server keeps no history
+        """
+        try:
+            response = await self.__stub.ReadHistory(_history_request(source_name, value_name, last, since_us),
+                                                     timeout=self.__timeout)
+        except grpc.aio.AioRpcError as _:
+            return None
+        return list(response.channels)
+
+    async def aggregateHistory(self, source_name="", value_name="", points=0, since_us=0, until_us=0,
+                               method="BUCKETS"):
+        """
+        Read the acquisition history reduced on the server, see CLMClient.aggregateHistory
+        :return: List of AggregateChannel, None if the call failed or the server keeps no history
+        """
+        request = _aggregate_request(source_name, value_name, points, since_us, until_us, method)
+        try:
+            response = await self.__stub.AggregateHistory(request, timeout=self.__timeout)
+        except grpc.aio.AioRpcError as _:
+            return None
+        return list(response.channels)
+
+    def __negotiate(self, initial_metadata):
+        # Première réponse d'un appel d'acquisition : le serveur y annonce s'il accepte l'encodage dictionnaire
+        if self.__dictionary is None:
+            self.__dictionary = wants_dictionary(initial_metadata)
+
+    async def gather(self, *calls):
+        """
+        Run several calls of this client concurrently on the shared channel
+        :param calls: Coroutines, ex: client.gather(client.readHeader(), client.readData())
+        :return: List of results in the order of calls
+        """
+        return await asyncio.gather(*calls)
+
+    async def readAll(self):
+        """
+        Read the header, the values and the acquisition values concurrently
+        :return: (header, values, acquisition values), None for a lost call
+        """
+        return tuple(await self.gather(self.readHeader(), self.readData(), self.readAquisition()))
@@ -0,0 +1,146 @@
+import os
+import threading
+import gRPCCom_pb2
+
+# Metadata used by the client and the server to agree on the dictionary encoding
+ENCODING_KEY = "acq-encoding"
+DICTIONARY = "dictionary"
+# Metadata naming the name table shared by the unary calls of a client (see AcqTable)
+TABLE_KEY = "acq-table"
+
+
+def wants_dictionary(metadata):
+    """
+    Check if gRPC metadata (invocation or initial) asks for / announces the dictionary encoding
+    """
+    return any(key == ENCODING_KEY and value == DICTIONARY for key, value in metadata or ())
+
+
+class AcqEncoder:
+    """
+    Dictionary encoder of acquisition samples. The (source_name, value_name)
+    pairs get an id the first time they are seen, only the new names are sent
+    with the samples of a message. Use one encoder per stream, or an AcqTable
+    for unary calls.
+    """
+    def __init__(self):
+        self.ids = {}
+
+    def encode(self, samples):
+        """
+        :param samples: Iterable of SimpleAcqData
+        :return: AcquisitionData with the new names and the encoded samples.
+                 Samples without value are kept as is, for the server to reject them.
+        """
+        message = gRPCCom_pb2.AcquisitionData()
+        name_ids = []
+        values = []
+        is_int = []
+        times = []
+        for sample in samples:
+            kind = sample.WhichOneof("value")
+            if kind is None:
+                message.values.append(sample)
+                continue
+            key = (sample.source_name, sample.value_name)
+            name_id = self.ids.get(key)
+            if name_id is None:
+                name_id = self.ids[key] = len(self.ids)
+                message.names.add(id=name_id, source_name=key[0], value_name=key[1])
+            name_ids.append(name_id)
+            times.append(sample.time_us)
+            if kind == "int_value":
+                values.append(sample.int_value)
+                is_int.append(True)
+            else:
+                values.append(sample.float_value)
+                is_int.append(False)
+        message.name_ids.extend(name_ids)
+        message.encoded_values.extend(values)
+        message.is_int.extend(is_int)
+        if any(times):
+            message.encoded_time_us.extend(times)
+        return message
+
+
+class AcqTable:
+    """
+    AcqEncoder shared by the unary calls of a client: the server keeps the
+    names under the id of the table, sent in the "acq-table" metadata, so each
+    name crosses the network once. Thread-safe.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, table_id=None):
+        """
+        Start a new table, after the server answered that it lost this one
+        :param table_id: Only reset if the table still has this id, a concurrent call may have reset it already
+        """
+        with self._lock:
+            if table_id is None or table_id == self.id:
+                self.id = os.urandom(8).hex()
+                self.encoder = AcqEncoder()
+
+    def encode(self, samples):
+        """
+        :return: (id of the table, AcquisitionData)
+        """
+        with self._lock:
+            return self.id, self.encoder.encode(samples)
+
+
+class AcqDecoder:
+    """
+    Decoder of the messages of an AcqEncoder, keeps the name table of the stream
+    """
+    def __init__(self):
+        self.names = {}
+
+    def decode(self, message):
+        """
+        :param message: AcquisitionData, plain and encoded samples are both accepted
+        :return: List of SimpleAcqData, plain samples first (an encoded message
+                 only carries the samples without value as plain ones)
+        :raise KeyError: If a sample refers to a name id never sent
+        :raise ValueError: If the encoded columns do not have the same length
+        """
+        for name in message.names:
+            self.names[name.id] = (name.source_name, name.value_name)
+        count = len(message.name_ids)
+        if not count == len(message.encoded_values) == len(message.is_int) or \
+                len(message.encoded_time_us) not in (0, count):
+            raise ValueError("Encoded acquisition columns of different lengths")
+        names = self.names
+        samples = list(message.values)
+        times = message.encoded_time_us or [0] * count
+        for name_id, value, is_int, time_us in zip(message.name_ids, message.encoded_values, message.is_int, times):
+            source_name, value_name = names[name_id]
+            if is_int:
+                samples.append(gRPCCom_pb2.SimpleAcqData(
+                    source_name=source_name, value_name=value_name, int_value=int(value), time_us=time_us))
+            else:
+                samples.append(gRPCCom_pb2.SimpleAcqData(
+                    source_name=source_name, value_name=value_name, float_value=value, time_us=time_us))
+        return samples
+
+
+def decode_acquisition(message):
+    """
+    Decode a standalone AcquisitionData (ex: a ReadAcquisition reply) into a list of SimpleAcqData
+    """
+    return AcqDecoder().decode(message)
+
+
+def decode_samples(decoder, message):
+    """
+    Decode a message and drop its samples without value, the same way for
+    unary and streamed acquisitions
+    :return: (valid SimpleAcqData in the order they were sent, number of samples without value)
+    :raise KeyError: If a sample refers to a name id never sent
+    :raise ValueError: If the encoded columns do not have the same length
+    """
+    samples = decoder.decode(message)
+    valid = [sample for sample in samples if sample.WhichOneof("value") is not None]
+    return valid, len(samples) - len(valid)
@@ -0,0 +1,200 @@
+import threading
+import numpy as np
+
+# Échantillons gardés par voie et nombre de voies au plus : la mémoire est
+# bornée à HISTORY_SIZE * HISTORY_CHANNELS * 17 octets, 43 Mo par défaut
+HISTORY_SIZE = 10000
+HISTORY_CHANNELS = 256
+AGGREGATE_POINTS = 1000  # points d'une courbe agrégée si la requête n'en donne pas
+
+
+class RingBuffer:
+    """
+    Last samples of one (source_name, value_name) channel in fixed-size
+    columns: time_us (int64), value (float64) and is_int (bool). Once full,
+    each new sample overwrites the oldest one.
+    """
+    def __init__(self, capacity=HISTORY_SIZE):
+        self.capacity = capacity
+        self.time_us = np.empty(capacity, np.int64)
+        self.values = np.empty(capacity, np.float64)
+        self.is_int = np.empty(capacity, np.bool_)
+        self.end = 0  # échantillons reçus depuis la création, le prochain va en end % capacity
+
+    def __len__(self):
+        return min(self.end, self.capacity)
+
+    def extend(self, time_us, values, is_int):
+        """
+        Append samples, the oldest ones are overwritten when the buffer is full
+        :param time_us: Time of the samples, int or array. Times going back are moved
+                        up to the last one so the buffer stays sorted.
+        :param values: float64 array
+        :param is_int: bool array of the same length
+        """
+        count = len(values)
+        if not count:
+            return
+        time_us = np.broadcast_to(np.asarray(time_us, np.int64), (count,))
+        if len(self):
+            time_us = np.maximum(time_us, self.time_us[(self.end - 1) % self.capacity])
+        # Seuls les capacity derniers peuvent rester
+        skip = max(0, count - self.capacity)
+        positions = (self.end + skip + np.arange(count - skip)) % self.capacity
+        self.time_us[positions] = time_us[skip:]
+        self.values[positions] = values[skip:]
+        self.is_int[positions] = is_int[skip:]
+        self.end += count
+
+    def _segments(self):
+        # Plages physiques des échantillons du plus ancien au plus récent
+        size = len(self)
+        start = (self.end - size) % self.capacity
+        if start + size <= self.capacity:
+            return [slice(start, start + size)]
+        return [slice(start, self.capacity), slice(0, start + size - self.capacity)]
+
+    def _search(self, segments, time_us):
+        # Nombre d'échantillons reçus jusqu'à time_us inclus
+        count = 0
+        for segment in segments:
+            index = int(np.searchsorted(self.time_us[segment], time_us, side="right"))
+            count += index
+            if index < segment.stop - segment.start:
+                break
+        return count
+
+    def window(self, last=0, since_us=0, until_us=0):
+        """
+        Samples of a window, oldest first, found by binary search
+        :param last: Keep only the last N samples, 0 for no limit
+        :param since_us: Keep only the samples after this time, 0 for no limit
+        :param until_us: Keep only the samples up to this time, 0 for no limit
+        :return: (time_us, values, is_int) copies
+        """
+        segments = self._segments()
+        start = self._search(segments, since_us) if since_us else 0
+        stop = self._search(segments, until_us) if until_us else len(self)
+        if last:
+            start = max(start, stop - last)
+        return tuple(self._gather(column, segments, start, stop)
+                     for column in (self.time_us, self.values, self.is_int))
+
+    @staticmethod
+    def _gather(column, segments, start, stop):
+        parts = []
+        for segment in segments:
+            length = segment.stop - segment.start
+            if start < length and stop > 0:
+                parts.append(column[segment.start + start:segment.start + min(stop, length)])
+            start = max(0, start - length)
+            stop -= length
+        if len(parts) == 1:
+            return parts[0].copy()
+        return np.concatenate(parts) if parts else column[:0].copy()
+
+
+class AcqHistory:
+    """
+    Ring buffers of the acquisition channels, created on the first sample of
+    a channel. Channels beyond max_channels are not kept, their samples are
+    counted in rejected.
+    """
+    def __init__(self, capacity=HISTORY_SIZE, max_channels=HISTORY_CHANNELS):
+        self.capacity = capacity
+        self.max_channels = max_channels
+        self.channels = {}
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self):
+        # Taille des colonnes une fois toutes les voies créées
+        return self.capacity * self.max_channels * (8 + 8 + 1)
+
+    def extend(self, samples, time_us):
+        """
+        Store acquisition samples received together
+        :param samples: Iterable of SimpleAcqData, the ones without value are skipped
+        :param time_us: Reception time, the time of the samples without time_us
+        """
+        groups = {}
+        for sample in samples:
+            kind = sample.WhichOneof("value")
+            if kind is None:
+                continue
+            times, values, is_int = groups.setdefault((sample.source_name, sample.value_name), ([], [], []))
+            times.append(sample.time_us or time_us)
+            values.append(getattr(sample, kind))
+            is_int.append(kind == "int_value")
+        with self._lock:
+            for key, (times, values, is_int) in groups.items():
+                buffer = self.channels.get(key)
+                if buffer is None:
+                    if len(self.channels) >= self.max_channels:
+                        self.rejected += len(values)
+                        continue
+                    buffer = self.channels[key] = RingBuffer(self.capacity)
+                buffer.extend(np.array(times, np.int64), np.array(values, np.float64), np.array(is_int, np.bool_))
+
+    def read(self, source_name="", value_name="", last=0, since_us=0, until_us=0):
+        """
+        Windows of the matching channels, see RingBuffer.window
+        :param source_name: Source of the channels, empty for any
+        :param value_name: Value of the channels, empty for any
+        :return: List of ((source_name, value_name), time_us, values, is_int)
+        """
+        with self._lock:
+            return [(key,) + buffer.window(last, since_us, until_us) for key, buffer in self.channels.items()
+                    if source_name in ("", key[0]) and value_name in ("", key[1])]
+
+
+def aggregate(time_us, values, buckets=AGGREGATE_POINTS):
+    """
+    Statistics of the samples over buckets of equal duration, in one pass
+    :param time_us: Sorted sample times
+    :param values: Sample values
+    :param buckets: Number of buckets over the window, the empty ones are left out
+    :return: (bucket start time_us, count, min, max, mean, last) arrays
+    """
+    count = len(values)
+    if not count:
+        empty = np.empty(0)
+        return time_us[:0], np.empty(0, np.int64), empty, empty, empty, empty
+    start = time_us[0]
+    span = max(int(time_us[-1] - start), 1)
+    index = np.minimum((time_us - start) * buckets // span, buckets - 1)
+    # Échantillons triés par temps : chaque seau est une plage contiguë
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    counts = np.diff(np.r_[starts, count])
+    return (start + index[starts] * span // buckets, counts,
+            np.minimum.reduceat(values, starts), np.maximum.reduceat(values, starts),
+            np.add.reduceat(values, starts) / counts, values[starts + counts - 1])
+
+
+def lttb(time_us, values, points=AGGREGATE_POINTS):
+    """
+    Largest-Triangle-Three-Buckets downsampling: keeps the first and last
+    samples and, in each bucket between them, the sample forming the largest
+    triangle with the one kept before and the mean of the next bucket
+    :return: Indexes of the kept samples
+    """
+    count = len(values)
+    if points >= count or points < 3:
+        return np.arange(count)
+    x = (time_us - time_us[0]).astype(np.float64)
+    bounds = (np.arange(points - 1) * ((count - 2) / (points - 2))).astype(np.int64) + 1
+    bounds[-1] = count - 1
+    # Moyennes de tous les seaux d'un coup, le dernier point sert de suivant au dernier seau
+    sizes = np.diff(bounds)
+    mean_x = np.r_[np.add.reduceat(x[:-1], bounds[:-1]) / sizes, x[-1]]
+    mean_y = np.r_[np.add.reduceat(values[:-1], bounds[:-1]) / sizes, values[-1]]
+    kept = np.empty(points, np.int64)
+    kept[0], kept[-1] = 0, count - 1
+    previous = 0
+    for i in range(points - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        ax, ay = x[previous], values[previous]
+        area = np.abs((ax - mean_x[i + 1]) * (values[lo:hi] - ay) - (ax - x[lo:hi]) * (mean_y[i + 1] - ay))
+        previous = kept[i + 1] = lo + int(np.argmax(area))
+    return kept
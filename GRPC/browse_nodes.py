@@ -1,42 +1,254 @@
-from opcua import Client
+import argparse
+import csv
+import os
+import time
+from collections import deque
+from concurrent import futures
+from opcua import Client, ua
 
 OPC_UA_ENDPOINT = "opc.tcp://192.168.0.100:4840"
+SNAPSHOT_FILE = "address_space.csv"
+ROOT_NODE = "i=85"  # Objects
+MAX_IN_FLIGHT = 4
+BATCH_SIZE = 100
+MAX_REFERENCES_PER_NODE = 1000
+
+
+class BrowsedNode:
+    """
+    One node of the address space snapshot
+    """
+    FIELDS = ("node_id", "name", "browse_name", "node_class", "data_type", "parent")
+
+    def __init__(self, node_id, name, browse_name, node_class, data_type="", parent=""):
+        """
+        :param node_id: NodeId string
+        :param name: DisplayName text
+        :param browse_name: BrowseName as 'ns:Name'
+        :param node_class: NodeClass name (Object, Variable, ...)
+        :param data_type: Built-in type name or DataType NodeId string, Variables only
+        :param parent: NodeId string of the node it was found under, '' for the root
+        """
+        self.node_id = node_id
+        self.name = name
+        self.browse_name = browse_name
+        self.node_class = node_class
+        self.data_type = data_type
+        self.parent = parent
+
+    def to_row(self):
+        return [getattr(self, field) for field in self.FIELDS]
+
+
+def data_type_name(nodeid):
+    """
+    Name of a DataType NodeId, the NodeId string if it is not a standard type
+    """
+    if nodeid.NamespaceIndex == 0 and nodeid.Identifier in ua.ObjectIdNames:
+        return ua.ObjectIdNames[nodeid.Identifier]
+    return nodeid.to_string()
+
+
+def read_attribute(client, nodeids, attribute_id):
+    """
+    Read one attribute of many nodes with a single Read service call
+    :return: List of ua.DataValue, in the order of nodeids
+    """
+    params = ua.ReadParameters()
+    for nodeid in nodeids:
+        rv = ua.ReadValueId()
+        rv.NodeId = nodeid
+        rv.AttributeId = attribute_id
+        params.NodesToRead.append(rv)
+    return client.uaclient.read(params)
+
+
+def browse_children(client, nodeids, max_references=MAX_REFERENCES_PER_NODE):
+    """
+    Browse the hierarchical children of many nodes with one Browse service call,
+    followed by BrowseNext calls while the server returns continuation points
+    :return: List of [ua.ReferenceDescription] in the order of nodeids, None where the browse failed
+    """
+    params = ua.BrowseParameters()
+    params.RequestedMaxReferencesPerNode = max_references
+    for nodeid in nodeids:
+        desc = ua.BrowseDescription()
+        desc.NodeId = nodeid
+        desc.BrowseDirection = ua.BrowseDirection.Forward
+        desc.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HierarchicalReferences)
+        desc.IncludeSubtypes = True
+        desc.NodeClassMask = 0
+        desc.ResultMask = ua.BrowseResultMask.All
+        params.NodesToBrowse.append(desc)
+
+    references = []
+    pending = []
+    for i, result in enumerate(client.uaclient.browse(params)):
+        if not result.StatusCode.is_good():
+            references.append(None)
+            continue
+        references.append(list(result.References))
+        if result.ContinuationPoint:
+            pending.append((i, result.ContinuationPoint))
+
+    while pending:
+        params = ua.BrowseNextParameters()
+        params.ContinuationPoints = [point for _, point in pending]
+        results = client.uaclient.browse_next(params)
+        next_pending = []
+        for (i, _), result in zip(pending, results):
+            if not result.StatusCode.is_good():
+                references[i] = None
+                continue
+            references[i].extend(result.References)
+            if result.ContinuationPoint:
+                next_pending.append((i, result.ContinuationPoint))
+        pending = next_pending
+    return references
 
-def browse_nodes(node, depth=0, max_depth=3):
-    try:
-        children = node.get_children()
-    except Exception as e:
-        print(" " * depth * 2, f"[ERROR] {e}")
-        return
 
-    for child in children:
-        try:
-            display_name = child.get_display_name().Text
-            node_id = child.nodeid.to_string()
-            value = None
-            try:
-                value = child.get_value()
-            except:
-                pass  # Certaines nodes ne sont pas lisibles
-            print(" " * depth * 2, f"{display_name} | {node_id} | {value}")
-        except Exception as e:
-            print(" " * depth * 2, f"[ERROR] {e}")
-
-        if depth < max_depth:
-            browse_nodes(child, depth + 1, max_depth)
+def crawl(client, root=ROOT_NODE, max_depth=None, max_in_flight=MAX_IN_FLIGHT, batch_size=BATCH_SIZE,
+          known=None):
+    """
+    Breadth-first crawl of the address space, batch_size nodes per Browse call
+    and at most max_in_flight calls running at the same time
+    :param client: Connected opcua client
+    :param root: NodeId string of the node to start from (default: Objects folder)
+    :param max_depth: Depth of the deepest nodes kept, root children are at depth 1 (default: None, no limit)
+    :param known: Previous snapshot {node_id: BrowsedNode} whose Variable metadata is reused. This is not
+                  an incremental refresh: every non-Variable node is browsed again, as in a full crawl, so
+                  added and removed nodes are found. The known Variables keep their data type and their
+                  subtree (properties) from the snapshot, which saves their DataType reads and Browse calls.
+    :return: {node_id: BrowsedNode} in crawl order
+    """
+    known = known or {}
+    known_children = {}
+    for node in known.values():
+        known_children.setdefault(node.parent, []).append(node)
+
+    root_nodeid = ua.NodeId.from_string(root)
+    if root in known:
+        nodes = {root: known[root]}
+    else:
+        node = client.get_node(root_nodeid)
+        nodes = {root: BrowsedNode(root, node.get_display_name().Text, node.get_browse_name().to_string(),
+                                   node.get_node_class().name)}
+
+    frontier = deque([(root_nodeid, 0)])
+    in_flight = {}
+    with futures.ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        while frontier or in_flight:
+            while frontier and len(in_flight) < max_in_flight:
+                batch = [frontier.popleft() for _ in range(min(batch_size, len(frontier)))]
+                call = executor.submit(browse_children, client, [nodeid for nodeid, _ in batch])
+                in_flight[call] = batch
+            done, _ = futures.wait(in_flight, return_when=futures.FIRST_COMPLETED)
+            for call in done:
+                batch = in_flight.pop(call)
+                for (parent, depth), references in zip(batch, call.result()):
+                    if references is None:
+                        print(f"[ERROR] Browse {parent.to_string()}")
+                        continue
+                    for reference in references:
+                        child = _add_child(nodes, known, known_children, parent.to_string(), reference)
+                        if child is not None and (max_depth is None or depth + 1 < max_depth):
+                            frontier.append((reference.NodeId, depth + 1))
+
+        missing = [ua.NodeId.from_string(node.node_id) for node in nodes.values()
+                   if node.node_class == "Variable" and not node.data_type]
+        chunks = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        read = lambda chunk: read_attribute(client, chunk, ua.AttributeIds.DataType)
+        for chunk, results in zip(chunks, executor.map(read, chunks)):
+            for nodeid, result in zip(chunk, results):
+                if result.StatusCode.is_good():
+                    nodes[nodeid.to_string()].data_type = data_type_name(result.Value.Value)
+    return nodes
+
+
+def _add_child(nodes, known, known_children, parent, reference):
+    """
+    Add a browsed child to nodes
+    :return: The node if it has to be browsed, None if it was already seen or kept from the snapshot
+    """
+    node_id = reference.NodeId.to_string()
+    if node_id in nodes:
+        return None
+    previous = known.get(node_id)
+    node = BrowsedNode(
+        node_id,
+        reference.DisplayName.Text,
+        reference.BrowseName.to_string(),
+        ua.NodeClass(reference.NodeClass).name,
+        previous.data_type if previous is not None else "",
+        parent,
+    )
+    nodes[node_id] = node
+    if previous is None or node.node_class != "Variable":
+        return node
+    # Variable connue : on reprend ses propriétés du snapshot sans les parcourir
+    stack = list(known_children.get(node_id, ()))
+    while stack:
+        descendant = stack.pop()
+        if descendant.node_id not in nodes:
+            nodes[descendant.node_id] = descendant
+            stack.extend(known_children.get(descendant.node_id, ()))
+    return None
+
+
+def write_snapshot(path, nodes):
+    """
+    Write the crawled nodes to a CSV snapshot
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(BrowsedNode.FIELDS)
+        writer.writerows(node.to_row() for node in nodes.values())
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path):
+    """
+    Load a CSV snapshot written by write_snapshot
+    :return: {node_id: BrowsedNode} in file order
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["node_id"]: BrowsedNode(**row) for row in csv.DictReader(f)}
+
 
 def main():
-    client = Client(OPC_UA_ENDPOINT)
+    parser = argparse.ArgumentParser(description="Parcours de l'arborescence OPC UA vers un snapshot CSV")
+    parser.add_argument("--endpoint", default=OPC_UA_ENDPOINT)
+    parser.add_argument("--root", default=ROOT_NODE, help="NodeId de départ (défaut: dossier Objects)")
+    parser.add_argument("--max-depth", type=int, default=None, help="Profondeur maximale (défaut: illimitée)")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT, help="Requêtes Browse simultanées")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Nodes par requête Browse")
+    parser.add_argument("--snapshot", default=SNAPSHOT_FILE, help="Fichier CSV du snapshot")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Reprendre du snapshot existant les types et propriétés des variables déjà "
+                             "connues, les autres nœuds sont tous reparcourus")
+    args = parser.parse_args()
+
+    known = load_snapshot(args.snapshot) if args.refresh and os.path.exists(args.snapshot) else None
+    client = Client(args.endpoint)
     try:
         client.connect()
-        root = client.get_root_node()
-        print("Exploration de l'arborescence OPC UA :")
-        browse_nodes(root, depth=0, max_depth=3)
+        start = time.monotonic()
+        nodes = crawl(client, args.root, args.max_depth, args.max_in_flight, args.batch_size, known)
+        elapsed = time.monotonic() - start
     except Exception as e:
         print(f"[ERROR] Connexion OPC UA: {e}")
+        return
     finally:
         client.disconnect()
 
+    write_snapshot(args.snapshot, nodes)
+    print(f"{len(nodes)} nodes en {elapsed:.2f} s -> {args.snapshot}")
+    if known is not None:
+        added = len(nodes.keys() - known.keys())
+        removed = len(known.keys() - nodes.keys())
+        print(f"{added} ajoutées, {removed} supprimées")
+
+
 if __name__ == "__main__":
     main()
-
@@ -4,11 +4,12 @@ def main():
     stub, cnc_pb2 = create_stub(host="localhost", port=50051)
 
     try:
-        request = cnc_pb2.ReadRequest(node_id="ns=2;s=Axis1.Position",
-            node_id2="ns=2;s=Axis2.Position",
-            node_id3="ns=2;s=Axis3.Position")
-        response = stub.ReadVariable(request)
-        print("Valeur lue:", response.value)
+        # Noms symboliques résolus par le serveur au lieu des NodeId en dur
+        resolved = stub.Resolve(cnc_pb2.ResolveRequest(pattern="Axis*.Position"))
+        request = cnc_pb2.ReadVariablesRequest(node_ids=[node.path for node in resolved.nodes])
+        response = stub.ReadVariables(request)
+        for value in response.values:
+            print("Valeur lue:", value.node_id, getattr(value, value.WhichOneof("value") or "status_code"))
     except Exception as e:
         print("Erreur lors de la lecture:", e)
 
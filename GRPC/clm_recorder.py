@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import numpy as np
+from CLMClient import DATA_INTERVAL, AsyncCLMClient, history_arrays
+from column_log import CHUNK_ROWS, ColumnWriter
+from grpc_metrics import now_us
+
+# Fichiers d'un enregistrement, dans un dossier
+DATA_FILE = "data.clm"
+ACQUISITION_FILE = "acquisition.clm"
+NAMES_FILE = "names.json"
+ACQUISITION_COLUMNS = [("time_us", "<i8", ()), ("name_id", "<u4", ()), ("value", "<f8", ()), ("is_int", "?", ())]
+ACQUISITION_INTERVAL = 0.1  # lecture de ReadHistory côté client, en secondes
+LOOKBACK_US = 1_000_000  # relu à chaque lecture : un échantillon stocké plus en retard n'est pas enregistré
+
+
+def data_columns(channels):
+    return [("time_us", "<i8", ()), ("values", "<f8", (channels,)), ("is_int", "?", (channels,))]
+
+
+def load_names(directory):
+    """
+    :return: [(source_name, value_name), ...] indexed by the name_id of the acquisition log
+    """
+    path = os.path.join(directory, NAMES_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return [tuple(name) for name in json.load(file)]
+
+
+class Recorder:
+    """
+    Records the ReadData values and the acquisition samples of a CLM service
+    in a directory: two column logs (see column_log.py) replayed by
+    clm_replay.py, and the acquisition names. Thread-safe.
+    """
+    def __init__(self, directory, header=(), chunk_rows=CHUNK_ROWS):
+        """
+        :param header: ReadHeader values, as DataValue, kept for the replay
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.header = [[value.int_value + value.float_value, value.HasField("int_value")] for value in header]
+        self.chunk_rows = chunk_rows
+        self.data_log = None  # créé à la première lecture, qui donne le nombre de voies
+        self.acquisition_log = ColumnWriter(os.path.join(directory, ACQUISITION_FILE), ACQUISITION_COLUMNS,
+                                            chunk_rows)
+        self.names = {}
+        self.data_rows = 0
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._save_names()
+
+    def data(self, time_us, values, is_int):
+        """
+        Record one ReadData reply
+        :param values: float64 array, the int values included
+        :param is_int: bool array
+        """
+        with self._lock:
+            if self.data_log is None:
+                self.data_log = ColumnWriter(os.path.join(self.directory, DATA_FILE), data_columns(len(values)),
+                                             self.chunk_rows, meta={"header": self.header})
+            channels = self.data_log.layout.columns[1][2][0]
+            if len(values) != channels:
+                print(f"[ERROR] Lecture de {len(values)} voies au lieu de {channels}, ignorée")
+                return
+            self.data_log.append(time_us=[time_us], values=[values], is_int=[is_int])
+            self.data_rows += 1
+
+    def acquisition(self, time_us, samples):
+        """
+        Record acquisition samples received together
+        :param time_us: Reception time, the time of the samples without time_us
+        :param samples: Iterable of SimpleAcqData, the ones without value are skipped
+        """
+        times = []
+        name_ids = []
+        values = []
+        is_int = []
+        with self._lock:
+            for sample in samples:
+                kind = sample.WhichOneof("value")
+                if kind is None:
+                    continue
+                times.append(sample.time_us or time_us)
+                name_ids.append(self._name_id((sample.source_name, sample.value_name)))
+                values.append(getattr(sample, kind))
+                is_int.append(kind == "int_value")
+            if not values:
+                return
+            # Le journal est trié par temps pour la recherche du rejeu
+            order = np.argsort(times, kind="stable")
+            self.acquisition_log.append(time_us=np.array(times, np.int64)[order], name_id=np.array(name_ids)[order],
+                                        value=np.array(values, np.float64)[order], is_int=np.array(is_int)[order])
+            self.samples += len(values)
+
+    def history(self, channels):
+        """
+        Record samples that each have their time, ex: the new samples of a ReadHistory reply
+        :param channels: Iterable of ((source_name, value_name), time_us, values, is_int) arrays
+        """
+        with self._lock:
+            parts = [(time_us, np.full(len(values), self._name_id(key), np.uint32), values, is_int)
+                     for key, time_us, values, is_int in channels if len(values)]
+            if not parts:
+                return
+            time_us, name_ids, values, is_int = (np.concatenate(column) for column in zip(*parts))
+            # Voies mises bout à bout : le journal est trié par temps pour la recherche du rejeu
+            order = np.argsort(time_us, kind="stable")
+            self.acquisition_log.append(time_us=time_us[order], name_id=name_ids[order], value=values[order],
+                                        is_int=is_int[order])
+            self.samples += len(order)
+
+    def _name_id(self, key):
+        # Sous le verrou
+        name_id = self.names.get(key)
+        if name_id is None:
+            name_id = self.names[key] = len(self.names)
+            self._save_names()
+        return name_id
+
+    def _save_names(self):
+        # Réécrit en entier : les nouveaux noms sont rares
+        path = os.path.join(self.directory, NAMES_FILE)
+        with open(path + ".tmp", "w") as file:
+            json.dump(sorted(self.names, key=self.names.get), file)
+        os.replace(path + ".tmp", path)
+
+    def flush(self):
+        with self._lock:
+            for log in (self.data_log, self.acquisition_log):
+                if log is not None:
+                    log.flush()
+
+    def close(self):
+        with self._lock:
+            for log in (self.data_log, self.acquisition_log):
+                if log is not None:
+                    log.close()
+
+
+async def _record_data(client, recorder, interval):
+    async for values, is_int in client.streamData(interval):
+        recorder.data(now_us(), values, is_int)
+
+
+async def _record_acquisition(client, recorder, interval):
+    # Curseur par voie : (temps du dernier échantillon enregistré, nombre de ses échantillons à ce temps).
+    # Chaque voie est triée par temps mais pas les voies entre elles (time_us du client ou heure de
+    # réception) : chaque lecture reprend LOOKBACK_US en arrière et chaque voie ne garde que ce qui suit son curseur
+    cursors = {}
+    while True:
+        since_us = now_us() - LOOKBACK_US if cursors else 0
+        channels = await client.readHistory(since_us=since_us)
+        if channels is None:
+            print("[ERROR] ReadHistory indisponible, acquisitions non enregistrées")
+            return
+        new = []
+        for channel in channels:
+            key = (channel.source_name, channel.value_name)
+            time_us, values, is_int = history_arrays(channel)
+            if not len(time_us):
+                continue
+            start = 0
+            if key in cursors:
+                cursor, count = cursors[key]
+                start = int(np.searchsorted(time_us, cursor, side="left")) + count if time_us[0] <= cursor else 0
+            new.append((key, time_us[start:], values[start:], is_int[start:]))
+            last = int(time_us[-1])
+            cursors[key] = (last, int(np.count_nonzero(time_us == last)))
+        recorder.history(new)
+        await asyncio.sleep(interval)
+
+
+async def record(host, port, directory, interval=DATA_INTERVAL, acquisition_interval=ACQUISITION_INTERVAL,
+                 duration=None):
+    """
+    Record a CLM server from the client side until the connection is lost or duration is over.
+    The acquisitions come from ReadHistory, every acquisition_interval seconds: each sample
+    with its time, the history kept by the server at the start included. A channel receiving
+    more samples than the server keeps (HISTORY_SIZE) between two reads loses the oldest, a
+    sample stored with a time more than LOOKBACK_US behind the clock of the recorder is lost.
+    """
+    async with AsyncCLMClient(host, port) as client:
+        header = await client.readHeader()
+        if header is None:
+            print(f"[ERROR] Serveur CLM {host}:{port} injoignable")
+            return
+        recorder = Recorder(directory, header)
+        start = time.monotonic()
+        tasks = [asyncio.create_task(_record_data(client, recorder, interval)),
+                 asyncio.create_task(_record_acquisition(client, recorder, acquisition_interval))]
+        try:
+            await asyncio.wait(tasks, timeout=duration, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            recorder.close()
+            print(f"{recorder.data_rows} lectures et {recorder.samples} échantillons enregistrés dans {directory} "
+                  f"en {time.monotonic() - start:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enregistre ReadData et les acquisitions d'un serveur CLMService")
+    parser.add_argument("directory", help="Dossier de l'enregistrement, relu par clm_replay.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50051)
+    parser.add_argument("--interval", type=float, default=DATA_INTERVAL,
+                        help="Temps minimal entre deux lectures enregistrées, en secondes")
+    parser.add_argument("--acquisition-interval", type=float, default=ACQUISITION_INTERVAL,
+                        help="Période de lecture des acquisitions, en secondes")
+    parser.add_argument("--duration", type=float, default=None, help="Durée de l'enregistrement en secondes")
+    args = parser.parse_args()
+    try:
+        asyncio.run(record(args.host, args.port, args.directory, args.interval, args.acquisition_interval,
+                           args.duration))
+    except KeyboardInterrupt:
+        print("\nEnregistrement arrêté.")
+
+
+if __name__ == "__main__":
+    main()
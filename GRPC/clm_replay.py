@@ -0,0 +1,249 @@
+import argparse
+import os
+import threading
+import time
+from concurrent import futures
+import grpc
+import numpy as np
+import gRPCCom_pb2
+import gRPCCom_pb2_grpc
+from clm_recorder import ACQUISITION_FILE, DATA_FILE, load_names
+from clm_server import MAX_WORKERS, PORT, STREAM_INTERVAL, CLMServiceServicer
+from column_log import ColumnReader
+from grpc_metrics import TracingInterceptor, serve_metrics
+
+SEEK_KEY = "replay-seek-us"  # métadonnée de StreamData : instant où commence le flux rejoué
+
+
+class ReplayClock:
+    """
+    Time of the recording being replayed. speed 1 follows the wall clock,
+    N goes N times faster, 0 only moves when set (as fast as the calls come:
+    to the latest row given by ReadData or batch given by ReadAcquisition).
+    """
+    def __init__(self, start_us, speed=1.0):
+        self.speed = speed
+        self.seek(start_us)
+
+    def seek(self, time_us):
+        self.origin_us = time_us
+        self.origin = time.monotonic()
+
+    def now_us(self):
+        return self.origin_us + int((time.monotonic() - self.origin) * 1e6 * self.speed)
+
+    def wall_delay(self, time_us):
+        # Secondes avant que l'horloge atteigne time_us
+        return max(0.0, (time_us - self.now_us()) / 1e6 / self.speed)
+
+
+def data_values(values, is_int):
+    """
+    DataValues of a recorded row
+    """
+    return [gRPCCom_pb2.DataValue(int_value=int(value)) if integer else gRPCCom_pb2.DataValue(float_value=value)
+            for value, integer in zip(values.tolist(), is_int.tolist())]
+
+
+class LogHistory:
+    """
+    Acquisition log read like acq_history.AcqHistory, up to the replay clock,
+    so ReadHistory and AggregateHistory of CLMServiceServicer serve it as is
+    """
+    def __init__(self, log, names, clock):
+        self.log = log
+        self.names = names
+        self.clock = clock
+
+    def read(self, source_name="", value_name="", last=0, since_us=0, until_us=0):
+        now = self.clock.now_us()
+        until_us = min(until_us, now) if until_us else now
+        start = self.log.seek(since_us, "right") if since_us else 0
+        stop = self.log.seek(until_us, "right")
+        name_ids = self.log.column("name_id", start, stop)
+        columns = [self.log.column(name, start, stop) for name in ("time_us", "value", "is_int")]
+        channels = []
+        for name_id, key in enumerate(self.names):
+            if source_name not in ("", key[0]) or value_name not in ("", key[1]):
+                continue
+            selected = [column[name_ids == name_id] for column in columns]
+            if last:
+                selected = [column[-last:] for column in selected]
+            channels.append((key,) + tuple(selected))
+        return channels
+
+
+class ReplayServicer(CLMServiceServicer):
+    """
+    CLMService answering from a recording of clm_recorder.py: the reads give
+    the values recorded at the time of the replay clock, StreamData replays
+    the recorded changes. Writes and acquisitions are refused.
+    """
+    def __init__(self, directory, speed=1.0, offset=0.0):
+        """
+        :param directory: Recording of clm_recorder.py or clm_server.py --record
+        :param speed: 1 for real time, N for N times faster, 0 for as fast as possible
+        :param offset: Start of the replay in seconds after the beginning of the recording
+        """
+        data_path = os.path.join(directory, DATA_FILE)
+        self.data_log = ColumnReader(data_path) if os.path.exists(data_path) else None
+        self.acquisition_log = ColumnReader(os.path.join(directory, ACQUISITION_FILE))
+        header = self.data_log.meta["header"] if self.data_log is not None else []
+        super().__init__(channels=len(header), history_size=0)
+        self.header = data_values(np.array([value for value, _ in header], np.float64),
+                                  np.array([integer for _, integer in header], np.bool_))
+        ranges = [log.time_range() for log in (self.data_log, self.acquisition_log)
+                  if log is not None and len(log)]
+        if not ranges:
+            raise ValueError(f"Empty recording in {directory}")
+        self.start_us = min(first for first, _ in ranges)
+        self.end_us = max(last for _, last in ranges)
+        self.clock = ReplayClock(self.start_us + int(offset * 1e6), speed)
+        self.history = LogHistory(self.acquisition_log, load_names(directory), self.clock)
+        self._cursor = 0  # prochaine ligne rendue par ReadData à vitesse 0
+        self._acquisition_cursor = 0  # première ligne du prochain lot rendu par ReadAcquisition à vitesse 0
+        self._cursor_lock = threading.Lock()
+
+    def _data_row(self):
+        if self.data_log is None or not len(self.data_log):
+            return None
+        if self.clock.speed == 0:
+            # Au plus vite : chaque lecture avance d'une ligne et l'horloge la suit
+            with self._cursor_lock:
+                row = min(self._cursor, len(self.data_log) - 1)
+                self._cursor += 1
+                self._follow(int(self.data_log.column("time_us", row, row + 1)[0]))
+            return row
+        # Dernière ligne enregistrée à l'heure de l'horloge, la première avant elle
+        return max(0, self.data_log.seek(self.clock.now_us(), "right") - 1)
+
+    def _acquisition_batch(self):
+        # (start, stop) des lignes du lot rendu par ReadAcquisition, None avant le premier
+        log = self.acquisition_log
+        if not len(log):
+            return None
+        if self.clock.speed == 0:
+            # Au plus vite : chaque lecture avance d'un lot (même temps), le dernier reste rendu
+            with self._cursor_lock:
+                start = min(self._acquisition_cursor, len(log) - 1)
+                time_us = int(log.column("time_us", start, start + 1)[0])
+                start = log.seek(time_us, "left")
+                stop = log.seek(time_us, "right")
+                self._acquisition_cursor = stop
+                self._follow(time_us)
+            return start, stop
+        stop = log.seek(self.clock.now_us(), "right")
+        if not stop:
+            return None
+        return log.seek(int(log.column("time_us", stop - 1, stop)[0]), "left"), stop
+
+    def _follow(self, time_us):
+        # Sous _cursor_lock, à vitesse 0 : l'horloge suit la plus avancée des lectures, ReadHistory
+        # voit ce que ReadData et ReadAcquisition ont rendu
+        if time_us > self.clock.now_us():
+            self.clock.seek(time_us)
+
+    def _row_values(self, row):
+        return self.data_log.column("values", row, row + 1)[0], self.data_log.column("is_int", row, row + 1)[0]
+
+    def ReadData(self, request, context):
+        row = self._data_row()
+        if row is None:
+            return gRPCCom_pb2.ReadReply()
+        return gRPCCom_pb2.ReadReply(values=data_values(*self._row_values(row)))
+
+    def ReadDataPacked(self, request, context):
+        row = self._data_row()
+        if row is None:
+            return gRPCCom_pb2.PackedReadReply()
+        values, is_int = self._row_values(row)
+        return gRPCCom_pb2.PackedReadReply(values=values.tolist(), is_int=is_int.tolist())
+
+    def Write(self, request, context):
+        return gRPCCom_pb2.WriteReply(status=False)
+
+    def SendAcquisition(self, request, context):
+        return gRPCCom_pb2.AcquisitionReply(status=False)
+
+    def StreamAcquisition(self, request_iterator, context):
+        context.abort(grpc.StatusCode.FAILED_PRECONDITION, "Replay server, acquisitions are read-only")
+
+    def ReadAcquisition(self, request, context):
+        # Dernier lot d'échantillons reçu avant l'heure de l'horloge, le suivant à vitesse 0
+        batch = self._acquisition_batch()
+        if batch is None:
+            return gRPCCom_pb2.AcquisitionData()
+        log = self.acquisition_log
+        start, stop = batch
+        names = self.history.names
+        samples = []
+        for name_id, value, is_int, time_us in zip(log.column("name_id", start, stop).tolist(),
+                                                   log.column("value", start, stop).tolist(),
+                                                   log.column("is_int", start, stop).tolist(),
+                                                   log.column("time_us", start, stop).tolist()):
+            source_name, value_name = names[name_id]
+            if is_int:
+                samples.append(gRPCCom_pb2.SimpleAcqData(source_name=source_name, value_name=value_name,
+                                                         int_value=int(value), time_us=time_us))
+            else:
+                samples.append(gRPCCom_pb2.SimpleAcqData(source_name=source_name, value_name=value_name,
+                                                         float_value=value, time_us=time_us))
+        return gRPCCom_pb2.AcquisitionData(values=samples)
+
+    def StreamData(self, request, context):
+        if self.data_log is None:
+            return
+        interval = request.interval_ms / 1000 if request.interval_ms > 0 else STREAM_INTERVAL
+        metadata = dict(context.invocation_metadata())
+        start_us = int(metadata[SEEK_KEY]) if SEEK_KEY in metadata else self.clock.now_us()
+        # Chaque flux a sa propre horloge, partie de l'instant demandé
+        clock = ReplayClock(start_us, self.clock.speed)
+        log = self.data_log
+        row = max(0, log.seek(start_us, "right") - 1)
+        last = None
+        while context.is_active() and row < len(log):
+            if clock.speed:
+                # Lignes arrivées pendant l'attente : seule la plus récente est envoyée
+                row = max(row, log.seek(clock.now_us(), "right") - 1)
+            values, is_int = self._row_values(row)
+            if last is None or np.any(np.abs(values - last) > request.deadband):
+                last = values.copy()
+                yield gRPCCom_pb2.PackedReadReply(values=values.tolist(), is_int=is_int.tolist())
+                if clock.speed:
+                    time.sleep(interval)
+            row += 1
+            if clock.speed and row < len(log):
+                time.sleep(min(1.0, clock.wall_delay(int(log.column("time_us", row, row + 1)[0]))))
+
+
+def serve(directory, port=PORT, speed=1.0, offset=0.0, metrics_port=0):
+    if metrics_port:
+        serve_metrics(metrics_port)
+    servicer = ReplayServicer(directory, speed, offset)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=MAX_WORKERS),
+                         interceptors=[TracingInterceptor("replay", max_workers=MAX_WORKERS)])
+    gRPCCom_pb2_grpc.add_CLMServiceServicer_to_server(servicer, server)
+    server.add_insecure_port(f'[::]:{port}')
+    server.start()
+    rows = len(servicer.data_log) if servicer.data_log is not None else 0
+    print(f"Rejeu de {directory} sur le port {port} : {rows} lectures, {len(servicer.acquisition_log)} "
+          f"échantillons, {(servicer.end_us - servicer.start_us) / 1e6:.1f} s, vitesse {speed or 'maximale'}")
+    server.wait_for_termination()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur CLMService rejouant un enregistrement de clm_recorder.py")
+    parser.add_argument("directory", help="Dossier de l'enregistrement")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="1 temps réel, N fois plus vite, 0 au plus vite (une ligne par ReadData, "
+                             "un lot par ReadAcquisition)")
+    parser.add_argument("--offset", type=float, default=0.0,
+                        help="Début du rejeu en secondes après le début de l'enregistrement")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Port HTTP des métriques, 0 pour aucun")
+    args = parser.parse_args()
+    serve(args.directory, args.port, args.speed, args.offset, args.metrics_port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import argparse
+import threading
+import time
+from collections import OrderedDict
+from concurrent import futures
+import grpc
+import gRPCCom_pb2
+import gRPCCom_pb2_grpc
+from acq_codec import DICTIONARY, ENCODING_KEY, TABLE_KEY, AcqDecoder, AcqEncoder, decode_samples, wants_dictionary
+from acq_history import AGGREGATE_POINTS, HISTORY_CHANNELS, HISTORY_SIZE, AcqHistory, aggregate, lttb
+from clm_recorder import Recorder
+from grpc_metrics import TracingInterceptor, now_us, serve_metrics
+
+PORT = 50051
+MAX_WORKERS = 10
+CHANNELS = 7
+STREAM_INTERVAL = 0.033  # intervalle par défaut de StreamData, en secondes
+ACQ_TABLES = 1024  # tables de noms des clients gardées pour SendAcquisition, la plus ancienne est oubliée
+
+
+def pack_values(values):
+    """
+    Build the PackedReadReply of a list of DataValue
+    """
+    # Only one member of the oneof is set, the other one reads as 0
+    return gRPCCom_pb2.PackedReadReply(
+        values=[value.int_value + value.float_value for value in values],
+        is_int=[value.HasField("int_value") for value in values],
+    )
+
+
+class CLMServiceServicer(gRPCCom_pb2_grpc.CLMServiceServicer):
+    """
+    In-memory CLMService: the header holds the channel numbers, the data the
+    last value written to each channel, and the last acquisition (or last
+    streamed batch) is kept for ReadAcquisition. Every acquisition sample is
+    also kept in the ring buffer of its channel for ReadHistory and
+    AggregateHistory. Implements
+    the packed fast path of ReadHeader / ReadData and the change-driven StreamData.
+    """
+    def __init__(self, channels=CHANNELS, packed=True, stream=True, history_size=HISTORY_SIZE,
+                 history_channels=HISTORY_CHANNELS):
+        """
+        :param channels: Number of data channels
+        :param packed: Serve ReadHeaderPacked / ReadDataPacked, False answers UNIMPLEMENTED like an older server
+        :param stream: Serve StreamData, False answers UNIMPLEMENTED like an older server
+        :param history_size: Samples kept per acquisition channel, 0 answers ReadHistory and AggregateHistory UNIMPLEMENTED
+        :param history_channels: Acquisition channels kept at most
+        """
+        self.packed = packed
+        self.stream = stream
+        self.header = [gRPCCom_pb2.DataValue(int_value=i) for i in range(channels)]
+        self.data = [gRPCCom_pb2.DataValue(float_value=0.0) for _ in range(channels)]
+        self.acquisition = gRPCCom_pb2.AcquisitionData()
+        self.history = AcqHistory(history_size, history_channels) if history_size else None
+        self.recorder = None  # clm_recorder.Recorder des écritures et des acquisitions
+        self._lock = threading.Lock()
+        # Réveille les StreamData à chaque écriture
+        self._changed = threading.Condition(self._lock)
+        self._version = 0
+        self._tables = OrderedDict()  # {id de acq_codec.AcqTable: AcqDecoder}
+
+    def IsConnected(self, request, context):
+        return gRPCCom_pb2.IsConnectedReply(status=True)
+
+    def ReadHeader(self, request, context):
+        return gRPCCom_pb2.ReadReply(values=self.header)
+
+    def ReadData(self, request, context):
+        with self._lock:
+            return gRPCCom_pb2.ReadReply(values=self.data)
+
+    def Read(self, request, context):
+        if request.selector == 0:
+            return self.ReadHeader(request.request, context)
+        return self.ReadData(request.request, context)
+
+    def Write(self, request, context):
+        with self._lock:
+            if any(key < 0 or key >= len(self.data) for key in request.values):
+                return gRPCCom_pb2.WriteReply(status=False)
+            for key, value in request.values.items():
+                self.data[key] = value
+            self._version += 1
+            self._changed.notify_all()
+            if self.recorder is not None:
+                # Sous le verrou : les lectures sont enregistrées dans l'ordre des écritures
+                packed = pack_values(self.data)
+                self.recorder.data(now_us(), packed.values, packed.is_int)
+        return gRPCCom_pb2.WriteReply(status=True)
+
+    def SendAcquisition(self, request, context):
+        self._announce_dictionary(context)
+        table_id = dict(context.invocation_metadata()).get(TABLE_KEY)
+        try:
+            valid, _ = decode_samples(self._table(table_id), request)
+        except KeyError as e:
+            # Table oubliée ou jamais reçue : le client repart d'une table neuve avec tous ses noms
+            code = grpc.StatusCode.FAILED_PRECONDITION if table_id else grpc.StatusCode.INVALID_ARGUMENT
+            context.abort(code, f"Unknown acquisition name id {e}")
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Invalid encoded acquisition: {e}")
+        self._acquired(valid)
+        return gRPCCom_pb2.AcquisitionReply(status=True)
+
+    def StreamAcquisition(self, request_iterator, context):
+        self._announce_dictionary(context)
+        decoder = AcqDecoder()
+        samples = batches = rejected = 0
+        for request in request_iterator:
+            batches += 1
+            try:
+                valid, invalid = decode_samples(decoder, request)
+            except (KeyError, ValueError) as e:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Invalid encoded acquisition: {e}")
+            rejected += invalid
+            samples += len(valid)
+            self._acquired(valid)
+        return gRPCCom_pb2.AcquisitionSummary(status=True, samples=samples, batches=batches, rejected=rejected)
+
+    def _table(self, table_id):
+        # Décodeur de la table de noms d'un client, un décodeur neuf pour un appel sans table
+        if not table_id:
+            return AcqDecoder()
+        with self._lock:
+            decoder = self._tables.pop(table_id, None) or AcqDecoder()
+            self._tables[table_id] = decoder
+            if len(self._tables) > ACQ_TABLES:
+                self._tables.popitem(last=False)
+        return decoder
+
+    def _acquired(self, samples):
+        # Un lot sans échantillon valide ne remplace pas la dernière acquisition
+        if not samples:
+            return
+        with self._lock:
+            self.acquisition = gRPCCom_pb2.AcquisitionData(values=samples)
+        self._store(samples)
+
+    def ReadAcquisition(self, request, context):
+        with self._lock:
+            acquisition = self.acquisition
+        if self._announce_dictionary(context):
+            return AcqEncoder().encode(acquisition.values)
+        return acquisition
+
+    def _store(self, samples):
+        time_us = now_us()
+        if self.history is not None:
+            self.history.extend(samples, time_us)
+        if self.recorder is not None:
+            self.recorder.acquisition(time_us, samples)
+
+    def ReadHistory(self, request, context):
+        if self.history is None:
+            return super().ReadHistory(request, context)
+        reply = gRPCCom_pb2.HistoryReply()
+        for (source_name, value_name), time_us, values, is_int in self.history.read(
+                request.source_name, request.value_name, request.last, request.since_us):
+            channel = reply.channels.add(source_name=source_name, value_name=value_name)
+            channel.time_us.extend(time_us.tolist())
+            channel.values.extend(values.tolist())
+            channel.is_int.extend(is_int.tolist())
+        return reply
+
+    def AggregateHistory(self, request, context):
+        if self.history is None:
+            return super().AggregateHistory(request, context)
+        points = request.points or AGGREGATE_POINTS
+        reply = gRPCCom_pb2.AggregateReply()
+        for (source_name, value_name), time_us, values, _ in self.history.read(
+                request.source_name, request.value_name, 0, request.since_us, request.until_us):
+            channel = reply.channels.add(source_name=source_name, value_name=value_name)
+            if request.method == gRPCCom_pb2.AggregateRequest.LTTB:
+                kept = lttb(time_us, values, points)
+                channel.time_us.extend(time_us[kept].tolist())
+                channel.last.extend(values[kept].tolist())
+                continue
+            starts, counts, low, high, mean, last = aggregate(time_us, values, points)
+            channel.time_us.extend(starts.tolist())
+            channel.count.extend(counts.tolist())
+            channel.min.extend(low.tolist())
+            channel.max.extend(high.tolist())
+            channel.mean.extend(mean.tolist())
+            channel.last.extend(last.tolist())
+        return reply
+
+    @staticmethod
+    def _announce_dictionary(context):
+        # Le client demande l'encodage dictionnaire, on confirme qu'il est supporté
+        if not wants_dictionary(context.invocation_metadata()):
+            return False
+        context.send_initial_metadata(((ENCODING_KEY, DICTIONARY),))
+        return True
+
+    def ReadHeaderPacked(self, request, context):
+        if not self.packed:
+            return super().ReadHeaderPacked(request, context)
+        return pack_values(self.header)
+
+    def ReadDataPacked(self, request, context):
+        if not self.packed:
+            return super().ReadDataPacked(request, context)
+        with self._lock:
+            return pack_values(self.data)
+
+    def StreamData(self, request, context):
+        if not self.stream:
+            return super().StreamData(request, context)
+        interval = request.interval_ms / 1000 if request.interval_ms > 0 else STREAM_INTERVAL
+        version = -1
+        last = None
+        while context.is_active():
+            with self._changed:
+                # Réveil périodique pour voir si le client est parti
+                if not self._changed.wait_for(lambda: self._version != version, timeout=1.0):
+                    continue
+                version = self._version
+                reply = pack_values(self.data)
+            if last is None or any(abs(value - previous) > request.deadband
+                                   for value, previous in zip(reply.values, last)):
+                last = list(reply.values)
+                yield reply
+                time.sleep(interval)
+
+
+def serve(port=PORT, channels=CHANNELS, packed=True, stream=True, metrics_port=0, history_size=HISTORY_SIZE,
+          history_channels=HISTORY_CHANNELS, record=None):
+    if metrics_port:
+        serve_metrics(metrics_port)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=MAX_WORKERS),
+                         interceptors=[TracingInterceptor("clm", max_workers=MAX_WORKERS)])
+    servicer = CLMServiceServicer(channels, packed, stream, history_size, history_channels)
+    if record:
+        servicer.recorder = Recorder(record, servicer.header)
+        print(f"Enregistrement des écritures et des acquisitions dans {record}")
+    gRPCCom_pb2_grpc.add_CLMServiceServicer_to_server(servicer, server)
+    server.add_insecure_port(f'[::]:{port}')
+    server.start()
+    print(f"Serveur gRPC CLMService lancé sur le port {port}")
+    if servicer.history is not None:
+        print(f"Historique : {history_size} échantillons par voie, {history_channels} voies, "
+              f"{servicer.history.max_bytes / 1e6:.1f} Mo au plus")
+    try:
+        server.wait_for_termination()
+    finally:
+        if servicer.recorder is not None:
+            servicer.recorder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur gRPC CLMService en mémoire")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--channels", type=int, default=CHANNELS, help="Nombre de voies de données")
+    parser.add_argument("--no-packed", dest="packed", action="store_false",
+                        help="Ne pas servir ReadHeaderPacked / ReadDataPacked")
+    parser.add_argument("--no-stream", dest="stream", action="store_false", help="Ne pas servir StreamData")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Port HTTP des métriques, 0 pour aucun")
+    parser.add_argument("--history-size", type=int, default=HISTORY_SIZE,
+                        help="Échantillons gardés par voie d'acquisition, 0 pour ne pas servir ReadHistory / AggregateHistory")
+    parser.add_argument("--history-channels", type=int, default=HISTORY_CHANNELS,
+                        help="Voies d'acquisition gardées au plus")
+    parser.add_argument("--record", default=None, help="Dossier où enregistrer les écritures et les acquisitions")
+    args = parser.parse_args()
+    serve(args.port, args.channels, args.packed, args.stream, args.metrics_port, args.history_size,
+          args.history_channels, args.record)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: cnc.proto
+# Protobuf Python Version: 6.31.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    6,
+    31,
+    1,
+    '',
+    'cnc.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\tcnc.proto\x12\x03\x63nc\"B\n\x0bReadRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x10\n\x08node_id2\x18\x02 \x01(\t\x12\x10\n\x08node_id3\x18\x03 \x01(\t\"8\n\x0cReadResponse\x12\r\n\x05value\x18\x01 \x01(\t\x12\x19\n\x05trace\x18\x02 \x01(\x0b\x32\n.cnc.Trace\".\n\x0cWriteRequest\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t\" \n\rWriteResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\"(\n\x14ReadVariablesRequest\x12\x10\n\x08node_ids\x18\x01 \x03(\t\"\xb6\x01\n\rVariableValue\x12\x0f\n\x07node_id\x18\x01 \x01(\t\x12\x14\n\nbool_value\x18\x02 \x01(\x08H\x00\x12\x13\n\tint_value\x18\x03 \x01(\x03H\x00\x12\x16\n\x0c\x64ouble_value\x18\x04 \x01(\x01H\x00\x12\x16\n\x0cstring_value\x18\x05 \x01(\tH\x00\x12\x13\n\x0bstatus_code\x18\x06 \x01(\r\x12\x1b\n\x13source_timestamp_ms\x18\x07 \x01(\x03\x42\x07\n\x05value\"O\n\x0eVariableValues\x12\"\n\x06values\x18\x01 \x03(\x0b\x32\x12.cnc.VariableValue\x12\x19\n\x05trace\x18\x02 \x01(\x0b\x32\n.cnc.Trace\"V\n\x10SubscribeRequest\x12\x10\n\x08node_ids\x18\x01 \x03(\t\x12\x1e\n\x16publishing_interval_ms\x18\x02 \x01(\x01\x12\x10\n\x08\x64\x65\x61\x64\x62\x61nd\x18\x03 \x01(\x01\"6\n\x0eResolveRequest\x12\x0f\n\x07pattern\x18\x01 \x01(\t\x12\x13\n\x0bmax_results\x18\x02 \x01(\r\"T\n\x0cResolvedNode\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\x0f\n\x07node_id\x18\x02 \x01(\t\x12\x12\n\nnode_class\x18\x03 \x01(\t\x12\x11\n\tdata_type\x18\x04 \x01(\t\"3\n\x0fResolveResponse\x12 \n\x05nodes\x18\x01 \x03(\x0b\x32\x11.cnc.ResolvedNode\"5\n\x05Trace\x12\x10\n\x08trace_id\x18\x01 \x01(\t\x12\x1a\n\x06stamps\x18\x02 \x03(\x0b\x32\n.cnc.Stamp\"%\n\x05Stamp\x12\x0b\n\x03hop\x18\x01 \x01(\t\x12\x0f\n\x07time_us\x18\x02 \x01(\x03\x32\xab\x02\n\nCNCService\x12\x33\n\x0cReadVariable\x12\x10.cnc.ReadRequest\x1a\x11.cnc.ReadResponse\x12\x36\n\rWriteVariable\x12\x11.cnc.WriteRequest\x1a\x12.cnc.WriteResponse\x12?\n\rReadVariables\x12\x19.cnc.ReadVariablesRequest\x1a\x13.cnc.VariableValues\x12\x39\n\tSubscribe\x12\x15.cnc.SubscribeRequest\x1a\x13.cnc.VariableValues0\x01\x12\x34\n\x07Resolve\x12\x13.cnc.ResolveRequest\x1a\x14.cnc.ResolveResponseb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'cnc_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_READREQUEST']._serialized_start=18
+  _globals['_READREQUEST']._serialized_end=84
+  _globals['_READRESPONSE']._serialized_start=86
+  _globals['_READRESPONSE']._serialized_end=142
+  _globals['_WRITEREQUEST']._serialized_start=144
+  _globals['_WRITEREQUEST']._serialized_end=190
+  _globals['_WRITERESPONSE']._serialized_start=192
+  _globals['_WRITERESPONSE']._serialized_end=224
+  _globals['_READVARIABLESREQUEST']._serialized_start=226
+  _globals['_READVARIABLESREQUEST']._serialized_end=266
+  _globals['_VARIABLEVALUE']._serialized_start=269
+  _globals['_VARIABLEVALUE']._serialized_end=451
+  _globals['_VARIABLEVALUES']._serialized_start=453
+  _globals['_VARIABLEVALUES']._serialized_end=532
+  _globals['_SUBSCRIBEREQUEST']._serialized_start=534
+  _globals['_SUBSCRIBEREQUEST']._serialized_end=620
+  _globals['_RESOLVEREQUEST']._serialized_start=622
+  _globals['_RESOLVEREQUEST']._serialized_end=676
+  _globals['_RESOLVEDNODE']._serialized_start=678
+  _globals['_RESOLVEDNODE']._serialized_end=762
+  _globals['_RESOLVERESPONSE']._serialized_start=764
+  _globals['_RESOLVERESPONSE']._serialized_end=815
+  _globals['_TRACE']._serialized_start=817
+  _globals['_TRACE']._serialized_end=870
+  _globals['_STAMP']._serialized_start=872
+  _globals['_STAMP']._serialized_end=909
+  _globals['_CNCSERVICE']._serialized_start=912
+  _globals['_CNCSERVICE']._serialized_end=1211
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,269 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+import cnc_pb2 as cnc__pb2
+
+GRPC_GENERATED_VERSION = '1.74.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + f' but the generated code in cnc_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class CNCServiceStub(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.ReadVariable = channel.unary_unary(
+                '/cnc.CNCService/ReadVariable',
+                request_serializer=cnc__pb2.ReadRequest.SerializeToString,
+                response_deserializer=cnc__pb2.ReadResponse.FromString,
+                _registered_method=True)
+        self.WriteVariable = channel.unary_unary(
+                '/cnc.CNCService/WriteVariable',
+                request_serializer=cnc__pb2.WriteRequest.SerializeToString,
+                response_deserializer=cnc__pb2.WriteResponse.FromString,
+                _registered_method=True)
+        self.ReadVariables = channel.unary_unary(
+                '/cnc.CNCService/ReadVariables',
+                request_serializer=cnc__pb2.ReadVariablesRequest.SerializeToString,
+                response_deserializer=cnc__pb2.VariableValues.FromString,
+                _registered_method=True)
+        self.Subscribe = channel.unary_stream(
+                '/cnc.CNCService/Subscribe',
+                request_serializer=cnc__pb2.SubscribeRequest.SerializeToString,
+                response_deserializer=cnc__pb2.VariableValues.FromString,
+                _registered_method=True)
+        self.Resolve = channel.unary_unary(
+                '/cnc.CNCService/Resolve',
+                request_serializer=cnc__pb2.ResolveRequest.SerializeToString,
+                response_deserializer=cnc__pb2.ResolveResponse.FromString,
+                _registered_method=True)
+
+
+class CNCServiceServicer(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def ReadVariable(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WriteVariable(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReadVariables(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Subscribe(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Resolve(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_CNCServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'ReadVariable': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReadVariable,
+                    request_deserializer=cnc__pb2.ReadRequest.FromString,
+                    response_serializer=cnc__pb2.ReadResponse.SerializeToString,
+            ),
+            'WriteVariable': grpc.unary_unary_rpc_method_handler(
+                    servicer.WriteVariable,
+                    request_deserializer=cnc__pb2.WriteRequest.FromString,
+                    response_serializer=cnc__pb2.WriteResponse.SerializeToString,
+            ),
+            'ReadVariables': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReadVariables,
+                    request_deserializer=cnc__pb2.ReadVariablesRequest.FromString,
+                    response_serializer=cnc__pb2.VariableValues.SerializeToString,
+            ),
+            'Subscribe': grpc.unary_stream_rpc_method_handler(
+                    servicer.Subscribe,
+                    request_deserializer=cnc__pb2.SubscribeRequest.FromString,
+                    response_serializer=cnc__pb2.VariableValues.SerializeToString,
+            ),
+            'Resolve': grpc.unary_unary_rpc_method_handler(
+                    servicer.Resolve,
+                    request_deserializer=cnc__pb2.ResolveRequest.FromString,
+                    response_serializer=cnc__pb2.ResolveResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'cnc.CNCService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('cnc.CNCService', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class CNCService(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def ReadVariable(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/cnc.CNCService/ReadVariable',
+            cnc__pb2.ReadRequest.SerializeToString,
+            cnc__pb2.ReadResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WriteVariable(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/cnc.CNCService/WriteVariable',
+            cnc__pb2.WriteRequest.SerializeToString,
+            cnc__pb2.WriteResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReadVariables(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/cnc.CNCService/ReadVariables',
+            cnc__pb2.ReadVariablesRequest.SerializeToString,
+            cnc__pb2.VariableValues.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Subscribe(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/cnc.CNCService/Subscribe',
+            cnc__pb2.SubscribeRequest.SerializeToString,
+            cnc__pb2.VariableValues.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Resolve(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/cnc.CNCService/Resolve',
+            cnc__pb2.ResolveRequest.SerializeToString,
+            cnc__pb2.ResolveResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
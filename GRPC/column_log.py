@@ -0,0 +1,195 @@
+import json
+import mmap
+import numpy as np
+
+# En-tête : MAGIC, nombre de lignes (int64) mis à jour à chaque ajout, taille
+# puis texte JSON de la description (colonnes, lignes par bloc, métadonnées)
+MAGIC = b"CLMLOG1\n"
+ROWS_OFFSET = len(MAGIC)
+JSON_OFFSET = ROWS_OFFSET + 8 + 4
+# Les blocs sont mappés un par un : leurs offsets doivent être multiples de la granularité
+HEADER_SIZE = max(mmap.ALLOCATIONGRANULARITY, 16384)
+CHUNK_ROWS = 4096
+
+
+def _round_up(size, multiple):
+    return -(-size // multiple) * multiple
+
+
+class _Layout:
+    """
+    Place of the columns in a chunk: each column is chunk_rows values in a
+    row, the chunks follow the header and are padded to the mmap granularity
+    """
+    def __init__(self, columns, chunk_rows):
+        self.columns = [(name, np.dtype(dtype), tuple(shape)) for name, dtype, shape in columns]
+        self.chunk_rows = chunk_rows
+        self.offsets = {}
+        offset = 0
+        for name, dtype, shape in self.columns:
+            self.offsets[name] = offset
+            offset = _round_up(offset + chunk_rows * dtype.itemsize * int(np.prod(shape, dtype=np.int64)), 8)
+        self.chunk_bytes = _round_up(offset, mmap.ALLOCATIONGRANULARITY)
+
+    def views(self, buffer, base):
+        # Colonnes d'un bloc commençant à base dans buffer
+        return {name: np.ndarray((self.chunk_rows,) + shape, dtype, buffer, base + self.offsets[name])
+                for name, dtype, shape in self.columns}
+
+
+class ColumnWriter:
+    """
+    Append-only columnar log. The first column is the time of the rows, it
+    must not go back. The file grows one chunk at a time and only the chunk
+    being filled is mapped.
+    """
+    def __init__(self, path, columns, chunk_rows=CHUNK_ROWS, meta=None):
+        """
+        :param columns: [(name, dtype, shape of one row), ...], ex: [("time_us", "<i8", ()), ("values", "<f8", (7,))]
+        :param meta: JSON-serializable data kept in the header, ex: the channel numbers
+        """
+        self.layout = _Layout(columns, chunk_rows)
+        self.time_column = self.layout.columns[0][0]
+        description = json.dumps({
+            "columns": [[name, dtype.str, list(shape)] for name, dtype, shape in self.layout.columns],
+            "chunk_rows": chunk_rows,
+            "meta": meta or {},
+        }).encode()
+        if JSON_OFFSET + len(description) > HEADER_SIZE:
+            raise ValueError(f"Header of {len(description)} bytes does not fit in {HEADER_SIZE}")
+        self.file = open(path, "w+b")
+        self.file.truncate(HEADER_SIZE)
+        self.header = mmap.mmap(self.file.fileno(), HEADER_SIZE)
+        self.header[:len(MAGIC)] = MAGIC
+        self.header[JSON_OFFSET - 4:JSON_OFFSET] = len(description).to_bytes(4, "little")
+        self.header[JSON_OFFSET:JSON_OFFSET + len(description)] = description
+        self.row_count = np.ndarray((), "<i8", self.header, ROWS_OFFSET)
+        self.row_count[()] = 0
+        self.rows = 0
+        self.last_time = None
+        self.chunk = None
+        self.views = None
+
+    def append(self, **columns):
+        """
+        Append rows, ex: append(time_us=[t], values=[[...]])
+        :param columns: One array per column, all with the same number of rows. A
+            time lower than the one of the row before is stored as that time.
+        """
+        times = np.asarray(columns[self.time_column])
+        count = len(times)
+        done = 0
+        while done < count:
+            index = self.rows % self.layout.chunk_rows
+            if index == 0:
+                self._next_chunk()
+            take = min(count - done, self.layout.chunk_rows - index)
+            for name, view in self.views.items():
+                view[index:index + take] = np.asarray(columns[name])[done:done + take]
+            # Un temps qui recule, dans le lot ou par rapport au précédent, prend le temps de la ligne d'avant
+            time_us = self.views[self.time_column][index:index + take]
+            if self.last_time is not None:
+                time_us[0] = max(time_us[0], self.last_time)
+            np.maximum.accumulate(time_us, out=time_us)
+            self.last_time = time_us[-1]
+            self.rows += take
+            done += take
+        # Le nombre de lignes n'est publié qu'une fois les valeurs écrites
+        self.row_count[()] = self.rows
+
+    def _next_chunk(self):
+        self._release_chunk()
+        base = HEADER_SIZE + (self.rows // self.layout.chunk_rows) * self.layout.chunk_bytes
+        self.file.truncate(base + self.layout.chunk_bytes)
+        self.chunk = mmap.mmap(self.file.fileno(), self.layout.chunk_bytes, offset=base)
+        self.views = self.layout.views(self.chunk, 0)
+
+    def _release_chunk(self):
+        if self.chunk is not None:
+            self.views = None
+            self.chunk.flush()
+            self.chunk.close()
+            self.chunk = None
+
+    def flush(self):
+        if self.chunk is not None:
+            self.chunk.flush()
+        self.header.flush()
+
+    def close(self):
+        self._release_chunk()
+        self.row_count = None
+        self.header.close()
+        self.file.close()
+
+
+class ColumnReader:
+    """
+    Read-only view of a log written by ColumnWriter, the whole file is mapped.
+    Rows are found by time in O(log n): a binary search over the first time of
+    each chunk, read in place with a strided view, then inside the chunk.
+    """
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a column log")
+        size = int.from_bytes(self.map[JSON_OFFSET - 4:JSON_OFFSET], "little")
+        description = json.loads(self.map[JSON_OFFSET:JSON_OFFSET + size])
+        self.layout = _Layout(description["columns"], description["chunk_rows"])
+        self.meta = description["meta"]
+        self.time_column = self.layout.columns[0][0]
+        # Blocs complets présents dans le fichier, un bloc en cours d'écriture peut manquer
+        chunks = (len(self.map) - HEADER_SIZE) // self.layout.chunk_bytes
+        rows = int(np.ndarray((), "<i8", self.map, ROWS_OFFSET))
+        self.rows = min(rows, chunks * self.layout.chunk_rows)
+        self._chunks = [self.layout.views(self.map, HEADER_SIZE + k * self.layout.chunk_bytes)
+                        for k in range(-(-self.rows // self.layout.chunk_rows))]
+        time_offset = HEADER_SIZE + self.layout.offsets[self.time_column]
+        self.chunk_times = np.ndarray((len(self._chunks),), "<i8", self.map, time_offset,
+                                      (self.layout.chunk_bytes,))
+
+    def __len__(self):
+        return self.rows
+
+    def seek(self, time_us, side="left"):
+        """
+        :param side: "left" for the first row at or after time_us, "right" for the first row after it
+        :return: Row index, len(self) if there is none
+        """
+        if not self.rows:
+            return 0
+        # Dernier bloc commençant avant la ligne cherchée : elle est dedans ou ouvre le suivant
+        chunk = max(0, int(np.searchsorted(self.chunk_times, time_us, side=side)) - 1)
+        times = self.column(self.time_column, chunk * self.layout.chunk_rows,
+                            min(self.rows, (chunk + 1) * self.layout.chunk_rows))
+        return chunk * self.layout.chunk_rows + int(np.searchsorted(times, time_us, side=side))
+
+    def column(self, name, start=0, stop=None):
+        """
+        Rows [start, stop) of a column, a view when they are in one chunk
+        """
+        stop = self.rows if stop is None else min(stop, self.rows)
+        if start >= stop:
+            _, dtype, shape = next(column for column in self.layout.columns if column[0] == name)
+            return np.empty((0,) + shape, dtype)
+        rows = self.layout.chunk_rows
+        first, last = start // rows, (stop - 1) // rows
+        if first == last:
+            return self._chunks[first][name][start - first * rows:stop - first * rows]
+        return np.concatenate([self._chunks[k][name][max(start - k * rows, 0):min(stop - k * rows, rows)]
+                               for k in range(first, last + 1)])
+
+    def time_range(self):
+        """
+        :return: (first time, last time), None if the log is empty
+        """
+        if not self.rows:
+            return None
+        times = self.column(self.time_column, self.rows - 1)
+        return int(self.chunk_times[0]), int(times[-1])
+
+    def close(self):
+        self._chunks = self.chunk_times = None
+        self.map.close()
+        self.file.close()
@@ -2,7 +2,7 @@
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # NO CHECKED-IN PROTOBUF GENCODE
 # source: gRPCCom.proto
-# Protobuf Python Version: 5.29.0
+# Protobuf Python Version: 6.31.1
 """Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import descriptor_pool as _descriptor_pool
@@ -11,9 +11,9 @@ from google.protobuf import symbol_database as _symbol_database
 from google.protobuf.internal import builder as _builder
 _runtime_version.ValidateProtobufRuntimeVersion(
     _runtime_version.Domain.PUBLIC,
-    5,
-    29,
-    0,
+    6,
+    31,
+    1,
     '',
     'gRPCCom.proto'
 )
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rgRPCCom.proto\"\x14\n\x12IsConnectedRequest\"\"\n\x10IsConnectedReply\x12\x0e\n\x06status\x18\x01 \x01(\x08\"\r\n\x0bReadRequest\"<\n\tReadFinal\x12\x1d\n\x07request\x18\x01 \x01(\x0b\x32\x0c.ReadRequest\x12\x10\n\x08selector\x18\x02 \x01(\x05\"\'\n\tReadReply\x12\x1a\n\x06values\x18\x01 \x03(\x0b\x32\n.DataValue\"t\n\x0cWriteRequest\x12)\n\x06values\x18\x01 \x03(\x0b\x32\x19.WriteRequest.ValuesEntry\x1a\x39\n\x0bValuesEntry\x12\x0b\n\x03key\x18\x01 \x01(\x05\x12\x19\n\x05value\x18\x02 \x01(\x0b\x32\n.DataValue:\x02\x38\x01\"?\n\tDataValue\x12\x13\n\tint_value\x18\x01 \x01(\x05H\x00\x12\x15\n\x0b\x66loat_value\x18\x02 \x01(\x02H\x00\x42\x06\n\x04kind\"\x1c\n\nWriteReply\x12\x0e\n\x06status\x18\x01 \x01(\x08\"\"\n\x10\x41\x63quisitionReply\x12\x0e\n\x06status\x18\x01 \x01(\x08\"1\n\x0f\x41\x63quisitionData\x12\x1e\n\x06values\x18\x01 \x03(\x0b\x32\x0e.SingleAcqData\"m\n\rSingleAcqData\x12\x13\n\x0bsource_name\x18\x01 \x01(\t\x12\x12\n\nvalue_name\x18\x02 \x01(\t\x12\x13\n\tint_value\x18\x03 \x01(\x05H\x00\x12\x15\n\x0b\x66loat_value\x18\x04 \x01(\x01H\x00\x42\x07\n\x05value2\xc1\x02\n\nCLMService\x12\x35\n\x0bIsConnected\x12\x13.IsConnectedRequest\x1a\x11.IsConnectedReply\x12&\n\nReadHeader\x12\x0c.ReadRequest\x1a\n.ReadReply\x12$\n\x08ReadData\x12\x0c.ReadRequest\x1a\n.ReadReply\x12\x1e\n\x04Read\x12\n.ReadFinal\x1a\n.ReadReply\x12#\n\x05Write\x12\r.WriteRequest\x1a\x0b.WriteReply\x12\x36\n\x0fSendAcquisition\x12\x10.AcquisitionData\x1a\x11.AcquisitionReply\x12\x31\n\x0fReadAcquisition\x12\x0c.ReadRequest\x1a\x10.AcquisitionDatab\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rgRPCCom.proto\"\x14\n\x12IsConnectedRequest\"\"\n\x10IsConnectedReply\x12\x0e\n\x06status\x18\x01 \x01(\x08\"\r\n\x0bReadRequest\":\n\x11StreamDataRequest\x12\x13\n\x0binterval_ms\x18\x01 \x01(\x01\x12\x10\n\x08\x64\x65\x61\x64\x62\x61nd\x18\x02 \x01(\x01\"Y\n\x0eHistoryRequest\x12\x13\n\x0bsource_name\x18\x01 \x01(\t\x12\x12\n\nvalue_name\x18\x02 \x01(\t\x12\x0c\n\x04last\x18\x03 \x01(\r\x12\x10\n\x08since_us\x18\x04 \x01(\x03\"\xba\x01\n\x10\x41ggregateRequest\x12\x13\n\x0bsource_name\x18\x01 \x01(\t\x12\x12\n\nvalue_name\x18\x02 \x01(\t\x12\x10\n\x08since_us\x18\x03 \x01(\x03\x12\x10\n\x08until_us\x18\x04 \x01(\x03\x12\x0e\n\x06points\x18\x05 \x01(\r\x12(\n\x06method\x18\x06 \x01(\x0e\x32\x18.AggregateRequest.Method\"\x1f\n\x06Method\x12\x0b\n\x07\x42UCKETS\x10\x00\x12\x08\n\x04LTTB\x10\x01\"<\n\tReadFinal\x12\x1d\n\x07request\x18\x01 \x01(\x0b\x32\x0c.ReadRequest\x12\x10\n\x08selector\x18\x02 \x01(\x05\">\n\tReadReply\x12\x1a\n\x06values\x18\x01 \x03(\x0b\x32\n.DataValue\x12\x15\n\x05trace\x18\x02 \x01(\x0b\x32\x06.Trace\"t\n\x0cWriteRequest\x12)\n\x06values\x18\x01 \x03(\x0b\x32\x19.WriteRequest.ValuesEntry\x1a\x39\n\x0bValuesEntry\x12\x0b\n\x03key\x18\x01 \x01(\x05\x12\x19\n\x05value\x18\x02 \x01(\x0b\x32\n.DataValue:\x02\x38\x01\"\x1c\n\nWriteReply\x12\x0e\n\x06status\x18\x01 \x01(\x08\"\"\n\x10\x41\x63quisitionReply\x12\x0e\n\x06status\x18\x01 \x01(\x08\"X\n\x12\x41\x63quisitionSummary\x12\x0e\n\x06status\x18\x01 \x01(\x08\x12\x0f\n\x07samples\x18\x02 \x01(\x04\x12\x0f\n\x07\x62\x61tches\x18\x03 \x01(\x04\x12\x10\n\x08rejected\x18\x04 \x01(\x04\"\x9d\x01\n\x0f\x41\x63quisitionData\x12\x1e\n\x06values\x18\x01 \x03(\x0b\x32\x0e.SimpleAcqData\x12\x17\n\x05names\x18\x02 \x03(\x0b\x32\x08.AcqName\x12\x10\n\x08name_ids\x18\x03 \x03(\r\x12\x16\n\x0e\x65ncoded_values\x18\x04 \x03(\x01\x12\x0e\n\x06is_int\x18\x05 \x03(\x08\x12\x17\n\x0f\x65ncoded_time_us\x18\x06 \x03(\x03\"~\n\rSimpleAcqData\x12\x13\n\x0bsource_name\x18\x01 \x01(\t\x12\x12\n\nvalue_name\x18\x02 \x01(\t\x12\x13\n\tint_value\x18\x03 \x01(\x05H\x00\x12\x15\n\x0b\x66loat_value\x18\x04 \x01(\x01H\x00\x12\x0f\n\x07time_us\x18\x05 \x01(\x03\x42\x07\n\x05value\"j\n\x0eHistoryChannel\x12\x13\n\x0bsource_name\x18\x01 \x01(\t\x12\x12\n\nvalue_name\x18\x02 \x01(\t\x12\x0f\n\x07time_us\x18\x03 \x03(\x03\x12\x0e\n\x06values\x18\x04 \x03(\x01\x12\x0e\n\x06is_int\x18\x05 \x03(\x08\"1\n\x0cHistoryReply\x12!\n\x08\x63hannels\x18\x01 \x03(\x0b\x32\x0f.HistoryChannel\"\x91\x01\n\x10\x41ggregateChannel\x12\x13\n\x0bsource_name\x18\x01 \x01(\t\x12\x12\n\nvalue_name\x18\x02 \x01(\t\x12\x0f\n\x07time_us\x18\x03 \x03(\x03\x12\r\n\x05\x63ount\x18\x04 \x03(\r\x12\x0b\n\x03min\x18\x05 \x03(\x01\x12\x0b\n\x03max\x18\x06 \x03(\x01\x12\x0c\n\x04mean\x18\x07 \x03(\x01\x12\x0c\n\x04last\x18\x08 \x03(\x01\"5\n\x0e\x41ggregateReply\x12#\n\x08\x63hannels\x18\x01 \x03(\x0b\x32\x11.AggregateChannel\">\n\x07\x41\x63qName\x12\n\n\x02id\x18\x01 \x01(\r\x12\x13\n\x0bsource_name\x18\x02 \x01(\t\x12\x12\n\nvalue_name\x18\x03 \x01(\t\"?\n\tDataValue\x12\x13\n\tint_value\x18\x01 \x01(\x05H\x00\x12\x15\n\x0b\x66loat_value\x18\x02 \x01(\x02H\x00\x42\x06\n\x04kind\"H\n\x0fPackedReadReply\x12\x0e\n\x06values\x18\x01 \x03(\x01\x12\x0e\n\x06is_int\x18\x02 \x03(\x08\x12\x15\n\x05trace\x18\x03 \x01(\x0b\x32\x06.Trace\"1\n\x05Trace\x12\x10\n\x08trace_id\x18\x01 \x01(\t\x12\x16\n\x06stamps\x18\x02 \x03(\x0b\x32\x06.Stamp\"%\n\x05Stamp\x12\x0b\n\x03hop\x18\x01 \x01(\t\x12\x0f\n\x07time_us\x18\x02 \x01(\x03\x32\x82\x05\n\nCLMService\x12\x35\n\x0bIsConnected\x12\x13.IsConnectedRequest\x1a\x11.IsConnectedReply\x12&\n\nReadHeader\x12\x0c.ReadRequest\x1a\n.ReadReply\x12$\n\x08ReadData\x12\x0c.ReadRequest\x1a\n.ReadReply\x12\x1e\n\x04Read\x12\n.ReadFinal\x1a\n.ReadReply\x12#\n\x05Write\x12\r.WriteRequest\x1a\x0b.WriteReply\x12\x36\n\x0fSendAcquisition\x12\x10.AcquisitionData\x1a\x11.AcquisitionReply\x12\x31\n\x0fReadAcquisition\x12\x0c.ReadRequest\x1a\x10.AcquisitionData\x12<\n\x11StreamAcquisition\x12\x10.AcquisitionData\x1a\x13.AcquisitionSummary(\x01\x12\x32\n\x10ReadHeaderPacked\x12\x0c.ReadRequest\x1a\x10.PackedReadReply\x12\x30\n\x0eReadDataPacked\x12\x0c.ReadRequest\x1a\x10.PackedReadReply\x12\x34\n\nStreamData\x12\x12.StreamDataRequest\x1a\x10.PackedReadReply0\x01\x12-\n\x0bReadHistory\x12\x0f.HistoryRequest\x1a\r.HistoryReply\x12\x36\n\x10\x41ggregateHistory\x12\x11.AggregateRequest\x1a\x0f.AggregateReplyb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -39,24 +39,50 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_ISCONNECTEDREPLY']._serialized_end=73
   _globals['_READREQUEST']._serialized_start=75
   _globals['_READREQUEST']._serialized_end=88
-  _globals['_READFINAL']._serialized_start=90
-  _globals['_READFINAL']._serialized_end=150
-  _globals['_READREPLY']._serialized_start=152
-  _globals['_READREPLY']._serialized_end=191
-  _globals['_WRITEREQUEST']._serialized_start=193
-  _globals['_WRITEREQUEST']._serialized_end=309
-  _globals['_WRITEREQUEST_VALUESENTRY']._serialized_start=252
-  _globals['_WRITEREQUEST_VALUESENTRY']._serialized_end=309
-  _globals['_DATAVALUE']._serialized_start=311
-  _globals['_DATAVALUE']._serialized_end=374
-  _globals['_WRITEREPLY']._serialized_start=376
-  _globals['_WRITEREPLY']._serialized_end=404
-  _globals['_ACQUISITIONREPLY']._serialized_start=406
-  _globals['_ACQUISITIONREPLY']._serialized_end=440
-  _globals['_ACQUISITIONDATA']._serialized_start=442
-  _globals['_ACQUISITIONDATA']._serialized_end=491
-  _globals['_SINGLEACQDATA']._serialized_start=493
-  _globals['_SINGLEACQDATA']._serialized_end=602
-  _globals['_CLMSERVICE']._serialized_start=605
-  _globals['_CLMSERVICE']._serialized_end=926
+  _globals['_STREAMDATAREQUEST']._serialized_start=90
+  _globals['_STREAMDATAREQUEST']._serialized_end=148
+  _globals['_HISTORYREQUEST']._serialized_start=150
+  _globals['_HISTORYREQUEST']._serialized_end=239
+  _globals['_AGGREGATEREQUEST']._serialized_start=242
+  _globals['_AGGREGATEREQUEST']._serialized_end=428
+  _globals['_AGGREGATEREQUEST_METHOD']._serialized_start=397
+  _globals['_AGGREGATEREQUEST_METHOD']._serialized_end=428
+  _globals['_READFINAL']._serialized_start=430
+  _globals['_READFINAL']._serialized_end=490
+  _globals['_READREPLY']._serialized_start=492
+  _globals['_READREPLY']._serialized_end=554
+  _globals['_WRITEREQUEST']._serialized_start=556
+  _globals['_WRITEREQUEST']._serialized_end=672
+  _globals['_WRITEREQUEST_VALUESENTRY']._serialized_start=615
+  _globals['_WRITEREQUEST_VALUESENTRY']._serialized_end=672
+  _globals['_WRITEREPLY']._serialized_start=674
+  _globals['_WRITEREPLY']._serialized_end=702
+  _globals['_ACQUISITIONREPLY']._serialized_start=704
+  _globals['_ACQUISITIONREPLY']._serialized_end=738
+  _globals['_ACQUISITIONSUMMARY']._serialized_start=740
+  _globals['_ACQUISITIONSUMMARY']._serialized_end=828
+  _globals['_ACQUISITIONDATA']._serialized_start=831
+  _globals['_ACQUISITIONDATA']._serialized_end=988
+  _globals['_SIMPLEACQDATA']._serialized_start=990
+  _globals['_SIMPLEACQDATA']._serialized_end=1116
+  _globals['_HISTORYCHANNEL']._serialized_start=1118
+  _globals['_HISTORYCHANNEL']._serialized_end=1224
+  _globals['_HISTORYREPLY']._serialized_start=1226
+  _globals['_HISTORYREPLY']._serialized_end=1275
+  _globals['_AGGREGATECHANNEL']._serialized_start=1278
+  _globals['_AGGREGATECHANNEL']._serialized_end=1423
+  _globals['_AGGREGATEREPLY']._serialized_start=1425
+  _globals['_AGGREGATEREPLY']._serialized_end=1478
+  _globals['_ACQNAME']._serialized_start=1480
+  _globals['_ACQNAME']._serialized_end=1542
+  _globals['_DATAVALUE']._serialized_start=1544
+  _globals['_DATAVALUE']._serialized_end=1607
+  _globals['_PACKEDREADREPLY']._serialized_start=1609
+  _globals['_PACKEDREADREPLY']._serialized_end=1681
+  _globals['_TRACE']._serialized_start=1683
+  _globals['_TRACE']._serialized_end=1732
+  _globals['_STAMP']._serialized_start=1734
+  _globals['_STAMP']._serialized_end=1771
+  _globals['_CLMSERVICE']._serialized_start=1774
+  _globals['_CLMSERVICE']._serialized_end=2416
 # @@protoc_insertion_point(module_scope)
@@ -5,7 +5,7 @@ import warnings
 
 import gRPCCom_pb2 as gRPCCom__pb2
 
-GRPC_GENERATED_VERSION = '1.71.0'
+GRPC_GENERATED_VERSION = '1.74.0'
 GRPC_VERSION = grpc.__version__
 _version_not_supported = False
 
@@ -69,6 +69,36 @@ class CLMServiceStub(object):
                 request_serializer=gRPCCom__pb2.ReadRequest.SerializeToString,
                 response_deserializer=gRPCCom__pb2.AcquisitionData.FromString,
                 _registered_method=True)
+        self.StreamAcquisition = channel.stream_unary(
+                '/CLMService/StreamAcquisition',
+                request_serializer=gRPCCom__pb2.AcquisitionData.SerializeToString,
+                response_deserializer=gRPCCom__pb2.AcquisitionSummary.FromString,
+                _registered_method=True)
+        self.ReadHeaderPacked = channel.unary_unary(
+                '/CLMService/ReadHeaderPacked',
+                request_serializer=gRPCCom__pb2.ReadRequest.SerializeToString,
+                response_deserializer=gRPCCom__pb2.PackedReadReply.FromString,
+                _registered_method=True)
+        self.ReadDataPacked = channel.unary_unary(
+                '/CLMService/ReadDataPacked',
+                request_serializer=gRPCCom__pb2.ReadRequest.SerializeToString,
+                response_deserializer=gRPCCom__pb2.PackedReadReply.FromString,
+                _registered_method=True)
+        self.StreamData = channel.unary_stream(
+                '/CLMService/StreamData',
+                request_serializer=gRPCCom__pb2.StreamDataRequest.SerializeToString,
+                response_deserializer=gRPCCom__pb2.PackedReadReply.FromString,
+                _registered_method=True)
+        self.ReadHistory = channel.unary_unary(
+                '/CLMService/ReadHistory',
+                request_serializer=gRPCCom__pb2.HistoryRequest.SerializeToString,
+                response_deserializer=gRPCCom__pb2.HistoryReply.FromString,
+                _registered_method=True)
+        self.AggregateHistory = channel.unary_unary(
+                '/CLMService/AggregateHistory',
+                request_serializer=gRPCCom__pb2.AggregateRequest.SerializeToString,
+                response_deserializer=gRPCCom__pb2.AggregateReply.FromString,
+                _registered_method=True)
 
 
 class CLMServiceServicer(object):
@@ -117,6 +147,49 @@ class CLMServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamAcquisition(self, request_iterator, context):
+        """Client stream of acquisition batches, acknowledged once at the end
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReadHeaderPacked(self, request, context):
+        """Optional fast path of ReadHeader / ReadData, UNIMPLEMENTED if the server does not opt in
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReadDataPacked(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamData(self, request, context):
+        """Server stream of the data values, sent when they change by more than the
+        deadband and at most once per interval. UNIMPLEMENTED on older servers.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ReadHistory(self, request, context):
+        """Acquisition samples kept by the server, the last N of each channel or the
+        ones received after a time. UNIMPLEMENTED on servers without history.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def AggregateHistory(self, request, context):
+        """Same samples reduced to about points values per channel, for charts
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_CLMServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -155,6 +228,36 @@ def add_CLMServiceServicer_to_server(servicer, server):
                     request_deserializer=gRPCCom__pb2.ReadRequest.FromString,
                     response_serializer=gRPCCom__pb2.AcquisitionData.SerializeToString,
             ),
+            'StreamAcquisition': grpc.stream_unary_rpc_method_handler(
+                    servicer.StreamAcquisition,
+                    request_deserializer=gRPCCom__pb2.AcquisitionData.FromString,
+                    response_serializer=gRPCCom__pb2.AcquisitionSummary.SerializeToString,
+            ),
+            'ReadHeaderPacked': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReadHeaderPacked,
+                    request_deserializer=gRPCCom__pb2.ReadRequest.FromString,
+                    response_serializer=gRPCCom__pb2.PackedReadReply.SerializeToString,
+            ),
+            'ReadDataPacked': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReadDataPacked,
+                    request_deserializer=gRPCCom__pb2.ReadRequest.FromString,
+                    response_serializer=gRPCCom__pb2.PackedReadReply.SerializeToString,
+            ),
+            'StreamData': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamData,
+                    request_deserializer=gRPCCom__pb2.StreamDataRequest.FromString,
+                    response_serializer=gRPCCom__pb2.PackedReadReply.SerializeToString,
+            ),
+            'ReadHistory': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReadHistory,
+                    request_deserializer=gRPCCom__pb2.HistoryRequest.FromString,
+                    response_serializer=gRPCCom__pb2.HistoryReply.SerializeToString,
+            ),
+            'AggregateHistory': grpc.unary_unary_rpc_method_handler(
+                    servicer.AggregateHistory,
+                    request_deserializer=gRPCCom__pb2.AggregateRequest.FromString,
+                    response_serializer=gRPCCom__pb2.AggregateReply.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'CLMService', rpc_method_handlers)
@@ -354,3 +457,165 @@ class CLMService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def StreamAcquisition(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/CLMService/StreamAcquisition',
+            gRPCCom__pb2.AcquisitionData.SerializeToString,
+            gRPCCom__pb2.AcquisitionSummary.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReadHeaderPacked(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/CLMService/ReadHeaderPacked',
+            gRPCCom__pb2.ReadRequest.SerializeToString,
+            gRPCCom__pb2.PackedReadReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReadDataPacked(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/CLMService/ReadDataPacked',
+            gRPCCom__pb2.ReadRequest.SerializeToString,
+            gRPCCom__pb2.PackedReadReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamData(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/CLMService/StreamData',
+            gRPCCom__pb2.StreamDataRequest.SerializeToString,
+            gRPCCom__pb2.PackedReadReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ReadHistory(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/CLMService/ReadHistory',
+            gRPCCom__pb2.HistoryRequest.SerializeToString,
+            gRPCCom__pb2.HistoryReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def AggregateHistory(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/CLMService/AggregateHistory',
+            gRPCCom__pb2.AggregateRequest.SerializeToString,
+            gRPCCom__pb2.AggregateReply.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+import websockets
+from CLMClient import AsyncCLMClient
+from grpc_metrics import new_trace_id, now_us, record_trace, serve_metrics, trace_to_json
+
+DEFAULT_URI = "ws://localhost:8767"
+RATE = 30.0  # trames par seconde au plus
+EPSILON = 0.01  # variation d'une articulation en degrés en dessous de laquelle rien n'est envoyé
+RETRY_DELAY = 5.0
+TRACE_INTERVAL = 1.0  # une trame tracée par seconde, le viewer renvoie sa trace complétée
+
+# Voies de ReadData des articulations 1 à 6, une pièce par articulation
+JOINT_CHANNELS = slice(1, 7)
+PART_NAMES = [f"part_{i}" for i in range(1, 7)]
+
+# orientationMap de grpc_proxy.ts sous forme affine : orientation = OFFSET + GAIN * valeur,
+# une ligne par articulation pour toutes les calculer d'un coup
+ORIENTATION_OFFSET = np.array([
+    [90.0, 0.0, 0.0],
+    [-90.0, 270.0, 90.0],
+    [0.0, 0.0, -180.0],
+    [0.0, 0.0, 90.0],
+    [-180.0, 0.0, 180.0],
+    [180.0, 0.0, 180.0],
+])
+ORIENTATION_GAIN = np.array([
+    [0.0, 0.0, -1.0],
+    [0.0, -1.0, 0.0],
+    [0.0, 0.0, 1.0],
+    [-1.0, 0.0, 0.0],
+    [0.0, 0.0, -1.0],
+    [-1.0, 0.0, 0.0],
+])
+
+
+def orientations(joints):
+    """
+    Orientation of every part from the joint values, in one step
+    :param joints: Joint values, shape (6,)
+    :return: Array of shape (6, 3), [x, y, z] angles of part_1 to part_6
+    """
+    return ORIENTATION_OFFSET + ORIENTATION_GAIN * joints[:, None]
+
+
+class JointFilter:
+    """
+    Keeps the last joint values sent to the viewers and builds the frame of
+    the joints that moved by more than epsilon since then
+    """
+    def __init__(self, epsilon=EPSILON):
+        self.epsilon = epsilon
+        self.last = np.full(len(PART_NAMES), np.nan)
+
+    def reset(self):
+        # Nouvelle connexion : la prochaine trame contient toutes les pièces
+        self.last.fill(np.nan)
+
+    def frame(self, values):
+        """
+        :param values: Values of ReadData
+        :return: {name: [x, y, z]} of the joints that changed, empty if none did
+        """
+        joints = np.asarray(values[JOINT_CHANNELS], dtype=np.float64)
+        if len(joints) < len(PART_NAMES):
+            return {}
+        valid = ~np.isnan(joints)
+        changed = valid & (np.isnan(self.last) | (np.abs(joints - self.last) > self.epsilon))
+        if not changed.any():
+            return {}
+        self.last[changed] = joints[changed]
+        locations = orientations(joints)
+        return {PART_NAMES[i]: locations[i].tolist() for i in np.flatnonzero(changed)}
+
+
+async def _read_trace_reports(websocket):
+    """
+    Record the hops of the traces sent back by the viewers, the other
+    messages are the relay echoing the frames and are dropped
+    """
+    try:
+        async for message in websocket:
+            if isinstance(message, str) and '"trace_report"' in message:
+                try:
+                    report = json.loads(message)["trace_report"]
+                    record_trace([(hop, int(time_us)) for hop, time_us in report["stamps"]])
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"[ERROR] Trace invalide : {e}")
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
+async def bridge(client, websocket, joint_filter, rate=RATE, trace_interval=TRACE_INTERVAL):
+    """
+    Forward the CLM joint values to the relay, one combined frame per change
+    and at most rate frames per second
+    :param trace_interval: Seconds between two traced frames, 0 to disable tracing
+    :return: (frames sent, values received) when the gRPC stream ends
+    """
+    loop = asyncio.get_running_loop()
+    next_trace = loop.time()
+    sent = received = 0
+    stream = client.streamData(1.0 / rate, joint_filter.epsilon, with_trace=True)
+    try:
+        async for values, _, trace in stream:
+            received_us = now_us()
+            received += 1
+            frame = joint_filter.frame(values)
+            if not frame:
+                continue
+            message = {"frame": frame}
+            if trace_interval and loop.time() >= next_trace:
+                next_trace = loop.time() + trace_interval
+                # Sans StreamData (lecture périodique) la trace commence ici
+                message["trace"] = trace_to_json(trace) if trace is not None else {"id": new_trace_id(), "stamps": []}
+                message["trace"]["stamps"] += [["bridge.recv", received_us], ["bridge.send", now_us()]]
+            await websocket.send(json.dumps(message, separators=(",", ":")))
+            sent += 1
+    finally:
+        await stream.aclose()
+    return sent, received
+
+
+async def run(host, port, uri, rate=RATE, epsilon=EPSILON, trace_interval=TRACE_INTERVAL):
+    joint_filter = JointFilter(epsilon)
+    async with AsyncCLMClient(host, port) as client:
+        while True:
+            try:
+                async with websockets.connect(uri) as websocket:
+                    print(f"Connecté au relais {uri}, CLM sur {host}:{port}")
+                    reports = asyncio.create_task(_read_trace_reports(websocket))
+                    joint_filter.reset()
+                    start = time.monotonic()
+                    sent, received = await bridge(client, websocket, joint_filter, rate, trace_interval)
+                    reports.cancel()
+                    print(f"[ERROR] Flux CLM interrompu après {time.monotonic() - start:.1f} s "
+                          f"({received} lectures, {sent} trames)")
+            except (OSError, websockets.exceptions.WebSocketException) as e:
+                print(f"[ERROR] Relais indisponible : {e}")
+            await asyncio.sleep(RETRY_DELAY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pont CLMService gRPC vers le relais WebSocket des pièces")
+    parser.add_argument("--host", default="127.0.0.1", help="Serveur CLMService")
+    parser.add_argument("--port", type=int, default=50051)
+    parser.add_argument("--uri", default=DEFAULT_URI, help="Relais WebSocket")
+    parser.add_argument("--rate", type=float, default=RATE, help="Trames par seconde au plus")
+    parser.add_argument("--epsilon", type=float, default=EPSILON,
+                        help="Variation minimale d'une articulation à envoyer, en degrés")
+    parser.add_argument("--trace-interval", type=float, default=TRACE_INTERVAL,
+                        help="Secondes entre deux trames tracées, 0 pour ne pas tracer")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Port HTTP des histogrammes par étape des traces, 0 pour aucun")
+    args = parser.parse_args()
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    try:
+        asyncio.run(run(args.host, args.port, args.uri, args.rate, args.epsilon, args.trace_interval))
+    except KeyboardInterrupt:
+        print("\nArrêt du pont.")
+
+
+if __name__ == "__main__":
+    main()
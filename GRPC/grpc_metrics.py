@@ -0,0 +1,422 @@
+# grpc_metrics.py
+# Module partagé : OPC-UA/ l'importe via shared_path.py, ne pas le copier
+import asyncio
+import bisect
+import contextvars
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import grpc
+
+METRICS_PATH = "/metrics"
+TRACE_KEY = "trace-id"  # métadonnée gRPC portant l'identifiant de trace du client
+
+# Bornes des histogrammes de latence, en secondes
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.99)
+
+
+def now_us():
+    """
+    Wall clock in microseconds, the clock shared by all the hops of a trace
+    """
+    return time.time_ns() // 1000
+
+
+def new_trace_id():
+    return os.urandom(8).hex()
+
+
+class Histogram:
+    """
+    Latency histogram with fixed buckets, thread-safe
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # dernier : au-delà de la plus grande borne
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """
+        :return: (cumulative counts per bucket with +Inf last, sum, count)
+        """
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = []
+        running = 0
+        for n in counts:
+            running += n
+            cumulative.append(running)
+        return cumulative, total, count
+
+    def quantile(self, q, snapshot=None):
+        """
+        Estimate of a quantile, interpolated inside its bucket like Prometheus histogram_quantile
+        :return: Value in seconds, None if nothing was observed
+        """
+        cumulative, _, count = snapshot or self.snapshot()
+        if not count:
+            return None
+        rank = q * count
+        index = bisect.bisect_left(cumulative, rank)
+        if index >= len(self.buckets):
+            return self.buckets[-1]
+        lower = self.buckets[index - 1] if index else 0.0
+        below = cumulative[index - 1] if index else 0
+        in_bucket = cumulative[index] - below
+        return lower + (self.buckets[index] - lower) * ((rank - below) / in_bucket if in_bucket else 1.0)
+
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+class Gauge:
+    """
+    Value that goes up and down, thread-safe
+    """
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1.0):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+
+class MetricsRegistry:
+    """
+    Metric families rendered in the Prometheus text format. Histograms are
+    followed by a <name>_quantile gauge with their p50 / p99 estimates.
+    """
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _metric(self, kind, name, help_text, labels, factory):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.setdefault(name, (kind, help_text, {}))
+            metric = family[2].get(key)
+            if metric is None:
+                metric = family[2][key] = factory()
+        return metric
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, **labels):
+        """
+        Get or create the histogram of a label set
+        """
+        return self._metric("histogram", name, help_text, labels, lambda: Histogram(buckets))
+
+    def gauge(self, name, help_text, **labels):
+        """
+        Get or create the gauge of a label set
+        """
+        return self._metric("gauge", name, help_text, labels, Gauge)
+
+    def render(self):
+        with self._lock:
+            families = [(name, kind, help_text, list(metrics.items()))
+                        for name, (kind, help_text, metrics) in sorted(self._families.items())]
+        lines = []
+        for name, kind, help_text, metrics in families:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            if kind == "gauge":
+                lines += [f"{name}{_labels(labels)} {gauge.value:g}" for labels, gauge in metrics]
+                continue
+            quantiles = []
+            for labels, histogram in metrics:
+                snapshot = histogram.snapshot()
+                cumulative, total, count = snapshot
+                for bound, n in zip(histogram.buckets + ("+Inf",), cumulative):
+                    lines.append(f"{name}_bucket{_labels(labels, le=bound)} {n}")
+                lines.append(f"{name}_sum{_labels(labels)} {total:g}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+                for q in QUANTILES:
+                    value = histogram.quantile(q, snapshot)
+                    if value is not None:
+                        quantiles.append(f"{name}_quantile{_labels(labels, quantile=q)} {value:g}")
+            if quantiles:
+                lines += [f"# TYPE {name}_quantile gauge"] + quantiles
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def serve_metrics(port, registry=REGISTRY, host="127.0.0.1"):
+    """
+    Serve the registry on http://host:port/metrics from a daemon thread
+    :return: The ThreadingHTTPServer, shutdown() stops it
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != METRICS_PATH:
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Métriques sur http://{host}:{port}{METRICS_PATH}")
+    return server
+
+
+def record_trace(stamps, registry=REGISTRY):
+    """
+    Record the duration of each hop of a finished trace
+    :param stamps: [(hop, time_us), ...] in the order they were taken
+    """
+    for (start, start_us), (end, end_us) in zip(stamps, stamps[1:]):
+        registry.histogram("trace_hop_seconds", "Time between two stamps of a trace",
+                           hop=f"{start}->{end}").observe(max(0, end_us - start_us) / 1e6)
+    if len(stamps) > 2:
+        registry.histogram("trace_hop_seconds", "Time between two stamps of a trace",
+                           hop="end_to_end").observe(max(0, stamps[-1][1] - stamps[0][1]) / 1e6)
+
+
+def trace_to_json(trace):
+    """
+    Trace message as carried by the pose frames: {"id": ..., "stamps": [[hop, time_us], ...]}
+    """
+    return {"id": trace.trace_id, "stamps": [[stamp.hop, stamp.time_us] for stamp in trace.stamps]}
+
+
+class _Call:
+    __slots__ = ("prefix", "start", "stamps", "stages")
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.start = time.perf_counter()
+        self.stamps = [(f"{prefix}.recv", now_us())]
+        self.stages = {}
+
+
+_current_call = contextvars.ContextVar("grpc_metrics_call", default=None)
+
+
+def current_call():
+    """
+    The RPC being handled, for add_stage from another thread or task, None
+    outside of an intercepted RPC
+    """
+    return _current_call.get()
+
+
+def add_stage(name, seconds, call=None):
+    """
+    Add time to a stage of an RPC, ex: a batch write timed by the thread that
+    serves several RPCs at once
+    :param call: current_call() of the RPC, by default the current one
+    """
+    if call is None:
+        call = _current_call.get()
+    if call is not None:
+        call.stages[name] = call.stages.get(name, 0.0) + seconds
+        call.stamps.append((f"{call.prefix}.{name}", now_us()))
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a stage of the current RPC, ex: with stage("opcua"): ...
+    Outside of an intercepted RPC it does nothing.
+    """
+    call = _current_call.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if call is not None:
+            add_stage(name, time.perf_counter() - start, call)
+
+
+def _status(context, error=None):
+    """
+    Status code name of a finished RPC, from the context or the exception that ended it
+    """
+    code = context.code()
+    if isinstance(code, int):
+        code = next((status for status in grpc.StatusCode if status.value[0] == code), None)  # grpc.aio
+    if code is not None:
+        return code.name
+    # Flux synchrone arrêté par le client : le gestionnaire sort normalement d'une RPC inactive
+    cancelled = context.cancelled() if hasattr(context, "cancelled") else not context.is_active()
+    if isinstance(error, (GeneratorExit, asyncio.CancelledError)) or cancelled:
+        return grpc.StatusCode.CANCELLED.name
+    if error is None:
+        return grpc.StatusCode.OK.name
+    return grpc.StatusCode.UNKNOWN.name
+
+
+class TracingInterceptor(grpc.ServerInterceptor):
+    """
+    Records per method the latency of each RPC by status code, the RPCs in
+    progress, the time an accepted RPC waits for a worker of the thread pool,
+    and the time of the stages its handler marks with stage(), ex: the OPC UA
+    calls, the rest of the handler being reported as the "overhead" stage.
+    Fills the trace field of the replies that have one with the stamps of this
+    server. The trace id comes from the "trace-id" metadata of the call, or is
+    created here.
+    """
+    def __init__(self, prefix, registry=REGISTRY, max_workers=None):
+        """
+        :param prefix: Name of this server in the stamps, ex: "clm" gives "clm.recv", "clm.send"
+        :param max_workers: Size of the thread pool, exported to compare with the RPCs in progress
+        """
+        self.prefix = prefix
+        self.registry = registry
+        if max_workers:
+            registry.gauge("grpc_server_max_workers", "Worker threads of the server",
+                           server=prefix).set(max_workers)
+
+    def intercept_service(self, continuation, handler_call_details):
+        return self._wrap_handler(continuation(handler_call_details), handler_call_details)
+
+    def _wrap_handler(self, handler, details):
+        if handler is None:
+            return None
+        # Le serveur synchrone appelle les intercepteurs depuis son thread de réception,
+        # le gestionnaire part ensuite dans le pool : l'écart est l'attente d'un worker
+        accepted = time.perf_counter()
+        method = details.method
+        metadata = dict(details.invocation_metadata or ())
+        trace_id = metadata.get(TRACE_KEY)
+        for kind, factory in (("unary_unary", grpc.unary_unary_rpc_method_handler),
+                              ("unary_stream", grpc.unary_stream_rpc_method_handler),
+                              ("stream_unary", grpc.stream_unary_rpc_method_handler),
+                              ("stream_stream", grpc.stream_stream_rpc_method_handler)):
+            behavior = getattr(handler, kind)
+            if behavior is not None:
+                wrapped = self._wrap_behavior(behavior, method, trace_id, accepted, kind.endswith("_stream"))
+                return factory(wrapped, request_deserializer=handler.request_deserializer,
+                               response_serializer=handler.response_serializer)
+        return handler
+
+    def _wrap_behavior(self, behavior, method, trace_id, accepted, streaming):
+        if inspect.isasyncgenfunction(behavior) or (streaming and inspect.iscoroutinefunction(behavior)):
+            async def wrapped(request, context):
+                call, token = self._start(method, accepted)
+                error = None
+                try:
+                    async for response in behavior(request, context):
+                        yield self._stamp(call, response, trace_id)
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    self._finish(call, token, method, _status(context, error))
+        elif inspect.iscoroutinefunction(behavior):
+            async def wrapped(request, context):
+                call, token = self._start(method, accepted)
+                error = None
+                try:
+                    return self._stamp(call, await behavior(request, context), trace_id)
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    self._finish(call, token, method, _status(context, error))
+        elif streaming:
+            def wrapped(request, context):
+                call, token = self._start(method, accepted)
+                error = None
+                try:
+                    for response in behavior(request, context):
+                        yield self._stamp(call, response, trace_id)
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    self._finish(call, token, method, _status(context, error))
+        else:
+            def wrapped(request, context):
+                call, token = self._start(method, accepted)
+                error = None
+                try:
+                    return self._stamp(call, behavior(request, context), trace_id)
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    self._finish(call, token, method, _status(context, error))
+        return wrapped
+
+    def _in_flight(self, method):
+        return self.registry.gauge("grpc_server_in_flight", "RPCs being handled", method=method)
+
+    def _start(self, method, accepted):
+        call = _Call(self.prefix)
+        self.registry.histogram("grpc_server_queue_wait_seconds",
+                                "Time between the arrival of an RPC and the start of its handler",
+                                method=method).observe(call.start - accepted)
+        self._in_flight(method).inc()
+        return call, _current_call.set(call)
+
+    def _stamp(self, call, response, trace_id):
+        if response is not None and "trace" in response.DESCRIPTOR.fields_by_name:
+            trace = response.trace
+            trace.trace_id = trace.trace_id or trace_id or new_trace_id()
+            for hop, time_us in call.stamps + [(f"{self.prefix}.send", now_us())]:
+                trace.stamps.add(hop=hop, time_us=time_us)
+        # Message suivant d'un flux : ses étapes partent d'ici
+        call.stamps = []
+        return response
+
+    def _finish(self, call, token, method, code):
+        try:
+            _current_call.reset(token)
+        except ValueError:
+            pass  # Flux terminé depuis un autre contexte, le sien disparaît avec lui
+        self._in_flight(method).dec()
+        total = time.perf_counter() - call.start
+        self.registry.histogram("grpc_server_handling_seconds", "Time to handle an RPC, by status code",
+                                method=method, code=code).observe(total)
+        # Temps du gestionnaire hors étapes marquées : gRPC, protobuf et code Python
+        stages = dict(call.stages, overhead=max(0.0, total - sum(call.stages.values())))
+        for name, seconds in stages.items():
+            self.registry.histogram("grpc_stage_seconds", "Time spent in each stage of an RPC",
+                                    method=method, stage=name).observe(seconds)
+
+
+class AioTracingInterceptor(grpc.aio.ServerInterceptor):
+    """
+    TracingInterceptor for grpc.aio servers, the queue wait is then the
+    delay of the event loop
+    """
+    def __init__(self, prefix, registry=REGISTRY):
+        self._tracing = TracingInterceptor(prefix, registry)
+
+    async def intercept_service(self, continuation, handler_call_details):
+        return self._tracing._wrap_handler(await continuation(handler_call_details), handler_call_details)
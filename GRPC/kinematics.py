@@ -0,0 +1,80 @@
+# kinematics.py
+# Module partagé : OPC-UA/plant_server.py l'importe via shared_path.py, ne pas le copier
+import numpy as np
+
+# Limites par défaut des axes simulés, en degrés (les articulations du robot)
+MAX_VELOCITY = 90.0
+MAX_ACCELERATION = 180.0
+TRAVEL = (-90.0, 90.0)
+TOLERANCE = 1e-3  # écart à la cible en dessous duquel l'axe est arrivé
+
+
+class MachineModel:
+    """
+    Axes of many machines moving to their targets with a velocity and an
+    acceleration limit, all stepped at once on (machines, axes) arrays. Axes
+    in auto mode pick a new random target within the travel when they reach
+    theirs, an axis given a target by set_target stays on it.
+    Not thread-safe: the caller serializes step and set_target.
+    """
+    def __init__(self, machines, axes, max_velocity=MAX_VELOCITY, max_acceleration=MAX_ACCELERATION,
+                 travel=TRAVEL, seed=None):
+        """
+        :param max_velocity: Scalar or one value per axis
+        :param max_acceleration: Scalar or one value per axis
+        :param travel: (low, high) of the axis positions
+        """
+        self.shape = (machines, axes)
+        self.max_velocity = np.broadcast_to(np.asarray(max_velocity, np.float64), (axes,))
+        self.max_acceleration = np.broadcast_to(np.asarray(max_acceleration, np.float64), (axes,))
+        self.travel = travel
+        self.rng = np.random.default_rng(seed)
+        self.position = np.empty(self.shape)
+        self.velocity = np.empty(self.shape)
+        self.target = np.empty(self.shape)
+        self.auto = np.empty(self.shape, np.bool_)
+        self.reset()
+
+    def reset(self):
+        """
+        Axes at rest at random positions, all in auto mode
+        """
+        self.time = 0.0  # temps simulé en secondes
+        self.steps = 0
+        self.position[:] = self.rng.uniform(*self.travel, self.shape)
+        self.velocity[:] = 0.0
+        self.target[:] = self.position
+        self.auto[:] = True
+
+    def set_target(self, machine, axis, value):
+        """
+        Send an axis to a position, it leaves auto mode
+        """
+        self.target[machine, axis] = min(max(value, self.travel[0]), self.travel[1])
+        self.auto[machine, axis] = False
+
+    def step(self, dt):
+        """
+        Move every axis by dt seconds: accelerate toward the target, as fast as
+        the limits allow, and brake in time to stop on it
+        """
+        error = self.target - self.position
+        distance = np.abs(error)
+        dv = self.max_acceleration * dt
+        # Vitesse qui permet encore de s'arrêter sur la cible à décélération maximale, la
+        # distance comptée au milieu du pas : l'axe arrive à moins de dv de vitesse, sans dépasser la cible
+        braking = np.maximum(distance - np.abs(self.velocity) * (dt / 2), 0.0)
+        wanted = np.sign(error) * np.minimum(self.max_velocity, np.sqrt(2.0 * self.max_acceleration * braking))
+        self.velocity += np.clip(wanted - self.velocity, -dv, dv)
+        step = self.velocity * dt
+        # Un pas qui dépasserait la cible s'y arrête
+        arrived = (distance <= np.abs(step)) | ((distance < TOLERANCE) & (np.abs(self.velocity) <= dv))
+        self.position += step
+        self.position[arrived] = self.target[arrived]
+        self.velocity[arrived] = 0.0
+        retarget = arrived & self.auto
+        count = int(retarget.sum())
+        if count:
+            self.target[retarget] = self.rng.uniform(*self.travel, count)
+        self.time += dt
+        self.steps += 1
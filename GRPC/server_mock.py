@@ -1,6 +1,27 @@
+import argparse
+import asyncio
 import grpc
+import time
 from concurrent import futures
+from fnmatch import fnmatchcase
 import cnc_pb2, cnc_pb2_grpc
+from grpc_metrics import AioTracingInterceptor, TracingInterceptor, serve_metrics
+
+MAX_WORKERS = 10
+
+def mock_values(request):
+    # Retourne une valeur fictive pour chaque node
+    values = [cnc_pb2.VariableValue(node_id=node_id, double_value=123.45)
+              for node_id in request.node_ids]
+    return cnc_pb2.VariableValues(values=values)
+
+def mock_resolve(request):
+    # Trois axes fictifs, le motif est appliqué comme un glob sur "AxisN.Position"
+    paths = [f"Axis{i}.Position" for i in range(1, 4)]
+    pattern = request.pattern.replace("**", "*")
+    nodes = [cnc_pb2.ResolvedNode(path=path, node_id=f"ns=2;s={path}", node_class="Variable", data_type="Double")
+             for path in paths if fnmatchcase(path, pattern)]
+    return cnc_pb2.ResolveResponse(nodes=nodes[:request.max_results or None])
 
 class CNCServiceServicer(cnc_pb2_grpc.CNCServiceServicer):
     def ReadVariable(self, request, context):
@@ -11,14 +32,66 @@ class CNCServiceServicer(cnc_pb2_grpc.CNCServiceServicer):
         # Accepte toujours l'écriture
         return cnc_pb2.WriteResponse(success=True)
 
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    def ReadVariables(self, request, context):
+        return mock_values(request)
+
+    def Subscribe(self, request, context):
+        # Envoie la valeur fictive une fois puis garde le flux ouvert
+        yield mock_values(request)
+        while context.is_active():
+            time.sleep(1)
+
+    def Resolve(self, request, context):
+        return mock_resolve(request)
+
+class AsyncCNCServiceServicer(cnc_pb2_grpc.CNCServiceServicer):
+    async def ReadVariable(self, request, context):
+        return cnc_pb2.ReadResponse(value="123.45")
+
+    async def WriteVariable(self, request, context):
+        return cnc_pb2.WriteResponse(success=True)
+
+    async def ReadVariables(self, request, context):
+        return mock_values(request)
+
+    async def Subscribe(self, request, context):
+        yield mock_values(request)
+        # Le flux reste ouvert jusqu'à l'annulation par le client
+        await asyncio.Event().wait()
+
+    async def Resolve(self, request, context):
+        return mock_resolve(request)
+
+def serve(max_workers=MAX_WORKERS):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers),
+                         interceptors=[TracingInterceptor("mock", max_workers=max_workers)])
     cnc_pb2_grpc.add_CNCServiceServicer_to_server(CNCServiceServicer(), server)
     server.add_insecure_port('[::]:50051')
     server.start()
     print("Serveur gRPC mock lancé sur le port 50051")
     server.wait_for_termination()
 
-if __name__ == "__main__":
-    serve()
+async def serve_async():
+    server = grpc.aio.server(interceptors=[AioTracingInterceptor("mock")])
+    cnc_pb2_grpc.add_CNCServiceServicer_to_server(AsyncCNCServiceServicer(), server)
+    server.add_insecure_port('[::]:50051')
+    await server.start()
+    print("Serveur gRPC mock (asyncio) lancé sur le port 50051")
+    await server.wait_for_termination()
 
+def main():
+    parser = argparse.ArgumentParser(description="Serveur gRPC CNCService fictif")
+    parser.add_argument("--engine", choices=("threaded", "async"), default="threaded",
+                        help="threaded: grpc.server + thread pool, async: grpc.aio sur une boucle asyncio")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Port HTTP des métriques, 0 pour aucun")
+    parser.add_argument("--max-workers", type=int, default=MAX_WORKERS, help="Threads gRPC du moteur threaded")
+    args = parser.parse_args()
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    if args.engine == "async":
+        asyncio.run(serve_async())
+    else:
+        serve(args.max_workers)
+
+if __name__ == "__main__":
+    main()
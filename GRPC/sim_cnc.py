@@ -0,0 +1,132 @@
+import re
+import time
+from fnmatch import fnmatchcase
+import grpc
+import numpy as np
+import cnc_pb2, cnc_pb2_grpc
+
+PUBLISHING_INTERVAL_MS = 100.0
+BAD_NODE_ID_INVALID = 0x80330000  # ua.StatusCodes.BadNodeIdInvalid, sans dépendre de opcua
+VARIABLES = ("Position", "Velocity", "Target")
+# "ns=2;s=M3.Axis1.Position", le préfixe de machine est facultatif pour la machine 0, axes comptés à partir de 1
+NODE_PATTERN = re.compile(r"^(?:ns=2;s=)?(?:M(\d+)\.)?Axis(\d+)\.(Position|Velocity|Target)$")
+
+
+def node_path(machines, machine, axis, variable):
+    if machines == 1:
+        return f"Axis{axis + 1}.{variable}"
+    return f"M{machine}.Axis{axis + 1}.{variable}"
+
+
+class SimCNCServicer(cnc_pb2_grpc.CNCServiceServicer):
+    """
+    CNCService over the axes of a kinematics.MachineModel stepped by
+    sim_server.py: AxisN.Position, AxisN.Velocity and AxisN.Target of each
+    machine. Writing a Position or a Target sends the axis there.
+    """
+    def __init__(self, model, lock):
+        """
+        :param lock: Lock held by the simulator while it steps the model
+        """
+        self.model = model
+        self.lock = lock
+        self.arrays = {"Position": model.position, "Velocity": model.velocity, "Target": model.target}
+
+    def parse(self, node_id):
+        """
+        :return: (variable, machine, axis), None for an unknown node
+        """
+        match = NODE_PATTERN.match(node_id)
+        if match is None:
+            return None
+        machine = int(match.group(1) or 0)
+        axis = int(match.group(2)) - 1
+        machines, axes = self.model.shape
+        if machine >= machines or not 0 <= axis < axes:
+            return None
+        return match.group(3), machine, axis
+
+    def _index(self, node_ids):
+        # Indices des nœuds connus dans les tableaux (machines, axes), pour tout lire d'un coup
+        parsed = [self.parse(node_id) for node_id in node_ids]
+        known = [i for i, node in enumerate(parsed) if node is not None]
+        return parsed, known
+
+    def _values(self, node_ids, known, values):
+        timestamp = int(time.time() * 1000)
+        messages = [cnc_pb2.VariableValue(node_id=node_id, status_code=BAD_NODE_ID_INVALID) for node_id in node_ids]
+        for i, value in zip(known, values):
+            messages[i] = cnc_pb2.VariableValue(node_id=node_ids[i], double_value=value,
+                                                source_timestamp_ms=timestamp)
+        return messages
+
+    def _read(self, parsed, known):
+        # Sous le verrou : toutes les valeurs viennent du même pas de simulation
+        with self.lock:
+            return [float(self.arrays[parsed[i][0]][parsed[i][1], parsed[i][2]]) for i in known]
+
+    def ReadVariable(self, request, context):
+        node = self.parse(request.node_id)
+        if node is None:
+            print(f"[ERROR] ReadVariable: unknown node {request.node_id}")
+            return cnc_pb2.ReadResponse(value="ERROR")
+        variable, machine, axis = node
+        with self.lock:
+            value = float(self.arrays[variable][machine, axis])
+        return cnc_pb2.ReadResponse(value=str(value))
+
+    def WriteVariable(self, request, context):
+        node = self.parse(request.node_id)
+        try:
+            value = float(request.value)
+        except ValueError:
+            node = None
+        if node is None or node[0] == "Velocity":
+            print(f"[ERROR] WriteVariable: {request.node_id} = {request.value} rejected")
+            return cnc_pb2.WriteResponse(success=False)
+        _, machine, axis = node
+        with self.lock:
+            self.model.set_target(machine, axis, value)
+        return cnc_pb2.WriteResponse(success=True)
+
+    def ReadVariables(self, request, context):
+        node_ids = list(request.node_ids)
+        parsed, known = self._index(node_ids)
+        return cnc_pb2.VariableValues(values=self._values(node_ids, known, self._read(parsed, known)))
+
+    def Subscribe(self, request, context):
+        node_ids = list(request.node_ids)
+        parsed, known = self._index(node_ids)
+        if not known:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "No valid node to subscribe to")
+        interval = (request.publishing_interval_ms or PUBLISHING_INTERVAL_MS) / 1000
+        # Première publication : tous les nœuds, les inconnus avec leur statut d'erreur
+        last = np.array(self._read(parsed, known))
+        yield cnc_pb2.VariableValues(values=self._values(node_ids, known, last.tolist()))
+        while context.is_active():
+            time.sleep(interval)
+            values = np.array(self._read(parsed, known))
+            changed = np.flatnonzero(np.abs(values - last) > request.deadband)
+            if not len(changed):
+                continue
+            last[changed] = values[changed]
+            timestamp = int(time.time() * 1000)
+            yield cnc_pb2.VariableValues(values=[
+                cnc_pb2.VariableValue(node_id=node_ids[known[i]], double_value=values[i],
+                                      source_timestamp_ms=timestamp) for i in changed.tolist()])
+
+    def Resolve(self, request, context):
+        machines, axes = self.model.shape
+        pattern = request.pattern.replace("**", "*")
+        nodes = []
+        for machine in range(machines):
+            for axis in range(axes):
+                for variable in VARIABLES:
+                    path = node_path(machines, machine, axis, variable)
+                    if fnmatchcase(path, pattern):
+                        nodes.append(cnc_pb2.ResolvedNode(path=path, node_id=f"ns=2;s={path}",
+                                                          node_class="Variable", data_type="Double"))
+                        if len(nodes) == request.max_results:
+                            return cnc_pb2.ResolveResponse(nodes=nodes)
+        return cnc_pb2.ResolveResponse(nodes=nodes)
+
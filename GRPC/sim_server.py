@@ -0,0 +1,161 @@
+import argparse
+import threading
+import time
+from concurrent import futures
+import grpc
+import gRPCCom_pb2
+import gRPCCom_pb2_grpc
+import cnc_pb2_grpc
+from acq_history import HISTORY_CHANNELS, HISTORY_SIZE
+from clm_server import MAX_WORKERS, PORT, STREAM_INTERVAL, CLMServiceServicer
+from grpc_metrics import REGISTRY, TracingInterceptor, serve_metrics
+from kinematics import MAX_ACCELERATION, MAX_VELOCITY, MachineModel
+from sim_cnc import SimCNCServicer
+
+AXES = 6  # les six articulations de orientationMap dans grpc_proxy.ts
+RATE = 100.0  # pas de simulation par seconde
+MACHINE_KEY = "machine"  # métadonnée gRPC choisissant la machine lue ou écrite, 0 par défaut
+
+
+class SimulatorServicer(CLMServiceServicer):
+    """
+    CLMService over one machine of a kinematics.MachineModel: channel 0 is
+    the step counter (int), channels 1 to N the axis positions, so the joints
+    of grpc_proxy.ts and grpc_bridge.py move. Writing channel k sends axis k
+    to the value. The machine is chosen by the "machine" metadata of the call.
+    Acquisitions and their history are served as by clm_server.py.
+    cnc is the CNCService of the same axes, to register on the same server.
+    """
+    def __init__(self, model, history_size=HISTORY_SIZE, history_channels=HISTORY_CHANNELS):
+        super().__init__(channels=model.shape[1] + 1, history_size=history_size,
+                         history_channels=history_channels)
+        self.model = model
+        self.is_int = [True] + [False] * model.shape[1]
+        # Même verrou : une écriture CNC ne se mêle pas à un pas de simulation
+        self.cnc = SimCNCServicer(model, self._lock)
+        self.step_seconds = REGISTRY.histogram("sim_step_seconds", "Time to step every simulated axis")
+        self.late_steps = REGISTRY.gauge("sim_late_steps", "Simulation steps started after their time")
+
+    def tick(self, dt):
+        """
+        Step every machine by dt seconds and wake the StreamData calls
+        """
+        start = time.perf_counter()
+        with self._changed:
+            self.model.step(dt)
+            self._version += 1
+            self._changed.notify_all()
+        self.step_seconds.observe(time.perf_counter() - start)
+
+    def run(self, rate, stop):
+        """
+        Step the model rate times per second until stop is set. A late step is
+        not caught up: the simulated time keeps following the wall clock.
+        """
+        dt = 1.0 / rate
+        deadline = time.monotonic()
+        while not stop.is_set():
+            self.tick(dt)
+            deadline += dt
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                stop.wait(delay)
+            else:
+                self.late_steps.inc()
+                deadline = time.monotonic()
+
+    def _machine(self, context):
+        value = dict(context.invocation_metadata()).get(MACHINE_KEY, "0")
+        machine = int(value) if value.isdigit() else -1
+        if not 0 <= machine < self.model.shape[0]:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Unknown machine {value}")
+        return machine
+
+    def _row(self, machine):
+        # Sous le verrou : un pas de simulation ne coupe pas la ligne en deux
+        with self._lock:
+            return [float(self.model.steps)] + self.model.position[machine].tolist()
+
+    def ReadData(self, request, context):
+        row = self._row(self._machine(context))
+        # int_value est un int32 : le compteur repart de 0 au bout de 2^31 pas
+        return gRPCCom_pb2.ReadReply(values=[gRPCCom_pb2.DataValue(int_value=int(row[0]) % 2**31)] +
+                                     [gRPCCom_pb2.DataValue(float_value=value) for value in row[1:]])
+
+    def ReadDataPacked(self, request, context):
+        return gRPCCom_pb2.PackedReadReply(values=self._row(self._machine(context)), is_int=self.is_int)
+
+    def Write(self, request, context):
+        machine = self._machine(context)
+        if any(key < 1 or key > self.model.shape[1] for key in request.values):
+            return gRPCCom_pb2.WriteReply(status=False)
+        with self._lock:
+            for key, value in request.values.items():
+                self.model.set_target(machine, key - 1, value.int_value + value.float_value)
+        return gRPCCom_pb2.WriteReply(status=True)
+
+    def StreamData(self, request, context):
+        machine = self._machine(context)
+        interval = request.interval_ms / 1000 if request.interval_ms > 0 else STREAM_INTERVAL
+        version = -1
+        last = None
+        while context.is_active():
+            with self._changed:
+                if not self._changed.wait_for(lambda: self._version != version, timeout=1.0):
+                    continue
+                version = self._version
+            row = self._row(machine)
+            # Le compteur de pas change toujours : seules les positions passent le seuil
+            if last is None or any(abs(value - previous) > request.deadband
+                                   for value, previous in zip(row[1:], last)):
+                last = row[1:]
+                yield gRPCCom_pb2.PackedReadReply(values=row, is_int=self.is_int)
+                time.sleep(interval)
+
+
+def serve(port=PORT, machines=1, axes=AXES, rate=RATE, max_velocity=MAX_VELOCITY,
+          max_acceleration=MAX_ACCELERATION, metrics_port=0, seed=None):
+    if metrics_port:
+        serve_metrics(metrics_port)
+    model = MachineModel(machines, axes, max_velocity, max_acceleration, seed=seed)
+    servicer = SimulatorServicer(model)
+    stop = threading.Event()
+    physics = threading.Thread(target=servicer.run, args=(rate, stop), daemon=True)
+    physics.start()
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=MAX_WORKERS),
+                         interceptors=[TracingInterceptor("sim", max_workers=MAX_WORKERS)])
+    gRPCCom_pb2_grpc.add_CLMServiceServicer_to_server(servicer, server)
+    cnc_pb2_grpc.add_CNCServiceServicer_to_server(servicer.cnc, server)
+    server.add_insecure_port(f'[::]:{port}')
+    server.start()
+    print(f"Simulateur CLMService et CNCService lancé sur le port {port} : {machines} machines de {axes} axes "
+          f"à {rate:g} Hz")
+    try:
+        server.wait_for_termination()
+    finally:
+        stop.set()
+        physics.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulateur cinématique servant CLMService et CNCService")
+    parser.add_argument("--port", type=int, default=PORT, help="Port du CLMService et du CNCService")
+    parser.add_argument("--machines", type=int, default=1, help="Machines simulées, choisies par la métadonnée "
+                                                                 f"'{MACHINE_KEY}' ou le préfixe M<n>. des nœuds")
+    parser.add_argument("--axes", type=int, default=AXES, help="Axes par machine")
+    parser.add_argument("--rate", type=float, default=RATE, help="Pas de simulation par seconde")
+    parser.add_argument("--max-velocity", type=float, default=MAX_VELOCITY, help="Vitesse maximale des axes, en °/s")
+    parser.add_argument("--max-acceleration", type=float, default=MAX_ACCELERATION,
+                        help="Accélération maximale des axes, en °/s²")
+    parser.add_argument("--seed", type=int, default=None, help="Graine des positions et des cibles aléatoires")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Port HTTP des métriques, 0 pour aucun")
+    args = parser.parse_args()
+    try:
+        serve(args.port, args.machines, args.axes, args.rate, args.max_velocity, args.max_acceleration,
+              args.metrics_port, args.seed)
+    except KeyboardInterrupt:
+        print("\nSimulateur arrêté.")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,7 @@ if _version_not_supported:
         + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
     )
 
+
 class CNCServiceStub(object):
     """Missing associated documentation comment in .proto file."""
 
@@ -34,15 +35,31 @@ class CNCServiceStub(object):
             channel: A grpc.Channel.
         """
         self.ReadVariable = channel.unary_unary(
-                '/CNCService/ReadVariable',
+                '/cnc.CNCService/ReadVariable',
                 request_serializer=cnc__pb2.ReadRequest.SerializeToString,
                 response_deserializer=cnc__pb2.ReadResponse.FromString,
                 _registered_method=True)
         self.WriteVariable = channel.unary_unary(
-                '/CNCService/WriteVariable',
+                '/cnc.CNCService/WriteVariable',
                 request_serializer=cnc__pb2.WriteRequest.SerializeToString,
                 response_deserializer=cnc__pb2.WriteResponse.FromString,
                 _registered_method=True)
+        self.ReadVariables = channel.unary_unary(
+                '/cnc.CNCService/ReadVariables',
+                request_serializer=cnc__pb2.ReadVariablesRequest.SerializeToString,
+                response_deserializer=cnc__pb2.VariableValues.FromString,
+                _registered_method=True)
+        self.Subscribe = channel.unary_stream(
+                '/cnc.CNCService/Subscribe',
+                request_serializer=cnc__pb2.SubscribeRequest.SerializeToString,
+                response_deserializer=cnc__pb2.VariableValues.FromString,
+                _registered_method=True)
+        self.Resolve = channel.unary_unary(
+                '/cnc.CNCService/Resolve',
+                request_serializer=cnc__pb2.ResolveRequest.SerializeToString,
+                response_deserializer=cnc__pb2.ResolveResponse.FromString,
+                _registered_method=True)
+
 
 class CNCServiceServicer(object):
     """Missing associated documentation comment in .proto file."""
@@ -59,6 +76,25 @@ class CNCServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ReadVariables(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Subscribe(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Resolve(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
 def add_CNCServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
             'ReadVariable': grpc.unary_unary_rpc_method_handler(
@@ -71,11 +107,26 @@ def add_CNCServiceServicer_to_server(servicer, server):
                     request_deserializer=cnc__pb2.WriteRequest.FromString,
                     response_serializer=cnc__pb2.WriteResponse.SerializeToString,
             ),
+            'ReadVariables': grpc.unary_unary_rpc_method_handler(
+                    servicer.ReadVariables,
+                    request_deserializer=cnc__pb2.ReadVariablesRequest.FromString,
+                    response_serializer=cnc__pb2.VariableValues.SerializeToString,
+            ),
+            'Subscribe': grpc.unary_stream_rpc_method_handler(
+                    servicer.Subscribe,
+                    request_deserializer=cnc__pb2.SubscribeRequest.FromString,
+                    response_serializer=cnc__pb2.VariableValues.SerializeToString,
+            ),
+            'Resolve': grpc.unary_unary_rpc_method_handler(
+                    servicer.Resolve,
+                    request_deserializer=cnc__pb2.ResolveRequest.FromString,
+                    response_serializer=cnc__pb2.ResolveResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
-            'CNCService', rpc_method_handlers)
+            'cnc.CNCService', rpc_method_handlers)
     server.add_generic_rpc_handlers((generic_handler,))
-    server.add_registered_method_handlers('CNCService', rpc_method_handlers)
+    server.add_registered_method_handlers('cnc.CNCService', rpc_method_handlers)
 
 
  # This class is part of an EXPERIMENTAL API.
@@ -96,7 +147,7 @@ class CNCService(object):
         return grpc.experimental.unary_unary(
             request,
             target,
-            '/CNCService/ReadVariable',
+            '/cnc.CNCService/ReadVariable',
             cnc__pb2.ReadRequest.SerializeToString,
             cnc__pb2.ReadResponse.FromString,
             options,
@@ -123,7 +174,7 @@ class CNCService(object):
         return grpc.experimental.unary_unary(
             request,
             target,
-            '/CNCService/WriteVariable',
+            '/cnc.CNCService/WriteVariable',
             cnc__pb2.WriteRequest.SerializeToString,
             cnc__pb2.WriteResponse.FromString,
             options,
@@ -134,4 +185,85 @@ class CNCService(object):
             wait_for_ready,
             timeout,
             metadata,
-            _registered_method=True)
\ No newline at end of file
+            _registered_method=True)
+
+    @staticmethod
+    def ReadVariables(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/cnc.CNCService/ReadVariables',
+            cnc__pb2.ReadVariablesRequest.SerializeToString,
+            cnc__pb2.VariableValues.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Subscribe(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/cnc.CNCService/Subscribe',
+            cnc__pb2.SubscribeRequest.SerializeToString,
+            cnc__pb2.VariableValues.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Resolve(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/cnc.CNCService/Resolve',
+            cnc__pb2.ResolveRequest.SerializeToString,
+            cnc__pb2.ResolveResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -18,7 +18,7 @@ var packageDefinition = protoloader.loadSync(
 
 var protoDescriptor = grpc.loadPackageDefinition(packageDefinition);
 
-var CNCService : any = protoDescriptor.CNCService;
+var CNCService : any = (protoDescriptor.cnc as any).CNCService;
 var client = new CNCService('192.168.0.1:50051', grpc.credentials.createInsecure());
 
 function onResponse(arg1,response, arg2, arg3){
@@ -0,0 +1,186 @@
+# node_cache.py
+import threading
+from collections import OrderedDict
+from opcua import ua
+from opcua.common.node import Node
+from opcua.common.ua_utils import data_type_to_variant_type
+from opcua_services import read_attributes
+
+TRUE_STRINGS = ("1", "true", "on", "yes")
+FALSE_STRINGS = ("0", "false", "off", "no")
+INTEGER_TYPES = ("SByte", "Byte", "Int16", "UInt16", "Int32", "UInt32", "Int64", "UInt64")
+FLOAT_TYPES = ("Float", "Double")
+BUILTIN_TYPE_MAX = 25  # ns=0;i=1..25 are the built-in data types
+
+
+class NodeCacheEntry:
+    """
+    Parsed NodeId of a variable and the variant type used to write it
+    """
+    def __init__(self, nodeid, variant_type):
+        self.nodeid = nodeid
+        self.variant_type = variant_type
+
+
+class NodeCache:
+    """
+    Bounded LRU of resolved NodeId strings ('ns=2;s=Axis1.Position'), shared
+    by the gRPC worker threads. The data type of each node is read once when
+    it enters the cache so writes can be encoded without a read-before-write.
+    """
+    def __init__(self, max_size=1024):
+        """
+        :param max_size: Maximum number of resolved nodes kept in memory
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, client, node_id):
+        """
+        Get the cache entry of a NodeId string, resolving it on a miss
+        :param client: Connected opcua client used to read the data type on a miss
+        :param node_id: NodeId string (ex: 'ns=2;s=Axis1.Position')
+        :return: NodeCacheEntry
+        """
+        with self._lock:
+            entry = self._entries.get(node_id)
+            if entry is not None:
+                self._entries.move_to_end(node_id)
+                return entry
+
+        nodeid = ua.NodeId.from_string(node_id)
+        variant_type = client.get_node(nodeid).get_data_type_as_variant_type()
+        return self.put(node_id, NodeCacheEntry(nodeid, variant_type))
+
+    def resolve_many(self, client, node_ids):
+        """
+        Get the cache entries of many NodeId strings, the data types of all the
+        misses are read with a single Read service call
+        :param client: Connected opcua client used to read the data types on a miss
+        :param node_ids: List of NodeId strings
+        :return: List of NodeCacheEntry, None where the NodeId string is invalid
+        """
+        entries, missing = self.parse_misses(node_ids)
+        if missing:
+            results = read_attributes(client, [nodeid for _, nodeid in missing], ua.AttributeIds.DataType)
+            for node_id, nodeid, data_type in self.store_data_types(entries, missing, results):
+                variant_type = data_type_to_variant_type(Node(client.uaclient, data_type))
+                entries[node_id] = self.put(node_id, NodeCacheEntry(nodeid, variant_type))
+        return [entries.get(node_id) for node_id in node_ids]
+
+    def parse_misses(self, node_ids, ua_module=ua):
+        """
+        First step of resolve_many: the cached entries and the parsed NodeIds of
+        the misses whose data type must be read
+        :param ua_module: ua module of the client library, opcua or asyncua
+        :return: ({node_id: NodeCacheEntry}, [(node_id, ua.NodeId)]), invalid NodeId strings are left out
+        """
+        entries, unknown = self.lookup(node_ids)
+        missing = []
+        for node_id in unknown:
+            try:
+                missing.append((node_id, ua_module.NodeId.from_string(node_id)))
+            except (ua_module.UaError, ValueError):
+                pass
+        return entries, missing
+
+    def store_data_types(self, entries, missing, results, ua_module=ua):
+        """
+        Second step of resolve_many: store in entries the misses whose DataType
+        attribute was read, built-in types are cached right away
+        :param missing: [(node_id, ua.NodeId)] from parse_misses
+        :param results: ua.DataValue of the DataType attribute of each miss
+        :return: [(node_id, ua.NodeId, data type NodeId)] whose variant type must
+            be looked up in the server before calling put
+        """
+        lookups = []
+        for (node_id, nodeid), result in zip(missing, results):
+            if not result.StatusCode.is_good():
+                # Not cached, the read will report the node's own status
+                entries[node_id] = NodeCacheEntry(nodeid, None)
+                continue
+            data_type = result.Value.Value
+            if is_builtin_type(data_type):
+                variant_type = ua_module.VariantType(data_type.Identifier)
+                entries[node_id] = self.put(node_id, NodeCacheEntry(nodeid, variant_type))
+            else:
+                lookups.append((node_id, nodeid, data_type))
+        return lookups
+
+    def lookup(self, node_ids):
+        """
+        Split NodeId strings between cached entries and misses
+        :param node_ids: List of NodeId strings
+        :return: ({node_id: NodeCacheEntry}, [missing node_id, without duplicates])
+        """
+        entries = {}
+        with self._lock:
+            for node_id in node_ids:
+                entry = self._entries.get(node_id)
+                if entry is not None:
+                    self._entries.move_to_end(node_id)
+                    entries[node_id] = entry
+        missing = [node_id for node_id in dict.fromkeys(node_ids) if node_id not in entries]
+        return entries, missing
+
+    def put(self, node_id, entry):
+        """
+        Store a resolved entry, evicting the least recently used ones above max_size
+        """
+        with self._lock:
+            self._entries[node_id] = entry
+            self._entries.move_to_end(node_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, _client=None):
+        """
+        Forget every resolved node, used as a session pool reconnect listener
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def is_builtin_type(data_type):
+    """
+    True if a DataType NodeId is one of the built-in types, whose identifier is the VariantType
+    """
+    return data_type.NamespaceIndex == 0 and 0 < data_type.Identifier <= BUILTIN_TYPE_MAX
+
+
+def convert_value(text, variant_type, localized_text=ua.LocalizedText):
+    """
+    Convert the string value of a WriteRequest to the python value matching a variant type
+    :param text: Value as received from gRPC
+    :param variant_type: VariantType of the target node
+    :param localized_text: LocalizedText class of the OPC UA library writing the value
+    :return: Converted value
+    """
+    name = variant_type.name
+    if name == "Boolean":
+        lowered = text.strip().lower()
+        if lowered in TRUE_STRINGS:
+            return True
+        if lowered in FALSE_STRINGS:
+            return False
+        raise ValueError(f"Invalid boolean value: '{text}'")
+    if name in INTEGER_TYPES:
+        try:
+            return int(text)
+        except ValueError:
+            number = float(text)
+            if not number.is_integer():
+                raise ValueError(f"Invalid integer value: '{text}'")
+            return int(number)
+    if name in FLOAT_TYPES:
+        return float(text)
+    if name == "String":
+        return text
+    if name == "LocalizedText":
+        return localized_text(text)
+    raise ValueError(f"Unsupported variant type for write: {name}")
@@ -0,0 +1,203 @@
+# opcua_pool.py
+import threading
+import time
+from concurrent import futures
+from contextlib import contextmanager
+from opcua import Client, ua
+import shared_path  # noqa: F401, rend grpc_metrics importable
+from grpc_metrics import stage
+
+# Status codes meaning the session itself is gone, not just the request
+SESSION_LOST_CODES = {
+    ua.StatusCodes.BadSessionIdInvalid,
+    ua.StatusCodes.BadSessionClosed,
+    ua.StatusCodes.BadSessionNotActivated,
+    ua.StatusCodes.BadSecureChannelIdInvalid,
+    ua.StatusCodes.BadSecureChannelClosed,
+    ua.StatusCodes.BadConnectionClosed,
+    ua.StatusCodes.BadCommunicationError,
+    ua.StatusCodes.BadServerHalted,
+}
+
+
+class PooledSession:
+    """
+    One connected OPC UA client owned by the pool
+    """
+    def __init__(self, client):
+        self.client = client
+        self.last_checked = time.monotonic()
+        self.broken = False
+
+
+class OPCUASessionPool:
+    """
+    Pool of long-lived OPC UA sessions shared by the gRPC worker threads.
+    Sessions are opened lazily up to max_size, health checked when they have
+    been idle for a while and reopened with an exponential backoff when the
+    endpoint goes away.
+    """
+    def __init__(self, endpoint, max_size=4, timeout=5.0, health_check_interval=10.0,
+                 backoff_initial=0.5, backoff_max=30.0, security_string=None):
+        """
+        :param endpoint: OPC UA endpoint url (ex: 'opc.tcp://192.168.0.100:4840')
+        :param max_size: Maximum number of simultaneous sessions
+        :param timeout: Request timeout and maximum wait for a free session, in seconds
+        :param health_check_interval: Idle time after which a session is checked before reuse, in seconds
+        :param backoff_initial: First reconnect delay after a failure, in seconds
+        :param backoff_max: Upper bound of the reconnect delay, in seconds
+        :param security_string: 'Policy,Mode,cert,key' security string, None for an unsecured session
+        """
+        self.endpoint = endpoint
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.security_string = security_string
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._failures = 0
+        self._next_attempt = 0.0
+        self._listeners = []
+        self._cond = threading.Condition()
+
+    def add_reconnect_listener(self, callback):
+        """
+        Register a callback called with the dropped client each time a session
+        is torn down to be reconnected
+        """
+        self._listeners.append(callback)
+
+    def remove_reconnect_listener(self, callback):
+        """
+        Unregister a callback added with add_reconnect_listener
+        """
+        self._listeners.remove(callback)
+
+    @contextmanager
+    def session(self):
+        """
+        Borrow a connected client for the duration of the with block
+        """
+        # Attente d'une session libre, distincte du temps des appels OPC UA
+        with stage("session"):
+            pooled = self._acquire()
+        try:
+            yield pooled.client
+        except ua.UaStatusCodeError as e:
+            if e.code in SESSION_LOST_CODES:
+                pooled.broken = True
+            raise
+        except (OSError, TimeoutError, futures.TimeoutError):
+            pooled.broken = True
+            raise
+        finally:
+            self._release(pooled)
+
+    def close(self):
+        """
+        Disconnect every idle session and refuse new borrows
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._disconnect(pooled.client)
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise ConnectionError("OPC UA session pool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No OPC UA session available after {self.timeout}s")
+                self._cond.wait(remaining)
+
+        # From here the caller owns one slot of the pool
+        try:
+            if pooled is None:
+                return PooledSession(self._connect())
+            if time.monotonic() - pooled.last_checked > self.health_check_interval:
+                if self._is_healthy(pooled.client):
+                    pooled.last_checked = time.monotonic()
+                else:
+                    self._drop(pooled.client)
+                    pooled = PooledSession(self._connect())
+            return pooled
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, pooled):
+        if pooled.broken or self._closed:
+            if pooled.broken:
+                self._drop(pooled.client)
+            else:
+                self._disconnect(pooled.client)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def _connect(self):
+        with self._cond:
+            wait = self._next_attempt - time.monotonic()
+        if wait > self.timeout:
+            raise ConnectionError(f"OPC UA endpoint unreachable, next attempt in {wait:.1f}s")
+        if wait > 0:
+            time.sleep(wait)
+
+        client = Client(self.endpoint, timeout=self.timeout)
+        if self.security_string:
+            client.set_security_string(self.security_string)
+        try:
+            client.connect()
+        except Exception:
+            with self._cond:
+                delay = min(self.backoff_max, self.backoff_initial * 2 ** self._failures)
+                self._failures += 1
+                self._next_attempt = time.monotonic() + delay
+            raise
+        with self._cond:
+            self._failures = 0
+            self._next_attempt = 0.0
+        return client
+
+    def _drop(self, client):
+        print(f"[POOL] Dropping OPC UA session to {self.endpoint}")
+        self._disconnect(client)
+        for callback in list(self._listeners):
+            callback(client)
+
+    @staticmethod
+    def _is_healthy(client):
+        try:
+            client.get_node(ua.ObjectIds.Server_ServerStatus_State).get_value()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _disconnect(client):
+        try:
+            client.disconnect()
+        except Exception:
+            pass
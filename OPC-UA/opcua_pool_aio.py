@@ -0,0 +1,202 @@
+# opcua_pool_aio.py
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from asyncua import Client, ua
+import shared_path  # noqa: F401, rend grpc_metrics importable
+from grpc_metrics import stage
+from opcua_pool import SESSION_LOST_CODES
+
+
+class AsyncPooledSession:
+    """
+    One connected asyncua client owned by the pool
+    """
+    def __init__(self, client):
+        self.client = client
+        self.in_flight = 0
+        self.broken = False
+
+
+class AsyncSessionPool:
+    """
+    asyncio counterpart of OPCUASessionPool. An asyncua session pipelines its
+    requests, so sessions are shared rather than borrowed exclusively: each
+    call goes to the least loaded session and a new one is opened only while
+    all of them are busy, up to max_size.
+    """
+    def __init__(self, endpoint, max_size=4, timeout=5.0, health_check_interval=10.0,
+                 backoff_initial=0.5, backoff_max=30.0, security_string=None):
+        """
+        :param endpoint: OPC UA endpoint url (ex: 'opc.tcp://192.168.0.100:4840')
+        :param max_size: Maximum number of simultaneous sessions
+        :param timeout: Request timeout and maximum wait for a session, in seconds
+        :param health_check_interval: Period of the background health check, in seconds
+        :param backoff_initial: First reconnect delay after a failure, in seconds
+        :param backoff_max: Upper bound of the reconnect delay, in seconds
+        :param security_string: 'Policy,Mode,cert,key' security string, None for an unsecured session
+        """
+        self.endpoint = endpoint
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.security_string = security_string
+        self._sessions = []
+        self._connecting = 0
+        self._closed = False
+        self._failures = 0
+        self._next_attempt = 0.0
+        self._listeners = []
+        self._changed = asyncio.Condition()
+        self._monitor = None
+
+    def add_reconnect_listener(self, callback):
+        """
+        Register a callback called with the dropped client each time a session
+        is torn down to be reconnected
+        """
+        self._listeners.append(callback)
+
+    def remove_reconnect_listener(self, callback):
+        """
+        Unregister a callback added with add_reconnect_listener
+        """
+        self._listeners.remove(callback)
+
+    @asynccontextmanager
+    async def session(self):
+        """
+        Use a connected client for the duration of the async with block
+        """
+        with stage("session"):
+            pooled = await asyncio.wait_for(self._acquire(), self.timeout)
+        try:
+            yield pooled.client
+        except ua.UaStatusCodeError as e:
+            if e.code in SESSION_LOST_CODES:
+                pooled.broken = True
+            raise
+        except (OSError, asyncio.TimeoutError, ConnectionError):
+            pooled.broken = True
+            raise
+        finally:
+            pooled.in_flight -= 1
+            if pooled.broken:
+                await self._drop(pooled)
+
+    async def close(self):
+        """
+        Disconnect every session and refuse new calls
+        """
+        self._closed = True
+        if self._monitor is not None:
+            self._monitor.cancel()
+        sessions, self._sessions = self._sessions, []
+        for pooled in sessions:
+            await self._disconnect(pooled.client)
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _acquire(self):
+        if self._monitor is None:
+            self._monitor = asyncio.create_task(self._health_check_loop())
+        async with self._changed:
+            while True:
+                if self._closed:
+                    raise ConnectionError("OPC UA session pool is closed")
+                best = self._least_loaded()
+                if best is not None and (best.in_flight == 0 or self._is_full()):
+                    best.in_flight += 1
+                    return best
+                if not self._is_full():
+                    break
+                # Every slot is connecting, wait for one of them
+                await self._changed.wait()
+            self._connecting += 1
+
+        try:
+            client = await self._connect()
+        except asyncio.CancelledError:
+            self._connecting -= 1
+            raise
+        except Exception:
+            async with self._changed:
+                self._connecting -= 1
+                self._changed.notify_all()
+                # Pas celle choisie avant la connexion : le contrôle de santé a pu la fermer entre-temps
+                best = self._least_loaded()
+                if best is not None:
+                    best.in_flight += 1
+                    return best
+            raise
+        pooled = AsyncPooledSession(client)
+        pooled.in_flight += 1
+        async with self._changed:
+            self._connecting -= 1
+            self._sessions.append(pooled)
+            self._changed.notify_all()
+        return pooled
+
+    def _least_loaded(self):
+        # Sessions encore dans le pool : une session fermée par _drop en est retirée
+        live = [pooled for pooled in self._sessions if not pooled.broken]
+        return min(live, key=lambda pooled: pooled.in_flight, default=None)
+
+    def _is_full(self):
+        return len(self._sessions) + self._connecting >= self.max_size
+
+    async def _connect(self):
+        wait = self._next_attempt - time.monotonic()
+        if wait > self.timeout:
+            raise ConnectionError(f"OPC UA endpoint unreachable, next attempt in {wait:.1f}s")
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        client = Client(self.endpoint, timeout=self.timeout)
+        if self.security_string:
+            await client.set_security_string(self.security_string)
+        try:
+            await client.connect()
+        except asyncio.CancelledError:
+            # Annulé en pleine connexion (wait_for de session()) : fermer le socket et la session à moitié ouverts
+            await self._disconnect(client)
+            raise
+        except Exception:
+            delay = min(self.backoff_max, self.backoff_initial * 2 ** self._failures)
+            self._failures += 1
+            self._next_attempt = time.monotonic() + delay
+            raise
+        self._failures = 0
+        self._next_attempt = 0.0
+        return client
+
+    async def _drop(self, pooled):
+        if pooled not in self._sessions:
+            return
+        self._sessions.remove(pooled)
+        print(f"[POOL] Dropping OPC UA session to {self.endpoint}")
+        await self._disconnect(pooled.client)
+        for callback in list(self._listeners):
+            callback(pooled.client)
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def _health_check_loop(self):
+        while not self._closed:
+            await asyncio.sleep(self.health_check_interval)
+            for pooled in list(self._sessions):
+                try:
+                    state = pooled.client.get_node(ua.ObjectIds.Server_ServerStatus_State)
+                    await asyncio.wait_for(state.read_value(), self.timeout)
+                except Exception:
+                    pooled.broken = True
+                    await self._drop(pooled)
+
+    @staticmethod
+    async def _disconnect(client):
+        try:
+            await client.disconnect()
+        except Exception:
+            pass
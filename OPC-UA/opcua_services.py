@@ -0,0 +1,113 @@
+# opcua_services.py
+from datetime import timezone
+from opcua import ua
+import cnc_pb2
+
+NO_SNAPSHOT = "No address space snapshot loaded, start the server with --snapshot"
+
+
+def read_parameters(nodeids, attribute_id=ua.AttributeIds.Value, ua_module=ua):
+    """
+    Request of a Read service call reading one attribute of many nodes
+    :param nodeids: List of ua.NodeId
+    :param attribute_id: Attribute to read (default: Value)
+    :param ua_module: ua module of the client library, opcua or asyncua
+    :return: ua.ReadParameters
+    """
+    params = ua_module.ReadParameters()
+    params.TimestampsToReturn = ua_module.TimestampsToReturn.Source
+    for nodeid in nodeids:
+        rv = ua_module.ReadValueId()
+        rv.NodeId = nodeid
+        rv.AttributeId = attribute_id
+        params.NodesToRead.append(rv)
+    return params
+
+
+def write_parameters(values, ua_module=ua):
+    """
+    Request of a Write service call writing the Value attribute of many nodes
+    :param values: List of (ua.NodeId, ua.Variant)
+    :param ua_module: ua module of the client library, opcua or asyncua
+    :return: ua.WriteParameters
+    """
+    params = ua_module.WriteParameters()
+    for nodeid, variant in values:
+        wv = ua_module.WriteValue()
+        wv.NodeId = nodeid
+        wv.AttributeId = ua_module.AttributeIds.Value
+        wv.Value = ua_module.DataValue(variant)
+        params.NodesToWrite.append(wv)
+    return params
+
+
+def read_attributes(client, nodeids, attribute_id=ua.AttributeIds.Value):
+    """
+    Read one attribute of many nodes with a single OPC UA Read service call
+    :param client: Connected opcua client
+    :param nodeids: List of ua.NodeId
+    :param attribute_id: Attribute to read (default: Value)
+    :return: List of ua.DataValue, in the order of nodeids
+    """
+    return client.uaclient.read(read_parameters(nodeids, attribute_id))
+
+
+def write_values(client, values):
+    """
+    Write the Value attribute of many nodes with a single OPC UA Write service call
+    :param client: Connected opcua client
+    :param values: List of (ua.NodeId, ua.Variant)
+    :return: List of ua.StatusCode, in the order of values
+    """
+    return client.uaclient.write(write_parameters(values))
+
+
+def timestamp_ms(timestamp):
+    """
+    Convert an OPC UA timestamp (naive UTC datetime) to ms since epoch, 0 if unset
+    """
+    if timestamp is None:
+        return 0
+    return int(timestamp.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def variable_value(node_id, data_value):
+    """
+    Build the typed gRPC VariableValue of a ua.DataValue
+    :param node_id: NodeId string echoed back to the caller
+    :param data_value: ua.DataValue, or None if the node could not be resolved
+    :return: cnc_pb2.VariableValue
+    """
+    if data_value is None:
+        return cnc_pb2.VariableValue(node_id=node_id, status_code=ua.StatusCodes.BadNodeIdInvalid)
+    message = cnc_pb2.VariableValue(
+        node_id=node_id,
+        status_code=data_value.StatusCode.value,
+        source_timestamp_ms=timestamp_ms(data_value.SourceTimestamp),
+    )
+    if not data_value.StatusCode.is_good() or data_value.Value is None:
+        return message
+    value = data_value.Value.Value
+    if isinstance(value, bool):
+        message.bool_value = value
+    elif isinstance(value, int):
+        message.int_value = value
+    elif isinstance(value, float):
+        message.double_value = value
+    elif isinstance(value, str):
+        message.string_value = value
+    elif value is not None:
+        message.string_value = str(value)
+    return message
+
+
+def resolve_response(symbols, pattern, max_results=0):
+    """
+    Build the gRPC ResolveResponse of a glob pattern
+    :param symbols: SymbolIndex of the address space
+    :return: cnc_pb2.ResolveResponse
+    """
+    return cnc_pb2.ResolveResponse(nodes=[
+        cnc_pb2.ResolvedNode(path=entry.path, node_id=entry.node_id,
+                             node_class=entry.node_class, data_type=entry.data_type)
+        for entry in symbols.resolve(pattern, max_results)])
@@ -0,0 +1,248 @@
+# plant_server.py
+import argparse
+import asyncio
+import random
+import socket
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlparse
+import numpy as np
+from opcua import Server, ua
+import shared_path  # noqa: F401, rend grpc_metrics et kinematics importables
+from grpc_metrics import REGISTRY, serve_metrics
+from kinematics import MAX_ACCELERATION, MAX_VELOCITY, MachineModel
+
+ENDPOINT = "opc.tcp://127.0.0.1:4840"
+NAMESPACE = "urn:vlm-robotics:plant"  # premier espace enregistré : ns=2
+AXES = 1000
+RATE = 10.0  # mises à jour de l'espace d'adresses par seconde
+VARIABLES = ("Position", "Velocity", "Target")
+WRITABLE = ("Position", "Target")  # écrire l'un ou l'autre envoie l'axe à la valeur
+
+
+class LatencyProxy:
+    """
+    TCP proxy in front of the OPC UA server, on its own event loop thread.
+    Requests go through as they arrive, what the server sends leaves latency
+    seconds, plus or minus jitter, later and in the order it was sent on each
+    connection.
+    """
+    def __init__(self, host, port, server_host, server_port, latency, jitter):
+        """
+        :param host: Address the clients connect to
+        :param port: Port the clients connect to
+        :param server_host: Address of the OPC UA server
+        :param server_port: Port of the OPC UA server
+        :param latency: Seconds added to every response
+        :param jitter: Maximal deviation of the latency, in seconds
+        """
+        self.host = host
+        self.port = port
+        self.server_host = server_host
+        self.server_port = server_port
+        self.latency = latency
+        self.jitter = jitter
+        self.loop = asyncio.new_event_loop()
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._connected, self.host, self.port), self.loop).result()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self.loop.call_soon_threadsafe(self._server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+    async def _connected(self, client_reader, client_writer):
+        try:
+            server_reader, server_writer = await asyncio.open_connection(self.server_host, self.server_port)
+        except OSError as e:
+            print(f"[ERROR] Latency proxy: {e}")
+            client_writer.close()
+            return
+        await asyncio.gather(self._forward(client_reader, server_writer),
+                             self._forward_delayed(server_reader, client_writer))
+
+    @staticmethod
+    async def _forward(reader, writer):
+        try:
+            while data := await reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _forward_delayed(self, reader, writer):
+        last = 0.0  # heure d'envoi du dernier bloc programmé
+        try:
+            while data := await reader.read(65536):
+                delay = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+                last = max(self.loop.time() + delay, last)
+                self.loop.call_at(last, self._send, writer, data)
+        except ConnectionError:
+            pass
+        # Fermeture après le dernier bloc programmé
+        self.loop.call_at(last, writer.close)
+
+    @staticmethod
+    def _send(writer, data):
+        if not writer.is_closing():
+            writer.write(data)
+
+
+class PlantServer:
+    """
+    OPC UA server standing in for the CNC: objects Axis1 to AxisN, each with
+    the Double variables AxisN.Position, AxisN.Velocity and AxisN.Target in
+    ns=2, moved by a kinematics.MachineModel updated rate times per second.
+    Only the values that changed are written to the address space.
+    Writing a Position or a Target sends the axis there.
+    """
+    def __init__(self, endpoint=ENDPOINT, axes=AXES, rate=RATE, latency=0.0, jitter=0.0,
+                 max_velocity=MAX_VELOCITY, max_acceleration=MAX_ACCELERATION, seed=None):
+        """
+        :param latency: Seconds added to every response
+        :param jitter: Maximal deviation of the latency, in seconds
+        """
+        self.rate = rate
+        self.model = MachineModel(1, axes, max_velocity, max_acceleration, seed=seed)
+        self.server = Server()
+        self.server.set_server_name("Plant stand-in")
+        self.proxy = None
+        if latency or jitter:
+            # Le serveur écoute sur un port local libre, les clients passent par le proxy sur endpoint
+            url = urlparse(endpoint)
+            with socket.socket() as probe:
+                probe.bind(("127.0.0.1", 0))
+                server_port = probe.getsockname()[1]
+            self.proxy = LatencyProxy(url.hostname, url.port, "127.0.0.1", server_port, latency, jitter)
+            endpoint = f"opc.tcp://127.0.0.1:{server_port}"
+        self.server.set_endpoint(endpoint)
+        index = self.server.register_namespace(NAMESPACE)
+        aspace = self.server.iserver.aspace
+        objects = self.server.get_objects_node()
+        # Identifiants des nœuds par variable, dans l'ordre des axes du modèle
+        self.nodeids = {variable: [] for variable in VARIABLES}
+        for axis in range(axes):
+            name = f"Axis{axis + 1}"
+            # Noms de parcours dans ns=2 comme les NodeIds : "2:Axis1/2:Position" désigne le même nœud
+            folder = objects.add_object(ua.NodeId(name, index), ua.QualifiedName(name, index))
+            for variable in VARIABLES:
+                node = folder.add_variable(ua.NodeId(f"{name}.{variable}", index), ua.QualifiedName(variable, index),
+                                           0.0, ua.VariantType.Double)
+                self.nodeids[variable].append(node.nodeid)
+                if variable in WRITABLE:
+                    node.set_writable()
+                    aspace.add_datachange_callback(node.nodeid, ua.AttributeIds.Value,
+                                                   lambda _, value, axis=axis, variable=variable:
+                                                   self._written(variable, axis, value))
+        self.arrays = {"Position": self.model.position[0], "Velocity": self.model.velocity[0],
+                       "Target": self.model.target[0]}
+        self.published = {variable: np.full(axes, np.nan) for variable in VARIABLES}
+        self.update_seconds = REGISTRY.histogram("plant_update_seconds", "Time to step and publish the axes")
+        self.updated_values = REGISTRY.gauge("plant_updated_values", "Values written by the last update")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._updater = None  # thread de mise à jour, ses propres écritures ne sont pas des consignes
+
+    def _written(self, variable, axis, value):
+        if threading.get_ident() == self._updater:
+            return
+        with self._lock:
+            self.model.set_target(0, axis, float(value.Value.Value))
+        # La valeur écrite par le client est remplacée par celle du modèle à la prochaine mise à jour
+        self.published[variable][axis] = np.nan
+
+    def publish(self):
+        """
+        Write the values that changed since the last update to the address space
+        """
+        aspace = self.server.iserver.aspace
+        timestamp = datetime.utcnow()
+        count = 0
+        for variable in VARIABLES:
+            values = self.arrays[variable].copy()
+            published = self.published[variable]
+            changed = np.flatnonzero(values != published)
+            published[changed] = values[changed]
+            nodeids = self.nodeids[variable]
+            for axis, value in zip(changed.tolist(), values[changed].tolist()):
+                data_value = ua.DataValue(ua.Variant(value, ua.VariantType.Double))
+                data_value.SourceTimestamp = data_value.ServerTimestamp = timestamp
+                aspace.set_attribute_value(nodeids[axis], ua.AttributeIds.Value, data_value)
+            count += len(changed)
+        self.updated_values.set(count)
+
+    def _run(self):
+        self._updater = threading.get_ident()
+        self.publish()
+        dt = 1.0 / self.rate
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            with self._lock:
+                self.model.step(dt)
+            self.publish()
+            self.update_seconds.observe(time.perf_counter() - start)
+            deadline = max(deadline + dt, time.monotonic())
+            self._stop.wait(deadline - time.monotonic())
+
+    def start(self):
+        self.server.start()
+        if self.proxy is not None:
+            self.proxy.start()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.proxy is not None:
+            self.proxy.stop()
+        self.server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OPC UA server standing in for the CNC, "
+                                                 "ns=2;s=AxisN.Position / Velocity / Target variables")
+    parser.add_argument("--endpoint", default=ENDPOINT)
+    parser.add_argument("--axes", type=int, default=AXES, help="number of AxisN objects, 3 variables each")
+    parser.add_argument("--rate", type=float, default=RATE, help="address space updates per second")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0,
+                        help="maximal deviation of the delay, responses stay in order on a connection")
+    parser.add_argument("--max-velocity", type=float, default=MAX_VELOCITY, help="axis speed limit, in °/s")
+    parser.add_argument("--max-acceleration", type=float, default=MAX_ACCELERATION,
+                        help="axis acceleration limit, in °/s²")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the random positions and targets")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="HTTP port of the Prometheus metrics (update time), 0 to disable")
+    args = parser.parse_args()
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    plant = PlantServer(args.endpoint, args.axes, args.rate, args.latency_ms / 1000, args.jitter_ms / 1000,
+                        args.max_velocity, args.max_acceleration, args.seed)
+    plant.start()
+    print(f"OPC UA plant running at {args.endpoint}: {args.axes} axes, {args.axes * len(VARIABLES)} variables "
+          f"updated at {args.rate:g} Hz, latency {args.latency_ms:g} ± {args.jitter_ms:g} ms")
+    try:
+        while True:
+            time.sleep(60*60*24)
+    except KeyboardInterrupt:
+        print("Stopping server...")
+    finally:
+        plant.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,264 @@
 # server_grpc.py
+import argparse
+import asyncio
 import grpc
 from concurrent import futures
-from opcua import Client
 import cnc_pb2
 import cnc_pb2_grpc
+import queue
+import threading
 import time
+from opcua import ua
+import shared_path  # noqa: F401, rend grpc_metrics importable
+from grpc_metrics import TracingInterceptor, serve_metrics, stage
+from opcua_pool import OPCUASessionPool
+from node_cache import NodeCache, convert_value
+from opcua_services import NO_SNAPSHOT, read_attributes, resolve_response, variable_value
+from symbol_index import SymbolIndex
+from write_coalescer import WriteCoalescer
 
 OPC_UA_ENDPOINT = "opc.tcp://192.168.0.100:4840"
 TIMEOUT = 5.0  # secondes
+PORT = 50051
+MAX_WORKERS = 10
+POOL_SIZE = 4  # sessions OPC UA partagées par les threads gRPC
+NODE_CACHE_SIZE = 1024
+PUBLISHING_INTERVAL_MS = 33  # période par défaut des subscriptions
+WRITE_WINDOW_MS = 5  # fenêtre de regroupement des écritures, 0 = écriture directe
+
+class SubscriptionStream:
+    """
+    OPC UA subscription feeding a gRPC stream. It is closed when the RPC ends
+    or when the pool drops the session it was created on.
+    """
+    def __init__(self, pool):
+        self.pool = pool
+        self.updates = queue.Queue()
+        self.lost = False
+        self._client = None
+        self._subscription = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def open(self, client, nodes, interval, deadband):
+        """
+        Create the subscription and its monitored items with one service call
+        :return: List of monitored item handles, or ua.StatusCode for the failed nodes
+        """
+        self._client = client
+        self._subscription = client.create_subscription(interval, self)
+        self.pool.add_reconnect_listener(self.on_reconnect)
+        if deadband > 0:
+            return self._subscription.deadband_monitor(nodes, deadband)
+        return self._subscription.subscribe_data_change(nodes)
+
+    def datachange_notification(self, node, val, data):
+        self.updates.put((node.nodeid, data.monitored_item.Value))
+
+    def on_reconnect(self, client):
+        if client is self._client:
+            self.lost = True
+            self.close()
+
+    def batches(self):
+        """
+        Yield {nodeid: DataValue} dicts keeping only the latest value of each
+        node received since the previous batch, until the stream is closed
+        """
+        while True:
+            item = self.updates.get()
+            batch = {}
+            while item is not None:
+                batch[item[0]] = item[1]
+                try:
+                    item = self.updates.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                yield batch
+            if item is None:
+                return
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.updates.put(None)
+        self.pool.remove_reconnect_listener(self.on_reconnect)
+        try:
+            self._subscription.delete()
+        except Exception:
+            pass
 
 class CNCServiceServicer(cnc_pb2_grpc.CNCServiceServicer):
 
+    def __init__(self, pool, write_window_ms=WRITE_WINDOW_MS, symbols=None):
+        self.pool = pool
+        self.symbols = symbols if symbols is not None else SymbolIndex()
+        self.nodes = NodeCache(NODE_CACHE_SIZE)
+        pool.add_reconnect_listener(self.nodes.invalidate)
+        self.writes = None
+        if write_window_ms > 0:
+            self.writes = WriteCoalescer(pool, self.nodes, write_window_ms / 1000)
+
     def ReadVariable(self, request, context):
-#       client = Client(OPC_UA_ENDPOINT)
-#        client.set_security_string("None")
-#        try:
-#            client.connect(timeout=TIMEOUT)
-#            node = client.get_node(request.node_id)
-#            value = node.get_value()
-#            print(f"[READ] {request.node_id} = {value}")
-#        except Exception as e:
-#            print(f"[ERROR] ReadVariable: {e}")
-#            value = "ERROR"
-#        finally:
-#         client.disconnect()
-#        return cnc_pb2.ReadResponse(value=str(value))
-        return cnc_pb2.ReadResponse(value=str("Hello"))
+        try:
+            with self.pool.session() as client, stage("opcua"):
+                entry = self.nodes.resolve(client, self.symbols.node_id(request.node_id))
+                value = client.get_node(entry.nodeid).get_value()
+            print(f"[READ] {request.node_id} = {value}")
+        except Exception as e:
+            print(f"[ERROR] ReadVariable: {e}")
+            value = "ERROR"
+        return cnc_pb2.ReadResponse(value=str(value))
 
     def WriteVariable(self, request, context):
-        client = Client(OPC_UA_ENDPOINT)
-        client.set_security_string("None")
+        in_flight = False
         try:
-            client.connect(timeout=TIMEOUT)
-            node = client.get_node(request.node_id)
-            node.set_value(request.value)
-            print(f"[WRITE] {request.node_id} = {request.value}")
-            success = True
+            node_id = self.symbols.node_id(request.node_id)
+            if self.writes is not None:
+                # Étapes "write_queue" et "opcua" comptées par le coalesceur
+                future = self.writes.submit(node_id, request.value)
+                try:
+                    success = future.result(TIMEOUT)
+                except futures.TimeoutError:
+                    # Annulée, la valeur ne part pas, sinon le lot est déjà en cours d'envoi
+                    in_flight = not future.cancel()
+                    raise TimeoutError(f"{request.node_id} not written after {TIMEOUT}s") from None
+            else:
+                with self.pool.session() as client, stage("opcua"):
+                    entry = self.nodes.resolve(client, node_id)
+                    value = convert_value(request.value, entry.variant_type)
+                    client.get_node(entry.nodeid).set_value(value, entry.variant_type)
+                success = True
+            if success:
+                print(f"[WRITE] {request.node_id} = {request.value}")
+            else:
+                print(f"[ERROR] WriteVariable: {request.node_id} = {request.value} rejected")
         except Exception as e:
             print(f"[ERROR] WriteVariable: {e}")
             success = False
-        finally:
-            client.disconnect()
+        if in_flight:
+            context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, f"Write of {request.node_id} still in flight")
         return cnc_pb2.WriteResponse(success=success)
 
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    cnc_pb2_grpc.add_CNCServiceServicer_to_server(CNCServiceServicer(), server)
-    server.add_insecure_port('[::]:50051')
+    def ReadVariables(self, request, context):
+        node_ids = list(request.node_ids)
+        try:
+            with self.pool.session() as client, stage("opcua"):
+                entries = self.nodes.resolve_many(client, [self.symbols.node_id(name) for name in node_ids])
+                known = [entry.nodeid for entry in entries if entry is not None]
+                results = read_attributes(client, known) if known else []
+        except Exception as e:
+            print(f"[ERROR] ReadVariables: {e}")
+            context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        results = iter(results)
+        values = [variable_value(node_id, next(results) if entry is not None else None)
+                  for node_id, entry in zip(node_ids, entries)]
+        return cnc_pb2.VariableValues(values=values)
+
+    def Subscribe(self, request, context):
+        node_ids = list(request.node_ids)
+        interval = request.publishing_interval_ms or PUBLISHING_INTERVAL_MS
+        stream = SubscriptionStream(self.pool)
+        failed = []
+        names = {}
+        nodes = []
+        try:
+            with self.pool.session() as client, stage("opcua"):
+                entries = self.nodes.resolve_many(client, [self.symbols.node_id(name) for name in node_ids])
+                for node_id, entry in zip(node_ids, entries):
+                    if entry is None:
+                        failed.append(variable_value(node_id, None))
+                    else:
+                        names[entry.nodeid] = node_id
+                        nodes.append(client.get_node(entry.nodeid))
+                if nodes:
+                    handles = stream.open(client, nodes, interval, request.deadband)
+        except Exception as e:
+            print(f"[ERROR] Subscribe: {e}")
+            stream.close()
+            context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        if not nodes:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "No valid node to subscribe to")
+
+        # A cancelled stream is not resumed, the subscription is released from the RPC callback
+        context.add_callback(stream.close)
+        for node, handle in zip(nodes, handles):
+            if isinstance(handle, ua.StatusCode):
+                failed.append(cnc_pb2.VariableValue(node_id=names[node.nodeid], status_code=handle.value))
+        print(f"[SUBSCRIBE] {len(nodes)} nodes every {interval} ms")
+        try:
+            if failed:
+                yield cnc_pb2.VariableValues(values=failed)
+            for batch in stream.batches():
+                values = [variable_value(names[nodeid], data_value) for nodeid, data_value in batch.items()]
+                yield cnc_pb2.VariableValues(values=values)
+            if stream.lost:
+                context.abort(grpc.StatusCode.UNAVAILABLE, "OPC UA session lost")
+        finally:
+            stream.close()
+
+    def Resolve(self, request, context):
+        if not len(self.symbols):
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION, NO_SNAPSHOT)
+        response = resolve_response(self.symbols, request.pattern, request.max_results)
+        print(f"[RESOLVE] {request.pattern}: {len(response.nodes)} nodes")
+        return response
+
+def serve(write_window_ms=WRITE_WINDOW_MS, symbols=None, max_workers=MAX_WORKERS, endpoint=OPC_UA_ENDPOINT,
+          port=PORT):
+    pool = OPCUASessionPool(endpoint, max_size=POOL_SIZE, timeout=TIMEOUT)
+    servicer = CNCServiceServicer(pool, write_window_ms, symbols)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers),
+                         interceptors=[TracingInterceptor("cnc", max_workers=max_workers)])
+    cnc_pb2_grpc.add_CNCServiceServicer_to_server(servicer, server)
+    server.add_insecure_port(f'[::]:{port}')
     server.start()
-    print("gRPC server started on port 50051")
+    print(f"gRPC server started on port {port}, OPC UA server {endpoint}")
     try:
         while True:
             time.sleep(60*60*24)
     except KeyboardInterrupt:
         print("Stopping server...")
         server.stop(0)
+        if servicer.writes is not None:
+            servicer.writes.close()
+        pool.close()
 
-if __name__ == "__main__":
-    serve()
+def main():
+    parser = argparse.ArgumentParser(description="gRPC gateway to the OPC UA server of the CNC")
+    parser.add_argument("--endpoint", default=OPC_UA_ENDPOINT,
+                        help="OPC UA server of the CNC, ex: opc.tcp://127.0.0.1:4840 for plant_server.py")
+    parser.add_argument("--port", type=int, default=PORT, help="gRPC port")
+    parser.add_argument("--engine", choices=("threaded", "async"), default="threaded",
+                        help="threaded: thread pool + opcua, async: grpc.aio + asyncua on one event loop")
+    parser.add_argument("--write-window-ms", type=float, default=WRITE_WINDOW_MS,
+                        help="window during which writes are coalesced into one Write call, 0 to disable")
+    parser.add_argument("--snapshot", default=None,
+                        help="address space CSV written by GRPC/browse_nodes.py, enables symbolic names and Resolve")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="HTTP port of the Prometheus metrics (RPC latency, in-flight RPCs, "
+                             "queue wait, OPC UA time), 0 to disable")
+    parser.add_argument("--max-workers", type=int, default=MAX_WORKERS,
+                        help="gRPC worker threads of the threaded engine")
+    args = parser.parse_args()
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    symbols = SymbolIndex()
+    if args.snapshot:
+        symbols = SymbolIndex.from_snapshot(args.snapshot)
+        print(f"{len(symbols)} symbolic names loaded from {args.snapshot}")
+    if args.engine == "async":
+        from server_grpc_aio import serve_async
+        try:
+            asyncio.run(serve_async(args.endpoint, args.port, POOL_SIZE, TIMEOUT, NODE_CACHE_SIZE,
+                                    PUBLISHING_INTERVAL_MS, args.write_window_ms, symbols))
+        except KeyboardInterrupt:
+            print("Stopping server...")
+    else:
+        serve(args.write_window_ms, symbols, args.max_workers, args.endpoint, args.port)
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+# server_grpc_aio.py
+import asyncio
+import contextvars
+import time
+import grpc
+import cnc_pb2
+import cnc_pb2_grpc
+from asyncua import ua
+from asyncua.common.ua_utils import data_type_to_variant_type
+import shared_path  # noqa: F401, rend grpc_metrics importable
+from grpc_metrics import AioTracingInterceptor, current_call, stage
+from node_cache import NodeCache, NodeCacheEntry, convert_value
+from opcua_pool_aio import AsyncSessionPool
+from opcua_services import NO_SNAPSHOT, read_parameters, resolve_response, variable_value, write_parameters
+from symbol_index import SymbolIndex
+from write_coalescer import plan_batch, record_stages
+
+
+async def read_attributes(client, nodeids, attribute_id=ua.AttributeIds.Value):
+    """
+    asyncio version of opcua_services.read_attributes
+    """
+    return await client.uaclient.read(read_parameters(nodeids, attribute_id, ua))
+
+
+async def write_values(client, values):
+    """
+    asyncio version of opcua_services.write_values
+    """
+    return await client.uaclient.write(write_parameters(values, ua))
+
+
+async def resolve_many(cache, client, node_ids):
+    """
+    asyncio version of NodeCache.resolve_many
+    :return: List of NodeCacheEntry, None where the NodeId string is invalid
+    """
+    entries, missing = cache.parse_misses(node_ids, ua)
+    if missing:
+        results = await read_attributes(client, [nodeid for _, nodeid in missing], ua.AttributeIds.DataType)
+        for node_id, nodeid, data_type in cache.store_data_types(entries, missing, results, ua):
+            variant_type = await data_type_to_variant_type(client.get_node(data_type))
+            entries[node_id] = cache.put(node_id, NodeCacheEntry(nodeid, variant_type))
+    return [entries.get(node_id) for node_id in node_ids]
+
+
+class AsyncWriteCoalescer:
+    """
+    asyncio version of WriteCoalescer
+    """
+    def __init__(self, pool, nodes, window):
+        self.pool = pool
+        self.nodes = nodes
+        self.window = window
+        self._pending = {}
+        self._flush_task = None
+
+    def submit(self, node_id, text):
+        """
+        Queue a write
+        :return: asyncio.Future resolved to True if the value (or a later one) was written
+        """
+        future = asyncio.get_running_loop().create_future()
+        # L'appel gRPC en cours : la tâche d'envoi lui attribue ses étapes
+        self._pending.setdefault(node_id, []).append((text, future, current_call(), time.perf_counter()))
+        if self._flush_task is None:
+            # Contexte vide : la tâche sert tout le lot, pas l'appel qui l'a créée
+            self._flush_task = asyncio.create_task(self._flush_after_window(), context=contextvars.Context())
+        return future
+
+    async def close(self):
+        if self._flush_task is not None:
+            await self._flush_task
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.window)
+        batch, self._pending = self._pending, {}
+        self._flush_task = None
+        start = None
+        try:
+            async with self.pool.session() as client:
+                start = time.perf_counter()
+                entries = dict(zip(batch, await resolve_many(self.nodes, client, list(batch))))
+                writes, rejected = plan_batch(batch, entries, ua.LocalizedText)
+                variants = [(entry.nodeid, ua.Variant(value, entry.variant_type)) for entry, value, _ in writes]
+                statuses = await write_values(client, variants) if variants else []
+                opcua_seconds = time.perf_counter() - start
+        except Exception as e:
+            print(f"[ERROR] Write batch: {e}")
+            end = time.perf_counter()
+            record_stages(batch, start or end, end - (start or end))
+            for requests in batch.values():
+                for _, future, _, _ in requests:
+                    self._resolve(future, False)
+            return
+        record_stages(batch, start, opcua_seconds)
+        for future in rejected:
+            self._resolve(future, False)
+        for (_, _, covered), status in zip(writes, statuses):
+            for future in covered:
+                self._resolve(future, status.is_good())
+
+    @staticmethod
+    def _resolve(future, success):
+        # The caller may have been cancelled while the batch was in flight
+        if not future.done():
+            future.set_result(success)
+
+
+class AsyncSubscriptionStream:
+    """
+    asyncio version of SubscriptionStream
+    """
+    def __init__(self, pool):
+        self.pool = pool
+        self.updates = asyncio.Queue()
+        self.lost = False
+        self._client = None
+        self._subscription = None
+
+    async def open(self, client, nodes, interval, deadband):
+        """
+        Create the subscription and its monitored items with one service call
+        :return: List of monitored item handles, or ua.StatusCode for the failed nodes
+        """
+        self._client = client
+        self._subscription = await client.create_subscription(interval, self)
+        self.pool.add_reconnect_listener(self.on_reconnect)
+        if deadband > 0:
+            return await self._subscription.deadband_monitor(nodes, deadband)
+        return await self._subscription.subscribe_data_change(nodes)
+
+    def datachange_notification(self, node, val, data):
+        self.updates.put_nowait((node.nodeid, data.monitored_item.Value))
+
+    def on_reconnect(self, client):
+        if client is self._client:
+            self.lost = True
+            self.updates.put_nowait(None)
+
+    async def batches(self):
+        """
+        Yield {nodeid: DataValue} dicts keeping only the latest value of each
+        node received since the previous batch, until the stream is closed
+        """
+        while True:
+            item = await self.updates.get()
+            batch = {}
+            while item is not None:
+                batch[item[0]] = item[1]
+                try:
+                    item = self.updates.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+            if batch:
+                yield batch
+            if item is None:
+                return
+
+    async def close(self):
+        if self._subscription is None:
+            return
+        self.pool.remove_reconnect_listener(self.on_reconnect)
+        try:
+            await self._subscription.delete()
+        except Exception:
+            pass
+        self._subscription = None
+
+
+class AsyncCNCServiceServicer(cnc_pb2_grpc.CNCServiceServicer):
+    """
+    CNCService served from one event loop with grpc.aio and asyncua
+    """
+    def __init__(self, pool, node_cache_size, publishing_interval_ms, write_window_ms, symbols=None):
+        self.pool = pool
+        self.symbols = symbols if symbols is not None else SymbolIndex()
+        self.nodes = NodeCache(node_cache_size)
+        self.publishing_interval_ms = publishing_interval_ms
+        pool.add_reconnect_listener(self.nodes.invalidate)
+        self.writes = None
+        if write_window_ms > 0:
+            self.writes = AsyncWriteCoalescer(pool, self.nodes, write_window_ms / 1000)
+
+    async def ReadVariable(self, request, context):
+        try:
+            async with self.pool.session() as client:
+                with stage("opcua"):
+                    node_id = self.symbols.node_id(request.node_id)
+                    entry = (await resolve_many(self.nodes, client, [node_id]))[0]
+                    if entry is None:
+                        raise ValueError(f"Invalid NodeId: '{request.node_id}'")
+                    value = await client.get_node(entry.nodeid).read_value()
+            print(f"[READ] {request.node_id} = {value}")
+        except Exception as e:
+            print(f"[ERROR] ReadVariable: {e}")
+            value = "ERROR"
+        return cnc_pb2.ReadResponse(value=str(value))
+
+    async def WriteVariable(self, request, context):
+        try:
+            node_id = self.symbols.node_id(request.node_id)
+            if self.writes is not None:
+                # Étapes "write_queue" et "opcua" comptées par le coalesceur
+                success = await self.writes.submit(node_id, request.value)
+            else:
+                async with self.pool.session() as client:
+                    with stage("opcua"):
+                        entry = (await resolve_many(self.nodes, client, [node_id]))[0]
+                        if entry is None or entry.variant_type is None:
+                            raise ValueError(f"Unknown node: '{request.node_id}'")
+                        value = convert_value(request.value, entry.variant_type, ua.LocalizedText)
+                        data_value = ua.DataValue(ua.Variant(value, entry.variant_type))
+                        await client.get_node(entry.nodeid).write_value(data_value)
+                success = True
+            if success:
+                print(f"[WRITE] {request.node_id} = {request.value}")
+            else:
+                print(f"[ERROR] WriteVariable: {request.node_id} = {request.value} rejected")
+        except Exception as e:
+            print(f"[ERROR] WriteVariable: {e}")
+            success = False
+        return cnc_pb2.WriteResponse(success=success)
+
+    async def ReadVariables(self, request, context):
+        node_ids = list(request.node_ids)
+        try:
+            async with self.pool.session() as client:
+                with stage("opcua"):
+                    entries = await resolve_many(self.nodes, client, [self.symbols.node_id(name) for name in node_ids])
+                    known = [entry.nodeid for entry in entries if entry is not None]
+                    results = await read_attributes(client, known) if known else []
+        except Exception as e:
+            print(f"[ERROR] ReadVariables: {e}")
+            await context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        results = iter(results)
+        values = [variable_value(node_id, next(results) if entry is not None else None)
+                  for node_id, entry in zip(node_ids, entries)]
+        return cnc_pb2.VariableValues(values=values)
+
+    async def Subscribe(self, request, context):
+        node_ids = list(request.node_ids)
+        interval = request.publishing_interval_ms or self.publishing_interval_ms
+        stream = AsyncSubscriptionStream(self.pool)
+        failed = []
+        names = {}
+        nodes = []
+        try:
+            async with self.pool.session() as client:
+                with stage("opcua"):
+                    entries = await resolve_many(self.nodes, client, [self.symbols.node_id(name) for name in node_ids])
+                    for node_id, entry in zip(node_ids, entries):
+                        if entry is None:
+                            failed.append(variable_value(node_id, None))
+                        else:
+                            names[entry.nodeid] = node_id
+                            nodes.append(client.get_node(entry.nodeid))
+                    if nodes:
+                        handles = await stream.open(client, nodes, interval, request.deadband)
+        except Exception as e:
+            print(f"[ERROR] Subscribe: {e}")
+            await stream.close()
+            await context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        if not nodes:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "No valid node to subscribe to")
+
+        for node, handle in zip(nodes, handles):
+            if isinstance(handle, ua.StatusCode):
+                failed.append(cnc_pb2.VariableValue(node_id=names[node.nodeid], status_code=handle.value))
+        print(f"[SUBSCRIBE] {len(nodes)} nodes every {interval} ms")
+        try:
+            if failed:
+                yield cnc_pb2.VariableValues(values=failed)
+            async for batch in stream.batches():
+                values = [variable_value(names[nodeid], data_value) for nodeid, data_value in batch.items()]
+                yield cnc_pb2.VariableValues(values=values)
+            if stream.lost:
+                await context.abort(grpc.StatusCode.UNAVAILABLE, "OPC UA session lost")
+        finally:
+            await stream.close()
+
+    async def Resolve(self, request, context):
+        if not len(self.symbols):
+            await context.abort(grpc.StatusCode.FAILED_PRECONDITION, NO_SNAPSHOT)
+        response = resolve_response(self.symbols, request.pattern, request.max_results)
+        print(f"[RESOLVE] {request.pattern}: {len(response.nodes)} nodes")
+        return response
+
+
+async def serve_async(endpoint, port, pool_size, timeout, node_cache_size, publishing_interval_ms,
+                      write_window_ms, symbols=None):
+    pool = AsyncSessionPool(endpoint, max_size=pool_size, timeout=timeout)
+    server = grpc.aio.server(interceptors=[AioTracingInterceptor("cnc")])
+    servicer = AsyncCNCServiceServicer(pool, node_cache_size, publishing_interval_ms, write_window_ms, symbols)
+    cnc_pb2_grpc.add_CNCServiceServicer_to_server(servicer, server)
+    server.add_insecure_port(f'[::]:{port}')
+    await server.start()
+    print(f"gRPC asyncio server started on port {port}, OPC UA server {endpoint}")
+    try:
+        await server.wait_for_termination()
+    finally:
+        await server.stop(0)
+        if servicer.writes is not None:
+            await servicer.writes.close()
+        await pool.close()
@@ -0,0 +1,9 @@
+# shared_path.py
+# grpc_metrics.py et kinematics.py vivent dans GRPC/ et servent aux deux dossiers : importer ce module avant eux
+import os
+import sys
+
+GRPC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "GRPC")
+if GRPC_DIR not in sys.path:
+    # En fin de chemin : les modules de OPC-UA/ (cnc_pb2, ...) passent avant ceux de GRPC/
+    sys.path.append(GRPC_DIR)
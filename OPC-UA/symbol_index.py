@@ -0,0 +1,152 @@
+# symbol_index.py
+import csv
+from fnmatch import fnmatchcase
+
+GLOB_CHARS = frozenset("*?[")
+
+
+class SymbolEntry:
+    """
+    Node reachable by a symbolic path
+    """
+    def __init__(self, path, node_id, node_class="", data_type=""):
+        self.path = path
+        self.node_id = node_id
+        self.node_class = node_class
+        self.data_type = data_type
+
+
+class _TrieNode:
+    __slots__ = ("children", "entry")
+
+    def __init__(self):
+        self.children = {}
+        self.entry = None
+
+
+def split_path(name):
+    """
+    Split a symbolic path in segments, on '/' if it has one (names containing dots), on '.' otherwise
+    """
+    separator = "/" if "/" in name else "."
+    return [segment for segment in name.split(separator) if segment]
+
+
+class SymbolIndex:
+    """
+    Trie of the browsed address space. A node is reachable by the path of its
+    display names ("Axis1.Position") or of its browse names ("2:Axis1/2:Position"),
+    starting below the root of the snapshot. Exact lookups cost one dict access
+    per segment, glob patterns only walk the branches their segments match.
+    """
+    def __init__(self):
+        self._root = _TrieNode()
+        self._size = 0
+
+    @classmethod
+    def from_snapshot(cls, path):
+        """
+        Build the index from a CSV snapshot written by GRPC/browse_nodes.py
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = {row["node_id"]: row for row in csv.DictReader(f)}
+        index = cls()
+        paths = {}
+        for node_id in rows:
+            # Chemin du parent d'abord, les lignes ne sont pas forcément dans l'ordre
+            chain = []
+            current = node_id
+            while current in rows and current not in paths:
+                chain.append(current)
+                current = rows[current]["parent"]
+            names, browse_names = paths.get(current, ((), ()))
+            for current in reversed(chain):
+                row = rows[current]
+                if row["parent"] in rows:
+                    names = names + (row["name"],)
+                    browse_names = browse_names + (row["browse_name"],)
+                    index.add(names, browse_names, row["node_id"], row["node_class"], row["data_type"])
+                else:
+                    names, browse_names = (), ()  # Racine du snapshot
+                paths[current] = (names, browse_names)
+        return index
+
+    def add(self, names, browse_names, node_id, node_class="", data_type=""):
+        """
+        Index a node under both its display name path and its browse name path
+        :param names: Display names from the root, ex: ("Axis1", "Position")
+        :param browse_names: Browse names from the root, ex: ("2:Axis1", "2:Position")
+        :return: The SymbolEntry, None if another node already has this path
+        """
+        separator = "/" if any("." in name for name in names) else "."
+        entry = SymbolEntry(separator.join(names), node_id, node_class, data_type)
+        added = False
+        for segments in (names, browse_names):
+            trie = self._root
+            for segment in segments:
+                child = trie.children.get(segment)
+                if child is None:
+                    child = trie.children[segment] = _TrieNode()
+                trie = child
+            if trie.entry is None:
+                trie.entry = entry
+                added = True
+        if not added:
+            return None
+        self._size += 1
+        return entry
+
+    def lookup(self, name):
+        """
+        :param name: Exact symbolic path
+        :return: SymbolEntry or None
+        """
+        trie = self._root
+        for segment in split_path(name):
+            trie = trie.children.get(segment)
+            if trie is None:
+                return None
+        return trie.entry
+
+    def node_id(self, name):
+        """
+        NodeId string of a symbolic path, the name itself if it is not one (already a NodeId)
+        """
+        entry = self.lookup(name)
+        return entry.node_id if entry is not None else name
+
+    def resolve(self, pattern, limit=0):
+        """
+        Find the nodes matching a glob pattern, '*', '?' and '[]' match inside a
+        segment and a '**' segment matches any number of segments
+        :param pattern: ex: "Axis*.Position", "**.Position"
+        :param limit: Maximum number of results, 0 for no limit
+        :return: List of SymbolEntry
+        """
+        results = {}
+        self._match(self._root, split_path(pattern), 0, results, limit)
+        return list(results.values())
+
+    def _match(self, trie, segments, i, results, limit):
+        if limit and len(results) >= limit:
+            return
+        if i == len(segments):
+            if trie.entry is not None:
+                results.setdefault(trie.entry.node_id, trie.entry)
+            return
+        segment = segments[i]
+        if segment == "**":
+            self._match(trie, segments, i + 1, results, limit)
+            for child in dict.fromkeys(trie.children.values()):
+                self._match(child, segments, i, results, limit)
+        elif GLOB_CHARS.isdisjoint(segment):
+            child = trie.children.get(segment)
+            if child is not None:
+                self._match(child, segments, i + 1, results, limit)
+        else:
+            matched = dict.fromkeys(child for key, child in trie.children.items() if fnmatchcase(key, segment))
+            for child in matched:
+                self._match(child, segments, i + 1, results, limit)
+
+    def __len__(self):
+        return self._size
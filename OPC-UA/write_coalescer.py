@@ -0,0 +1,168 @@
+# write_coalescer.py
+import threading
+import time
+from concurrent import futures
+from opcua import ua
+import shared_path  # noqa: F401, rend grpc_metrics importable
+from grpc_metrics import add_stage, current_call
+from node_cache import convert_value
+from opcua_services import write_values
+
+
+def plan_batch(pending, entries, localized_text=ua.LocalizedText):
+    """
+    Pick the value written for each node of a batch, the last valid value wins.
+    Writes whose caller gave up (cancelled future) are left out.
+    :param pending: {node_id: [(text, future, call, queued), ...]} in arrival order
+    :param entries: {node_id: NodeCacheEntry or None}
+    :param localized_text: LocalizedText class of the OPC UA library writing the batch
+    :return: ([(entry, value, [futures covered by the write])], [rejected futures])
+    """
+    writes = []
+    rejected = []
+    for node_id, requests in pending.items():
+        requests = [request for request in requests if not request[1].cancelled()]
+        if not requests:
+            continue
+        entry = entries.get(node_id)
+        if entry is None or entry.variant_type is None:
+            rejected.extend(future for _, future, _, _ in requests)
+            continue
+        covered = []
+        value = None
+        for text, future, _, _ in reversed(requests):
+            try:
+                converted = convert_value(text, entry.variant_type, localized_text)
+            except ValueError:
+                rejected.append(future)
+                continue
+            if not covered:
+                value = converted
+            covered.append(future)
+        if covered:
+            writes.append((entry, value, covered))
+    return writes, rejected
+
+
+def claim_batch(batch):
+    """
+    Keep the writes of a batch whose caller is still waiting. A claimed future
+    can no longer be cancelled, so a caller that times out afterwards knows its
+    value is on its way.
+    :param batch: {node_id: [(text, concurrent.futures.Future, call, queued), ...]}
+    :return: The batch without the cancelled writes and the nodes left empty
+    """
+    claimed = {}
+    for node_id, requests in batch.items():
+        requests = [request for request in requests if request[1].set_running_or_notify_cancel()]
+        if requests:
+            claimed[node_id] = requests
+    return claimed
+
+
+def record_stages(batch, start, opcua_seconds):
+    """
+    Add to the RPC of each write of a batch its wait for the batch and its
+    session, stage "write_queue", and the OPC UA calls of the batch, stage "opcua"
+    :param start: time.perf_counter() when the OPC UA calls started
+    :param opcua_seconds: Seconds spent resolving and writing the batch
+    """
+    for requests in batch.values():
+        for _, _, call, queued in requests:
+            add_stage("write_queue", start - queued, call)
+            add_stage("opcua", opcua_seconds, call)
+
+
+class WriteCoalescer:
+    """
+    Collect the WriteVariable calls received during a short window and flush
+    them as one OPC UA Write service call. Writes to the same node inside a
+    window are coalesced, only the last value reaches the PLC and every caller
+    gets the status of that write.
+    """
+    def __init__(self, pool, nodes, window):
+        """
+        :param pool: OPCUASessionPool used for the flushes
+        :param nodes: NodeCache resolving the NodeIds and their variant types
+        :param window: Coalescing window, in seconds
+        """
+        self.pool = pool
+        self.nodes = nodes
+        self.window = window
+        self._pending = {}
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, node_id, text):
+        """
+        Queue a write
+        :param node_id: NodeId string
+        :param text: Value as received from gRPC
+        :return: concurrent.futures.Future resolved to True if the value (or a later one) was written.
+            Cancelling it before its batch is sent drops the value.
+        """
+        future = futures.Future()
+        with self._cond:
+            if self._closed:
+                raise ConnectionError("Write coalescer is closed")
+            # L'appel gRPC en cours : le thread d'envoi lui attribue ses étapes
+            self._pending.setdefault(node_id, []).append((text, future, current_call(), time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def close(self):
+        """
+        Flush the pending writes and stop the flush thread
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+            # Let the writes of the window pile up before taking the batch
+            time.sleep(self.window)
+            with self._cond:
+                batch, self._pending = self._pending, {}
+            self._flush(batch)
+
+    def _flush(self, batch):
+        start = None
+        claimed = False
+        try:
+            with self.pool.session() as client:
+                # Les appels expirés pendant l'attente de la session sont abandonnés, pas écrits en retard
+                batch, claimed = claim_batch(batch), True
+                if not batch:
+                    return
+                start = time.perf_counter()
+                entries = dict(zip(batch, self.nodes.resolve_many(client, list(batch))))
+                writes, rejected = plan_batch(batch, entries)
+                variants = [(entry.nodeid, ua.Variant(value, entry.variant_type)) for entry, value, _ in writes]
+                statuses = write_values(client, variants) if variants else []
+                opcua_seconds = time.perf_counter() - start
+        except Exception as e:
+            print(f"[ERROR] Write batch: {e}")
+            if not claimed:
+                batch = claim_batch(batch)
+            end = time.perf_counter()
+            record_stages(batch, start or end, end - (start or end))
+            for requests in batch.values():
+                for _, future, _, _ in requests:
+                    future.set_result(False)
+            return
+        # Avant de réveiller les appelants : leurs étapes sont comptées quand leur RPC se termine
+        record_stages(batch, start, opcua_seconds)
+        for future in rejected:
+            future.set_result(False)
+        for (_, _, covered), status in zip(writes, statuses):
+            for future in covered:
+                future.set_result(status.is_good())
@@ -1,20 +1,211 @@
+import argparse
 import asyncio
-import json
+import numpy as np
 import websockets
 
-positions = {f"part_{i}": [0.0, 0.0, 0.0] for i in range(1, 7)}
+from pose_codec import BINARY_PROTOCOL, JSON_PROTOCOL, PART_INDEX, PART_NAMES, PROTOCOLS, encode_poses, frame_encoder
+from trajectory import LINEAR, PROFILES, MAX_ACCELERATION, MAX_VELOCITY, MotionLimits, Ticker, interpolate
+
+DEFAULT_URI = "ws://localhost:8767"
+SCRIPT_RATE = 30.0  # trames par seconde en mode script
+
+# Une commande compilée : index de la pièce, incrément ou position absolue, valeurs x y z
+COMMAND_DTYPE = np.dtype([("part", np.uint8), ("relative", np.bool_), ("value", np.float64, 3)])
+
+# Pose d'origine, positions garde la pose cumulée de chaque pièce depuis le départ
+HOME = {name: [0.0, 0.0, 0.0] for name in PART_NAMES}
+positions = {name: list(pose) for name, pose in HOME.items()}
 command_buffer = []
 
-async def send_command(uri):
+
+def parse_command(raw_cmd):
+    """
+    Parse one 'name x y z' (absolute) or 'name+= dx dy dz' (relative) command
+    :return: (name, [x, y, z], relative)
+    :raise ValueError: If the command is malformed or names an unknown part
+    """
+    parts = raw_cmd.split()
+    if len(parts) != 4:
+        raise ValueError(f"Format invalide pour la commande : '{raw_cmd}'")
+    name = parts[0]
+    relative = name.endswith("+=")
+    if relative:
+        name = name[:-2]
+    if name not in PART_INDEX:
+        raise ValueError(f"Pièce inconnue : '{name}'")
+    try:
+        values = [float(parts[1]), float(parts[2]), float(parts[3])]
+    except ValueError:
+        raise ValueError(f"Coordonnées invalides dans la commande : '{raw_cmd}'") from None
+    return name, values, relative
+
+
+def compile_script(text):
+    """
+    Parse and validate a whole program (ex: protocol.txt) once. Commands are
+    separated by commas or new lines, '#' starts a comment.
+    :return: np.ndarray of COMMAND_DTYPE
+    :raise ValueError: On the first invalid command, with its line number
+    """
+    commands = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = line.split("#", 1)[0]
+        for raw_cmd in filter(None, (cmd.strip() for cmd in line.split(","))):
+            try:
+                name, values, relative = parse_command(raw_cmd)
+            except ValueError as e:
+                raise ValueError(f"Ligne {line_number} : {e}") from None
+            commands.append((PART_INDEX[name], relative, values))
+    return np.array(commands, dtype=COMMAND_DTYPE)
+
+
+def plan_frames(commands, start):
+    """
+    Compute the absolute pose of every part touched by each frame. Consecutive
+    commands on different parts share a frame, a part already in the frame
+    starts the next one so no intermediate pose is lost.
+    :param commands: np.ndarray of COMMAND_DTYPE
+    :param start: {name: [x, y, z]} poses before the program
+    :return: (list of {name: [x, y, z]}, {name: [x, y, z]} poses after the program)
+    """
+    pose = np.array([start[name] for name in PART_NAMES], dtype=np.float64)
+    frames = []
+    frame = {}
+    for part, relative, value in commands:
+        name = PART_NAMES[part]
+        if name in frame:
+            frames.append(frame)
+            frame = {}
+        pose[part] = pose[part] + value if relative else value
+        frame[name] = pose[part].tolist()
+    if frame:
+        frames.append(frame)
+    return frames, {name: pose[i].tolist() for i, name in enumerate(PART_NAMES)}
+
+
+def plan_waypoints(commands, start):
+    """
+    Full poses reached after each frame of the program, for the interpolation stage
+    :param commands: np.ndarray of COMMAND_DTYPE
+    :param start: {name: [x, y, z]} poses before the program
+    :return: Array of shape (frames + 1, parts, 3), the first pose is the start one
+    """
+    frames, _ = plan_frames(commands, start)
+    pose = {name: list(start.get(name, HOME[name])) for name in PART_NAMES}
+    waypoints = [[pose[name] for name in PART_NAMES]]
+    for frame in frames:
+        pose.update(frame)
+        waypoints.append([pose[name] for name in PART_NAMES])
+    return np.array(waypoints, dtype=np.float64)
+
+
+def pose_frames(poses):
+    """
+    :param poses: Array of shape (frames, parts, 3) in the order of PART_NAMES
+    :return: List of {name: [x, y, z]} with every part
+    """
+    return [dict(zip(PART_NAMES, pose)) for pose in poses.tolist()]
+
+
+def pose_messages(poses, protocol):
+    """
+    Messages of full poses in the format negotiated with the relay
+    :param poses: Array of shape (frames, parts, 3) in the order of PART_NAMES
+    :param protocol: Subprotocol of the connection
+    """
+    if protocol == BINARY_PROTOCOL:
+        return encode_poses(poses)
+    encode = frame_encoder(protocol)
+    return [encode(frame) for frame in pose_frames(poses)]
+
+
+def home_frames(current, duration=0.0, rate=SCRIPT_RATE):
+    """
+    Frames bringing every part from its current pose back to HOME, whatever the
+    length of the command history
+    :param current: {name: [x, y, z]} current poses
+    :param duration: Duration of the return in seconds, 0 for a single frame
+    :param rate: Frames per second of the timed return
+    :return: List of {name: [x, y, z]}, the last one is the home pose
+    """
+    names = list(current)
+    start = np.array([current[name] for name in names], dtype=np.float64)
+    end = np.array([HOME.get(name, [0.0, 0.0, 0.0]) for name in names], dtype=np.float64)
+    steps = max(1, round(duration * rate))
+    # Interpolation linéaire de toutes les pièces d'un coup : (steps, pièces, 3)
+    fractions = np.arange(1, steps + 1, dtype=np.float64)[:, None, None] / steps
+    poses = start + (end - start) * fractions
+    return [dict(zip(names, pose.tolist())) for pose in poses]
+
+
+async def _discard_incoming(websocket):
     try:
-        async with websockets.connect(uri) as websocket:
+        async for _ in websocket:
+            pass
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
+async def send_frames(websocket, messages, rate=SCRIPT_RATE, skip_late=False):
+    """
+    Send frame messages on absolute monotonic deadlines, the send time does not accumulate
+    :param skip_late: Drop the frames whose tick is already past (interpolated
+        streams), instead of sending them back to back (discrete moves)
+    :return: (elapsed time in seconds, number of skipped frames)
+    """
+    ticker = Ticker(rate, skip_late)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    async for i in ticker.schedule(len(messages)):
+        await websocket.send(messages[i])
+    return loop.time() - start, ticker.skipped
+
+
+async def play_script(uri, commands, rate=SCRIPT_RATE, limits=None, protocols=PROTOCOLS):
+    """
+    Play a compiled program at a fixed frame rate, one message per frame
+    :param commands: np.ndarray of COMMAND_DTYPE from compile_script
+    :param limits: MotionLimits to interpolate between the commands, None to jump to each target
+    :param protocols: Frame formats offered to the relay, by order of preference
+    """
+    if limits is None:
+        frames, final = plan_frames(commands, positions)
+    else:
+        poses = interpolate(plan_waypoints(commands, positions), rate, limits)
+        final = pose_frames(poses[-1:])[0] if len(poses) else dict(positions)
+
+    async with websockets.connect(uri, subprotocols=list(protocols)) as websocket:
+        if limits is None:
+            encode = frame_encoder(websocket.subprotocol)
+            messages = [encode(frame) for frame in frames]
+        else:
+            messages = pose_messages(poses, websocket.subprotocol)
+        print(f"{len(commands)} commandes compilées en {len(messages)} trames "
+              f"({rate:g} trames/s, {websocket.subprotocol or 'json'})")
+        # Le relais renvoie aussi les trames à l'émetteur : sans lecture la
+        # file de réception se remplit et la fermeture attend son délai
+        drain = asyncio.create_task(_discard_incoming(websocket))
+        elapsed, skipped = await send_frames(websocket, messages, rate, skip_late=limits is not None)
+        drain.cancel()
+    positions.update(final)
+    print(f"Programme joué en {elapsed:.2f} s" + (f" ({skipped} trames en retard sautées)" if skipped else ""))
+
+async def send_command(uri, rate=SCRIPT_RATE, limits=None, protocols=PROTOCOLS):
+    """
+    Interactive mode, with limits each command is streamed as an interpolated move
+    """
+    try:
+        async with websockets.connect(uri, subprotocols=list(protocols)) as websocket:
             print("Connecté au serveur WebSocket.")
+            encode = frame_encoder(websocket.subprotocol)
+            drain = asyncio.create_task(_discard_incoming(websocket))
             while True:
                 line = input("Attente d'une commande... : ").strip()
                 if not line:
                     continue
                 if line.lower() in ('exit', 'quit', 'q'):
                     print("Fermeture du client...")
+                    drain.cancel()
                     break
 
                 raw_commands = [cmd.strip() for cmd in line.split(",") if cmd.strip()]
@@ -29,50 +220,30 @@ async def send_command(uri):
                                 print(f"  {idx}. {cmd}")
                         continue
 
-                    if raw_cmd.lower() == "reset":
+                    words = raw_cmd.split()
+                    if words[0].lower() == "reset":
+                        # reset : retour immédiat, reset <secondes> : retour interpolé
+                        try:
+                            duration = float(words[1]) if len(words) == 2 else 0.0
+                        except ValueError:
+                            print(f"Durée invalide : '{raw_cmd}'")
+                            continue
                         print("Reset en cours...")
-                        total_cmds = len(command_buffer)
-                        for idx, cmd in enumerate(command_buffer, start=1):
-                            parts = cmd.split()
-                            if len(parts) != 4:
-                                print(f"Commande dans le buffer mal formatée, ignorée : '{cmd}'")
-                                continue
-                            name = parts[0]
-                            try:
-                                values = [float(parts[1]), float(parts[2]), float(parts[3])]
-                            except ValueError:
-                                print(f"Coordonnées invalides dans la commande buffer, ignorée : '{cmd}'")
-                                continue
-                            inverse_values = [-v for v in values]
-                            message = json.dumps({"name": name, "location": inverse_values})
-                            await websocket.send(message)
-                            print(f"[{idx}/{total_cmds}] Commande inverse envoyée : {message}")
-                            await asyncio.sleep(1)
+                        frames = home_frames(positions, duration)
+                        await send_frames(websocket, [encode(frame) for frame in frames], rate)
+                        positions.update({name: list(pose) for name, pose in frames[-1].items()})
+                        print(f"Retour à l'origine en {len(frames)} trame(s)")
                         command_buffer.clear()
                         continue
-                    
-                    command_buffer.insert(0, raw_cmd)
 
                     # Parse et envoi au serveur
-                    parts = raw_cmd.split()
-                    if len(parts) != 4:
-                        print(f"Format invalide pour la commande : '{raw_cmd}'")
-                        continue
-
-                    name = parts[0]
-                    is_increment = False
-                    if name.endswith("+="):
-                        is_increment = True
-                        name = name[:-2]
-
                     try:
-                        values = [float(parts[1]), float(parts[2]), float(parts[3])]
-                    except ValueError:
-                        print(f"Coordonnées invalides dans la commande : '{raw_cmd}'")
+                        name, values, is_increment = parse_command(raw_cmd)
+                    except ValueError as e:
+                        print(e)
                         continue
 
-                    if name not in positions:
-                        positions[name] = [0.0, 0.0, 0.0]
+                    command_buffer.insert(0, raw_cmd)
 
                     old_pos = positions[name].copy()
 
@@ -81,11 +252,21 @@ async def send_command(uri):
                     else:
                         updated = values
 
+                    if limits is not None:
+                        start = np.array([positions[part] for part in PART_NAMES], dtype=np.float64)
+                        end = start.copy()
+                        end[PART_INDEX[name]] = updated
+                        messages = pose_messages(interpolate(np.stack([start, end]), rate, limits),
+                                                 websocket.subprotocol)
+                        elapsed, _ = await send_frames(websocket, messages, rate, skip_late=True)
+                        positions[name] = updated
+                        print(f"Mouvement envoyé : {name} -> {updated} en {elapsed:.2f} s")
+                        continue
+
                     positions[name] = updated
 
-                    message = json.dumps({"name": name, "location": updated})
-                    await websocket.send(message)
-                    print(f"Commande envoyée : {message}")
+                    await websocket.send(encode({name: updated}))
+                    print(f"Commande envoyée : {name} -> {updated}")
 
                     await asyncio.sleep(0.01)
 
@@ -95,10 +276,55 @@ async def send_command(uri):
         print(f"Erreur : {e}")
 
 async def main():
-    uri = "ws://localhost:8767"
+    parser = argparse.ArgumentParser(description="Client de commande des pièces via WebSocket")
+    parser.add_argument("--uri", default=DEFAULT_URI)
+    parser.add_argument("--script", help="Programme à jouer sans interaction (ex: protocol.txt)")
+    parser.add_argument("--rate", type=float, default=SCRIPT_RATE, help="Trames par seconde")
+    parser.add_argument("--format", choices=("binary", "json"), default="binary",
+                        help="Format des trames, binary retombe sur json si le relais ne le connaît pas")
+    parser.add_argument("--profile", choices=PROFILES,
+                        help="Interpole les mouvements avec ce profil de vitesse (sans : saut direct à la cible)")
+    parser.add_argument("--joint-profile", action="append", default=[], metavar="PART=PROFILE",
+                        help="Profil d'une pièce, ex: part_6=linear (répétable)")
+    parser.add_argument("--max-velocity", type=float, default=MAX_VELOCITY, help="Vitesse max en degrés/s")
+    parser.add_argument("--max-acceleration", type=float, default=MAX_ACCELERATION,
+                        help="Accélération max en degrés/s²")
+    args = parser.parse_args()
+    uri = args.uri
+
+    limits = None
+    if args.profile or args.joint_profile:
+        try:
+            profiles = {}
+            for item in args.joint_profile:
+                part, sep, profile = item.partition("=")
+                if not sep:
+                    raise ValueError(f"Profil de pièce invalide : '{item}'")
+                profiles[part] = profile
+            limits = MotionLimits(PART_NAMES, args.max_velocity, args.max_acceleration,
+                                  args.profile or LINEAR, profiles)
+        except ValueError as e:
+            print(f"Erreur : {e}")
+            return
+
+    protocols = PROTOCOLS if args.format == "binary" else (JSON_PROTOCOL,)
+
+    commands = None
+    if args.script:
+        # Programme validé entièrement avant la connexion
+        try:
+            with open(args.script, encoding="utf-8") as f:
+                commands = compile_script(f.read())
+        except (OSError, ValueError) as e:
+            print(f"Erreur : {e}")
+            return
+
     while True:
         try:
-            await send_command(uri)
+            if commands is not None:
+                await play_script(uri, commands, args.rate, limits, protocols)
+            else:
+                await send_command(uri, args.rate, limits, protocols)
             break
         except (ConnectionRefusedError, websockets.exceptions.InvalidURI) as e:
             print(f"Connexion refusée : {e}. Nouvelle tentative dans 5 secondes...")
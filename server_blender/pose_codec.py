@@ -0,0 +1,69 @@
+import json
+import numpy as np
+
+# Sous-protocoles WebSocket proposés par ordre de préférence, le relais choisit
+BINARY_PROTOCOL = "pose.v1.binary"
+JSON_PROTOCOL = "pose.v1.json"
+PROTOCOLS = (BINARY_PROTOCOL, JSON_PROTOCOL)
+
+PART_NAMES = [f"part_{i}" for i in range(1, 7)]
+PART_INDEX = {name: i for i, name in enumerate(PART_NAMES)}
+
+# Un enregistrement par pièce : index de la pièce puis x y z en float32
+# little-endian, 13 octets sans alignement, 78 octets pour les six pièces
+RECORD_DTYPE = np.dtype([("part", "u1"), ("location", "<f4", 3)])
+
+
+def encode_frame(frame):
+    """
+    Binary frame of the parts in a {name: [x, y, z]} frame
+    :raise KeyError: If a part is not in PART_NAMES
+    """
+    records = np.empty(len(frame), dtype=RECORD_DTYPE)
+    records["part"] = [PART_INDEX[name] for name in frame]
+    records["location"] = [location[:3] for location in frame.values()]
+    return records.tobytes()
+
+
+def encode_poses(poses):
+    """
+    Binary frames of full poses, all the frames encoded in one step
+    :param poses: Array of shape (frames, parts, 3) in the order of PART_NAMES
+    :return: List of bytes, one frame per pose
+    """
+    count, parts = poses.shape[:2]
+    records = np.empty((count, parts), dtype=RECORD_DTYPE)
+    records["part"] = np.arange(parts, dtype=np.uint8)
+    records["location"] = poses
+    size = parts * RECORD_DTYPE.itemsize
+    data = records.tobytes()
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def decode_frame(data):
+    """
+    :return: {name: [x, y, z]}
+    :raise ValueError: If the size is not a whole number of records or a part index is unknown
+    """
+    if len(data) % RECORD_DTYPE.itemsize:
+        raise ValueError(f"Binary frame of {len(data)} bytes is not made of {RECORD_DTYPE.itemsize} byte records")
+    records = np.frombuffer(data, dtype=RECORD_DTYPE)
+    if records.size and records["part"].max() >= len(PART_NAMES):
+        raise ValueError(f"Unknown part index {records['part'].max()}")
+    return {PART_NAMES[part]: location for part, location in zip(records["part"].tolist(),
+                                                                   records["location"].tolist())}
+
+
+def json_frame(frame):
+    """
+    Batched pose message understood by src/server.js and the viewer
+    """
+    return json.dumps({"frame": frame}, separators=(",", ":"))
+
+
+def frame_encoder(protocol):
+    """
+    :param protocol: Subprotocol chosen by the relay, None for a relay without negotiation
+    :return: Function turning a {name: [x, y, z]} frame into a message
+    """
+    return encode_frame if protocol == BINARY_PROTOCOL else json_frame
@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from http import HTTPStatus
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from pose_codec import BINARY_PROTOCOL, PROTOCOLS, decode_frame, encode_frame, json_frame
+
+DEFAULT_HOST = "localhost"
+DEFAULT_PORT = 8767
+METRICS_PATH = "/metrics"
+MAX_MESSAGES = 16  # messages hors pose (select) en attente par client
+WRITE_LIMIT = 4096  # octets en attente dans le transport avant de conflater
+
+
+def is_location(location):
+    return (isinstance(location, list) and len(location) in (3, 4)
+            and all(isinstance(n, (int, float)) and not isinstance(n, bool) for n in location))
+
+
+def now_us():
+    # Horloge murale des traces, partagée avec grpc_metrics.py et le viewer
+    return time.time_ns() // 1000
+
+
+def is_trace(trace):
+    return isinstance(trace, dict) and isinstance(trace.get("stamps"), list)
+
+
+def parse_message(message):
+    """
+    Parse a message from a client
+    :return: ("frame", {name: [x, y, z]}, trace or None) or ("message", text to forward, None)
+    :raise ValueError: If the message is not understood, with the text to answer
+    """
+    if isinstance(message, bytes):
+        try:
+            return "frame", decode_frame(message), None
+        except ValueError:
+            raise ValueError("Invalid binary frame") from None
+    if message.startswith("select "):
+        # Forme texte envoyée par le viewer
+        return "message", json.dumps({"select": message[len("select "):].strip()}), None
+    try:
+        data = json.loads(message)
+    except ValueError:
+        raise ValueError("Error: Invalid JSON") from None
+    if not isinstance(data, dict):
+        raise ValueError("Invalid message format")
+    frame = data.get("frame")
+    if isinstance(frame, dict) and all(is_location(location) for location in frame.values()):
+        trace = data.get("trace")
+        if is_trace(trace):
+            trace["stamps"].append(["relay.recv", now_us()])
+        return "frame", frame, trace if is_trace(trace) else None
+    if isinstance(data.get("name"), str) and is_location(data.get("location")):
+        return "frame", {data["name"]: data["location"]}, None
+    if isinstance(data.get("select"), str):
+        return "message", json.dumps({"select": data["select"]}), None
+    if is_trace(data.get("trace_report")):
+        # Trace complétée par un viewer, renvoyée à son émetteur (grpc_bridge.py)
+        return "message", message, None
+    raise ValueError("Invalid message format")
+
+
+class Subscriber:
+    """
+    Connected client with its own outgoing queue. Poses are conflated: only
+    the latest value of each part waits, so a slow client receives fewer,
+    fresher frames and never holds the others back. Other messages wait in a
+    bounded deque that drops the oldest one when full.
+    """
+    def __init__(self, websocket, max_messages=MAX_MESSAGES):
+        self.websocket = websocket
+        self.name = "%s:%s" % websocket.remote_address[:2]
+        self.encode = encode_frame if websocket.subprotocol == BINARY_PROTOCOL else json_frame
+        self.poses = {}
+        self.trace = None  # trace de la dernière trame tracée en attente
+        self.since = None  # heure d'arrivée de la plus ancienne pose non envoyée
+        self.messages = deque(maxlen=max_messages)
+        self.wakeup = asyncio.Event()
+        self.sent = 0
+        self.conflated = 0
+        self.dropped = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def depth(self):
+        return len(self.poses) + len(self.messages)
+
+    def push_frame(self, frame, now, trace=None):
+        if trace is not None:
+            self.trace = trace
+        for name, location in frame.items():
+            if self.poses.pop(name, None) is not None:
+                self.conflated += 1
+            self.poses[name] = location
+        if self.since is None:
+            self.since = now
+        self.wakeup.set()
+
+    def push_message(self, text):
+        if len(self.messages) == self.messages.maxlen:
+            self.dropped += 1
+        self.messages.append(text)
+        self.wakeup.set()
+
+    async def run(self):
+        """
+        Send the queued messages until the connection closes
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            await self._send_loop(loop)
+        except ConnectionClosed:
+            pass
+
+    async def _send_loop(self, loop):
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while self.messages:
+                await self.websocket.send(self.messages.popleft())
+                self.sent += 1
+            if self.poses:
+                frame, self.poses = self.poses, {}
+                since, self.since = self.since, None
+                trace, self.trace = self.trace, None
+                if trace is not None:
+                    # Le format binaire ne porte pas de trace, les trames tracées partent en JSON
+                    trace = dict(trace, stamps=trace["stamps"] + [["relay.send", now_us()]])
+                    message = json.dumps({"frame": frame, "trace": trace}, separators=(",", ":"))
+                else:
+                    try:
+                        message = self.encode(frame)
+                    except KeyError:
+                        message = json_frame(frame)  # Pièce sans index binaire
+                await self.websocket.send(message)
+                self.sent += 1
+                self.lag = loop.time() - since
+                self.max_lag = max(self.max_lag, self.lag)
+
+
+class RelayHub:
+    """
+    Broadcast hub replacing src/server.js: a message is parsed once and
+    pushed to every subscriber queue without awaiting any of them, each
+    subscriber is drained by its own task.
+    """
+    def __init__(self, max_messages=MAX_MESSAGES):
+        self.max_messages = max_messages
+        self.subscribers = set()
+
+    async def handler(self, websocket):
+        subscriber = Subscriber(websocket, self.max_messages)
+        self.subscribers.add(subscriber)
+        print(f"Client connecté : {subscriber.name} ({websocket.subprotocol or 'json'}, "
+              f"{len(self.subscribers)} au total)")
+        sender = asyncio.create_task(subscriber.run())
+        try:
+            async for message in websocket:
+                try:
+                    kind, payload, trace = parse_message(message)
+                except ValueError as e:
+                    subscriber.push_message(str(e))
+                    continue
+                self.broadcast(kind, payload, trace)
+        except ConnectionClosed:
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            sender.cancel()
+            print(f"Client déconnecté : {subscriber.name} ({subscriber.sent} envoyés, "
+                  f"{subscriber.conflated} poses conflatées, lag max {subscriber.max_lag * 1000:.1f} ms)")
+
+    def broadcast(self, kind, payload, trace=None):
+        now = asyncio.get_running_loop().time()
+        for subscriber in self.subscribers:
+            if kind == "frame":
+                subscriber.push_frame(payload, now, trace)
+            else:
+                subscriber.push_message(payload)
+
+    def metrics(self):
+        """
+        Per client queue depth and lag, in the Prometheus text format
+        """
+        now = asyncio.get_running_loop().time()
+        lines = [f"relay_clients {len(self.subscribers)}"]
+        series = [
+            ("relay_queue_depth", lambda s: s.depth),
+            # Âge de la plus ancienne pose en attente, 0 si la file est vide
+            ("relay_pending_age_seconds", lambda s: now - s.since if s.since is not None else 0.0),
+            ("relay_lag_seconds", lambda s: s.lag),
+            ("relay_max_lag_seconds", lambda s: s.max_lag),
+            ("relay_sent_total", lambda s: s.sent),
+            ("relay_conflated_total", lambda s: s.conflated),
+            ("relay_dropped_total", lambda s: s.dropped),
+        ]
+        for metric, value in series:
+            for subscriber in self.subscribers:
+                lines.append(f'{metric}{{client="{subscriber.name}"}} {value(subscriber):g}')
+        return "\n".join(lines) + "\n"
+
+    def process_request(self, connection, request):
+        # GET /metrics sur le même port que le WebSocket
+        if request.path == METRICS_PATH:
+            return connection.respond(HTTPStatus.OK, self.metrics())
+        return None
+
+
+def select_subprotocol(connection, subprotocols):
+    """
+    First frame format offered by the client, None (JSON) for a client without negotiation
+    """
+    return next((protocol for protocol in PROTOCOLS if protocol in subprotocols), None)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Relais WebSocket des poses des pièces")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-messages", type=int, default=MAX_MESSAGES,
+                        help="Messages hors pose en attente par client")
+    args = parser.parse_args()
+
+    hub = RelayHub(args.max_messages)
+    async with serve(hub.handler, args.host, args.port, subprotocols=list(PROTOCOLS),
+                     select_subprotocol=select_subprotocol, process_request=hub.process_request,
+                     write_limit=WRITE_LIMIT) as server:
+        print(f"Relais lancé sur ws://{args.host}:{args.port}, métriques sur http://{args.host}:{args.port}{METRICS_PATH}")
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nArrêt du relais.")
@@ -0,0 +1,128 @@
+import asyncio
+import numpy as np
+
+LINEAR = "linear"
+TRAPEZOIDAL = "trapezoidal"
+PROFILES = (LINEAR, TRAPEZOIDAL)
+
+MAX_VELOCITY = 90.0  # degrés/s
+MAX_ACCELERATION = 360.0  # degrés/s²
+
+
+class MotionLimits:
+    """
+    Velocity profile and limits of each joint (one joint per part, its x y z
+    angles move together)
+    """
+    def __init__(self, joints, max_velocity=MAX_VELOCITY, max_acceleration=MAX_ACCELERATION,
+                 profile=TRAPEZOIDAL, profiles=None):
+        """
+        :param joints: Joint names, in the order of the pose arrays
+        :param max_velocity: Maximum velocity in degrees/s, for all joints
+        :param max_acceleration: Maximum acceleration in degrees/s², used by the trapezoidal profile
+        :param profile: Default profile, LINEAR or TRAPEZOIDAL
+        :param profiles: {joint name: profile} overriding the default one
+        """
+        profiles = profiles or {}
+        for name, value in [(None, profile)] + list(profiles.items()):
+            if value not in PROFILES:
+                raise ValueError(f"Unknown profile '{value}'")
+            if name is not None and name not in joints:
+                raise ValueError(f"Unknown joint '{name}'")
+        self.joints = list(joints)
+        self.max_velocity = float(max_velocity)
+        self.max_acceleration = float(max_acceleration)
+        self.trapezoidal = np.array([profiles.get(name, profile) == TRAPEZOIDAL for name in self.joints])
+
+
+def segment_duration(distance, limits):
+    """
+    Shortest duration of a move in which every joint respects its limits,
+    all the joints start and stop together
+    :param distance: Largest angle travelled by each joint, shape (joints,)
+    :return: Duration in seconds
+    """
+    v, a = limits.max_velocity, limits.max_acceleration
+    linear = distance / v
+    # Trapèze complet si la vitesse max est atteinte, triangle sinon
+    trapezoidal = np.where(distance >= v * v / a, distance / v + v / a, 2 * np.sqrt(distance / a))
+    return float(np.max(np.where(limits.trapezoidal, trapezoidal, linear), initial=0.0))
+
+
+def profile_fractions(tau, distance, duration, limits):
+    """
+    Fraction of the move done by each joint at the normalized times tau
+    :param tau: Times divided by the duration, shape (ticks,)
+    :param distance: Largest angle travelled by each joint, shape (joints,)
+    :param duration: Duration of the move, from segment_duration
+    :return: Array of shape (ticks, joints)
+    """
+    tau = tau[:, None]
+    # Part du temps en accélération, la plus courte qui respecte l'accélération max
+    # sur la durée imposée : d = a T² f (1 - f)
+    need = distance / (duration * duration * limits.max_acceleration) if duration > 0 else np.zeros_like(distance)
+    f = (1 - np.sqrt(np.clip(1 - 4 * need, 0.0, 1.0))) / 2
+    f = np.clip(f, 1e-9, 0.5)
+    scale = 1 / (2 * f * (1 - f))
+    trapezoid = np.where(
+        tau < f, tau * tau * scale,
+        np.where(tau <= 1 - f, (tau - f / 2) / (1 - f), 1 - (1 - tau) ** 2 * scale))
+    return np.where(limits.trapezoidal, trapezoid, tau)
+
+
+def interpolate(waypoints, rate, limits):
+    """
+    Turn waypoints into evenly timed poses, every joint of a tick computed in one step
+    :param waypoints: Poses to go through, shape (waypoints, joints, 3), the first one is the current pose
+    :param rate: Frames per second
+    :param limits: MotionLimits
+    :return: Poses of shape (frames, joints, 3), starting after the first waypoint and ending on the last one
+    """
+    frames = []
+    for start, end in zip(waypoints[:-1], waypoints[1:]):
+        delta = end - start
+        distance = np.max(np.abs(delta), axis=1)
+        duration = segment_duration(distance, limits)
+        ticks = max(1, int(np.ceil(duration * rate - 1e-9)))
+        tau = np.arange(1, ticks + 1, dtype=np.float64) / ticks
+        fractions = profile_fractions(tau, distance, duration, limits)
+        frames.append(start + delta * fractions[:, :, None])
+    if not frames:
+        return np.empty((0,) + waypoints.shape[1:])
+    return np.concatenate(frames)
+
+
+class Ticker:
+    """
+    Fixed rate scheduler on the monotonic clock of the event loop. Tick k is
+    due at start + k / rate, so the send time does not accumulate. When ticks
+    are missed, skip_late jumps to the tick due now (the stream stays on time,
+    stale frames are dropped), otherwise the late ticks are sent back to back.
+    """
+    def __init__(self, rate, skip_late=True):
+        self.period = 1.0 / rate
+        self.skip_late = skip_late
+        self.skipped = 0
+
+    async def schedule(self, count):
+        """
+        Yield the indexes 0..count-1 at their due time, the last one is never skipped
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        index = 0
+        while index < count:
+            yield index
+            if index == count - 1:
+                return
+            delay = start + (index + 1) * self.period - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                index += 1
+            elif self.skip_late:
+                due = int((loop.time() - start) / self.period)
+                next_index = min(max(index + 1, due), count - 1)
+                self.skipped += next_index - index - 1
+                index = next_index
+            else:
+                index += 1
@@ -1,15 +1,120 @@
 import { WebSocketServer } from 'ws';
 
-const wss = new WebSocketServer({ port: 8767 });
+// Sous-protocoles des trames : binaire compact ou JSON, un client sans
+// négociation reçoit du JSON
+const BINARY_PROTOCOL = 'pose.v1.binary';
+const JSON_PROTOCOL = 'pose.v1.json';
+
+const PART_NAMES = ['part_1', 'part_2', 'part_3', 'part_4', 'part_5', 'part_6'];
+const PART_INDEX = new Map(PART_NAMES.map((name, i) => [name, i]));
+// Index de la pièce (uint8) puis x y z en float32 little-endian
+const RECORD_SIZE = 13;
+
+const wss = new WebSocketServer({
+  port: 8767,
+  handleProtocols: (protocols) =>
+    [BINARY_PROTOCOL, JSON_PROTOCOL].find((protocol) => protocols.has(protocol)) ?? false,
+});
 
 console.log('Server launched, awaiting message from client...');
 
 const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
 
+const isLocation = (location) =>
+  Array.isArray(location) &&
+  (location.length === 3 || location.length === 4) &&
+  location.every((n) => typeof n === "number");
+
+// { part_1: [x, y, z], ... } d'une trame binaire, null si elle est invalide
+const decodeFrame = (buffer) => {
+  if (buffer.length % RECORD_SIZE !== 0) {
+    return null;
+  }
+  const frame = {};
+  for (let offset = 0; offset < buffer.length; offset += RECORD_SIZE) {
+    const name = PART_NAMES[buffer.readUInt8(offset)];
+    if (name === undefined) {
+      return null;
+    }
+    frame[name] = [
+      buffer.readFloatLE(offset + 1),
+      buffer.readFloatLE(offset + 5),
+      buffer.readFloatLE(offset + 9),
+    ];
+  }
+  return frame;
+};
+
+// Trame binaire d'une trame JSON, null si une pièce n'a pas d'index
+const encodeFrame = (frame) => {
+  const entries = Object.entries(frame);
+  const buffer = Buffer.alloc(entries.length * RECORD_SIZE);
+  let offset = 0;
+  for (const [name, location] of entries) {
+    const part = PART_INDEX.get(name);
+    if (part === undefined) {
+      return null;
+    }
+    buffer.writeUInt8(part, offset);
+    buffer.writeFloatLE(location[0], offset + 1);
+    buffer.writeFloatLE(location[1], offset + 5);
+    buffer.writeFloatLE(location[2], offset + 9);
+    offset += RECORD_SIZE;
+  }
+  return buffer;
+};
+
+// Horloge murale des traces en microsecondes, partagée avec grpc_metrics.py
+const nowUs = () => Math.round((performance.timeOrigin + performance.now()) * 1000);
+
+const isTrace = (trace) =>
+  trace !== null && typeof trace === "object" && Array.isArray(trace.stamps);
+
+// Diffuse une trame à tous les clients dans leur format, chaque forme
+// n'est construite qu'une fois et seulement si un client la demande.
+// Une trame tracée part en JSON pour tous, le format binaire ne porte pas de trace.
+const broadcastFrame = (frame, binary, trace) => {
+  let text = null;
+  if (trace !== undefined) {
+    trace.stamps.push(["relay.send", nowUs()]);
+    text = JSON.stringify({ frame, trace });
+  }
+  for (const client of wss.clients) {
+    if (client.readyState !== client.OPEN) {
+      continue;
+    }
+    if (client.protocol === BINARY_PROTOCOL && trace === undefined) {
+      if (binary === undefined) {
+        binary = encodeFrame(frame);
+      }
+      if (binary !== null) {
+        client.send(binary);
+        continue;
+      }
+    }
+    if (text === null) {
+      text = JSON.stringify({ frame });
+    }
+    client.send(text);
+  }
+};
+
 wss.on('connection', (ws) => {
-  console.log(`✅ Client connected (${wss.clients.size} total)`);
+  console.log(`✅ Client connected (${wss.clients.size} total, ${ws.protocol || 'json'})`);
+
+  ws.on('message', async (message, isBinary) => {
+    const receivedUs = nowUs();
+    if (isBinary) {
+      // Trame binaire : validée puis relayée sans repasser par JSON
+      const frame = decodeFrame(message);
+      if (frame === null) {
+        ws.send("Invalid binary frame");
+      } else {
+        broadcastFrame(frame, message);
+      }
+      return;
+    }
 
-  ws.on('message', async (message) => {
     const text = message.toString();
     console.log("📨 Message received:", text);
 
@@ -17,11 +122,28 @@ wss.on('connection', (ws) => {
       const data = JSON.parse(text);
 
       if (
-        typeof data.name === "string" &&
-        Array.isArray(data.location) &&
-        (data.location.length === 3 || data.location.length === 4) &&
-        data.location.every((n) => typeof n === "number")
+        data.frame !== null &&
+        typeof data.frame === "object" &&
+        !Array.isArray(data.frame) &&
+        Object.values(data.frame).every(isLocation)
       ) {
+        // Trame de plusieurs pièces, cadencée par l'émetteur : pas d'attente entre les clients
+        if (isTrace(data.trace)) {
+          data.trace.stamps.push(["relay.recv", receivedUs]);
+          broadcastFrame(data.frame, undefined, data.trace);
+        } else {
+          broadcastFrame(data.frame);
+        }
+
+      } else if (isTrace(data.trace_report)) {
+        // Trace complétée par un viewer, renvoyée à son émetteur (GRPC/grpc_bridge.py)
+        for (const client of wss.clients) {
+          if (client.readyState === client.OPEN) {
+            client.send(text);
+          }
+        }
+
+      } else if (typeof data.name === "string" && isLocation(data.location)) {
         console.log(`Request to move ${data.name} to ${data.location}`);
         for (const client of wss.clients) {
           if (client.readyState === client.OPEN) {
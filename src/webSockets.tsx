@@ -11,9 +11,51 @@ import { useEntity, LivelinkContext } from "@3dverse/livelink-react";
 import {
   rotateHierarchy,
   PartEntitiesContext,
+  EntityWithParentId,
 } from "./partEntitiesContext";
 import { useSpeed } from "./Interface";
 
+const isLocation = (location: unknown): location is number[] =>
+  Array.isArray(location) &&
+  (location.length === 3 || location.length === 4) &&
+  location.every((n) => typeof n === "number");
+
+// Trames binaires négociées avec src/server.js, JSON en repli
+const POSE_PROTOCOLS = ["pose.v1.binary", "pose.v1.json"];
+const PART_NAMES = ["part_1", "part_2", "part_3", "part_4", "part_5", "part_6"];
+// Index de la pièce (uint8) puis x y z en float32 little-endian
+const RECORD_SIZE = 13;
+
+const applyBinaryFrame = (buffer: ArrayBuffer, entitiesMap: Map<string, EntityWithParentId>) => {
+  if (buffer.byteLength % RECORD_SIZE !== 0) {
+    console.error("Invalid binary frame of", buffer.byteLength, "bytes");
+    return;
+  }
+  const view = new DataView(buffer);
+  for (let offset = 0; offset < buffer.byteLength; offset += RECORD_SIZE) {
+    const name = PART_NAMES[view.getUint8(offset)];
+    if (name !== undefined) {
+      rotateHierarchy(
+        name,
+        [
+          view.getFloat32(offset + 1, true),
+          view.getFloat32(offset + 5, true),
+          view.getFloat32(offset + 9, true),
+        ],
+        entitiesMap
+      );
+    }
+  }
+};
+
+// Horloge murale des traces en microsecondes, partagée avec le relais et grpc_metrics.py
+const nowUs = () => Math.round((performance.timeOrigin + performance.now()) * 1000);
+
+type Trace = { id: string; stamps: [string, number][] };
+
+const isTrace = (trace: unknown): trace is Trace =>
+  typeof trace === "object" && trace !== null && Array.isArray((trace as Trace).stamps);
+
 const WSContext = createContext({
   register: (_setTransform: any, _name: string) => () => {},
 });
@@ -47,7 +89,8 @@ export function WebSocketProvider({ children }: { children: React.ReactNode }) {
   }, [selectedEntity]);
 
   const connectWebSocket = useCallback(() => {
-    const socket = new WebSocket("ws://localhost:8767");
+    const socket = new WebSocket("ws://localhost:8767", POSE_PROTOCOLS);
+    socket.binaryType = "arraybuffer";
     socketRef.current = socket;
 
     socket.onopen = () => {
@@ -59,17 +102,41 @@ export function WebSocketProvider({ children }: { children: React.ReactNode }) {
 
     let lastPart1MessageTime = performance.now();
     socket.onmessage = async (event) => {
+      const receivedUs = nowUs();
+      if (event.data instanceof ArrayBuffer) {
+        if (instance && entitiesMap.size > 0) {
+          applyBinaryFrame(event.data, entitiesMap);
+        }
+        return;
+      }
       const msg = event.data.trim();
 
       try {
         const parsed = JSON.parse(msg);
-        if (
-          typeof parsed !== "object" ||
-          typeof parsed.name !== "string" ||
-          !Array.isArray(parsed.location) ||
-          (parsed.location.length !== 3 && parsed.location.length !== 4) ||
-          !parsed.location.every((n: number) => typeof n === "number")
-        ) {
+        if (typeof parsed !== "object" || parsed === null) {
+          return;
+        }
+
+        // Trame groupée : { frame: { part_1: [x, y, z], ... } }
+        if (typeof parsed.frame === "object" && parsed.frame !== null) {
+          if (!instance || entitiesMap.size === 0) {
+            return;
+          }
+          for (const [name, location] of Object.entries(parsed.frame)) {
+            if (isLocation(location)) {
+              const [x, y, z] = location;
+              rotateHierarchy(name, [x, y, z], entitiesMap);
+            }
+          }
+          // Trame tracée : la trace complétée repart vers son émetteur par le relais
+          if (isTrace(parsed.trace)) {
+            parsed.trace.stamps.push(["viewer.recv", receivedUs], ["viewer.applied", nowUs()]);
+            socket.send(JSON.stringify({ trace_report: parsed.trace }));
+          }
+          return;
+        }
+
+        if (typeof parsed.name !== "string" || !isLocation(parsed.location)) {
           return;
         }
 